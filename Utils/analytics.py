@@ -0,0 +1,235 @@
+"""Player analytics as pure functions, memoized per data version.
+
+Pages used to gather a player's numbers inside their render functions, so
+every rerun and tab switch recomputed them and nothing could be timed
+outside a Streamlit run. Here the work is split in two:
+
+- load_player_data() reads everything one player's analytics need from
+  the shared store, the season archive and the course catalog into a
+  PlayerData record
+- dashboard() turns a PlayerData into display-ready numbers; it does no
+  I/O and uses no randomness, so it can be called from benchmarks and
+  returns the same result for the same data
+
+player_dashboard() and player_statistics() combine the two behind a
+TTLCache keyed by (player id, data version, ...). The store bumps its
+version on every write, so a cached result is never served after the data
+changed; LRU eviction bounds memory and the TTL bounds the staleness of
+inputs the version does not cover (the archive, the catalog). Cached
+results are shared between sessions: treat them as read-only.
+
+    python -m benchmarks.analytics_cache
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from Utils import scorecard
+from Utils.course_catalog import get_catalog
+from Utils.instrumentation import timed
+from Utils.match_archive import get_archive
+from Utils.match_frame import course_breakdown, performance_summary, player_rounds
+from Utils.player_stats import merge_records, summarize
+from Utils.shared_store import get_store
+
+MAX_ENTRIES = 512
+TTL_SECONDS = 300
+
+# Rounds compared for the recent-form deltas
+FORM_WINDOW = 3
+HISTORY_MONTHS = 6
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Least-recently-used cache whose entries also expire after ``ttl`` seconds"""
+
+    def __init__(self, maxsize=MAX_ENTRIES, ttl=TTL_SECONDS, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                'maxsize': self.maxsize, 'ttl': self.ttl}
+
+
+def cached(maxsize=MAX_ENTRIES, ttl=TTL_SECONDS):
+    """Memoize a function on its (hashable) arguments in its own TTLCache"""
+    def decorate(function):
+        cache = TTLCache(maxsize, ttl)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = function(*args, **kwargs)
+                cache.put(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorate
+
+
+@dataclass(slots=True)
+class PlayerData:
+    """Everything one player's analytics are computed from"""
+    player_id: int
+    # Aggregate record (Utils.player_stats), archived seasons included
+    record: dict
+    # Completed rounds (Utils.match_frame layout), archived seasons included
+    rounds: object
+    # Stacked 18-hole scorecards and their pars (Utils.scorecard)
+    cards: object
+    pars: object
+    # (month label, index or None) for the last HISTORY_MONTHS month ends
+    handicap_months: list
+    # Index 30 days ago and today (None before the first index)
+    handicap_month_ago: float = None
+    handicap_now: float = None
+    rank: int = None
+    leaderboard_size: int = 0
+
+
+def all_player_rounds(store, archive, player_id):
+    """One player's completed rounds from live matches and archived seasons"""
+    rounds = player_rounds(store.rounds_frame(), player_id)
+    archived = archive.player_rounds(player_id)
+    if archived is None:
+        return rounds
+    if not len(rounds):
+        return archived
+    return pd.concat([archived, rounds], ignore_index=True)
+
+@timed()
+def load_player_data(player_id, today, store=None, archive=None, catalog=None):
+    """Read one player's analytics inputs from storage"""
+    store = store or get_store()
+    archive = archive or get_archive()
+    store.sync()
+    months = pd.date_range(end=today, periods=HISTORY_MONTHS, freq='ME')
+    month_indexes = store.handicaps.index_on(player_id, [month.date() for month in months])
+    month_ago, now = store.handicaps.index_on(player_id, [today - timedelta(days=30), today])
+    cards, pars, _ = scorecard.player_cards(
+        store.query_matches(player=player_id, status='Completed'), player_id, catalog or get_catalog()
+    )
+    return PlayerData(
+        player_id=player_id,
+        record=merge_records(store.player_stats.get(player_id), archive.player_record(player_id)),
+        rounds=all_player_rounds(store, archive, player_id),
+        cards=cards,
+        pars=pars,
+        handicap_months=[(month.strftime('%b %Y'), index) for month, index in zip(months, month_indexes)],
+        handicap_month_ago=month_ago,
+        handicap_now=now,
+        rank=store.leaderboard.rank_of(player_id),
+        leaderboard_size=len(store.leaderboard)
+    )
+
+
+def _form_change(values):
+    """Mean of the last FORM_WINDOW values minus the mean of the ones before, or None"""
+    if len(values) < 2 * FORM_WINDOW:
+        return None
+    recent = values[-FORM_WINDOW:]
+    before = values[-2 * FORM_WINDOW:-FORM_WINDOW]
+    return round(float(np.mean(recent) - np.mean(before)), 1)
+
+@timed()
+def dashboard(data, entered_handicap=None):
+    """Display-ready analytics of one player; None marks numbers without data
+
+    ``entered_handicap`` stands in for the handicap index before the first
+    one is calculated.
+    """
+    stats = summarize(data.record)
+    performance = performance_summary(data.rounds, data.player_id)
+    cards = scorecard.summary(data.cards, data.pars) or {}
+    scores = stats['recent_scores'][-6:]
+    won = data.rounds.sort_values('date')['won'].to_numpy(dtype=float)
+
+    # Driving accuracy and scrambling need hole-by-hole scorecards
+    driving = cards.get('fairway_percentage')
+    return {
+        'total_matches': stats['total_matches'],
+        'win_rate': round(stats['win_rate'], 1),
+        # Win rate over the last rounds against the rounds before them
+        'win_rate_change': _form_change(won * 100),
+        'avg_score': (round(stats['avg_score'], 1) if scores
+                      else None if entered_handicap is None else entered_handicap + 72),
+        'score_change': _form_change(stats['recent_scores']),
+        'handicap_change': (round(data.handicap_now - data.handicap_month_ago, 1)
+                            if None not in (data.handicap_month_ago, data.handicap_now) else 0),
+        'current_rank': data.rank or data.leaderboard_size + 1,
+        'handicap_history': [
+            {'month': month, 'handicap': index if index is not None else entered_handicap}
+            for month, index in data.handicap_months
+        ],
+        'course_performance': course_breakdown(data.rounds, data.player_id),
+        'best_score': stats['best_score'] if scores else None,
+        'avg_putts': stats['avg_putts'],
+        # Scorecard figures only stand in for missing stats, not for a 0%
+        'fairway_percentage': (driving if performance['fairway_percentage'] is None
+                               else performance['fairway_percentage']),
+        'gir_percentage': (cards.get('gir_percentage') if performance['gir_percentage'] is None
+                           else performance['gir_percentage']),
+        'driving_accuracy': driving,
+        'scrambling_percentage': cards.get('scrambling_percentage'),
+        'scorecard_rounds': len(data.cards),
+        'hole_averages': scorecard.hole_averages(data.cards, data.pars) if len(data.cards) else None,
+        'par_type_summary': scorecard.par_type_summary(data.cards, data.pars) if len(data.cards) else {},
+        'recent_scores': scores,
+        'recent_dates': [datetime.fromisoformat(date).strftime('%m/%d') for date in stats['recent_dates'][-6:]]
+    }
+
+
+@cached()
+def player_dashboard(player_id, version, today, entered_handicap=None):
+    """dashboard() of a player, cached per data version and day"""
+    return dashboard(load_player_data(player_id, today), entered_handicap)
+
+@cached()
+def player_statistics(player_id, version):
+    """Career statistics of a player (Utils.player_stats.summarize), cached per data version"""
+    return summarize(merge_records(get_store().player_stats.get(player_id), get_archive().player_record(player_id)))
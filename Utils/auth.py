@@ -0,0 +1,184 @@
+"""Salted password hashes indexed by email.
+
+Passwords used to be compared in plaintext against the user records, which
+meant the first session had to build the SharedStore (every user and every
+match) before the login form could check anything. Credentials now live
+in their own small file, credentials.json:
+
+    {email: [player_id, iterations, salt, hash]}
+
+with salt and hash base64-encoded and hash = PBKDF2-HMAC-SHA256(password,
+salt, iterations). The file is loaded once per process and reread only
+when another process has rewritten it, so showing the login page and
+checking a password read nothing else, however much match history exists.
+
+The KDF cost is GOLF_KDF_ITERATIONS (default 600,000). A password hashed
+with a different count is rehashed at its next successful login, so the
+cost can be raised without resetting anyone's password.
+
+Plaintext passwords in existing user records are hashed and removed from
+the records on first start, or explicitly with:
+
+    python -m Utils.auth migrate
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from contextlib import contextmanager
+
+from Utils.persistence import atomic_write_json, file_lock, file_signature, read_json
+
+CREDENTIALS_FILE = 'credentials.json'
+
+ITERATIONS = int(os.environ.get('GOLF_KDF_ITERATIONS', 600_000))
+SALT_BYTES = 16
+
+_credentials = None
+_credentials_lock = threading.Lock()
+
+
+def _derive(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+def make_entry(password, player_id, iterations=None):
+    """[player_id, iterations, salt, hash] for a new password"""
+    iterations = iterations or ITERATIONS
+    salt = secrets.token_bytes(SALT_BYTES)
+    return [player_id, iterations, base64.b64encode(salt).decode('ascii'),
+            base64.b64encode(_derive(password, salt, iterations)).decode('ascii')]
+
+def check(entry, password):
+    """Whether ``password`` matches a stored entry"""
+    _, iterations, salt, expected = entry
+    return hmac.compare_digest(_derive(password, base64.b64decode(salt), iterations), base64.b64decode(expected))
+
+
+class CredentialStore:
+    """Password hashes and player ids keyed by email"""
+
+    def __init__(self, path=CREDENTIALS_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._signature = None
+
+    def load(self):
+        with self._lock:
+            self._signature = file_signature(self.path)
+            self._entries = read_json(self.path, {})
+
+    def refresh(self):
+        """Reload if another process has rewritten the file"""
+        if file_signature(self.path) != self._signature:
+            self.load()
+
+    def save(self):
+        atomic_write_json(self.path, self._entries)
+        self._signature = file_signature(self.path)
+
+    @contextmanager
+    def editing(self):
+        """Lock the file, pick up other writers' changes, then save on exit"""
+        with self._lock, file_lock(self.path):
+            self.refresh()
+            yield self
+            self.save()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, email):
+        self.refresh()
+        return email in self._entries
+
+    def set_many(self, accounts, iterations=None):
+        """Set the password of every (email, password, player id)"""
+        with self.editing():
+            for email, password, player_id in accounts:
+                self._entries[email] = make_entry(password, player_id, iterations)
+
+    def set(self, email, password, player_id):
+        self.set_many([(email, password, player_id)])
+
+    def player_id(self, email):
+        """Player id stored with the account, or None"""
+        self.refresh()
+        entry = self._entries.get(email)
+        return entry[0] if entry is not None else None
+
+    def verify(self, email, password):
+        """Whether the account exists and the password matches"""
+        self.refresh()
+        entry = self._entries.get(email)
+        if entry is None:
+            # Spend the same time as for a real account
+            check([None, ITERATIONS, '', ''], password)
+            return False
+        if not check(entry, password):
+            return False
+        if entry[1] != ITERATIONS:
+            with self.editing():
+                if self._entries.get(email) == entry:
+                    self._entries[email] = make_entry(password, entry[0])
+        return True
+
+
+def migrate(storage, credentials):
+    """Move plaintext passwords out of the user records into ``credentials``
+
+    Records from before the player registry have no player id yet. Their
+    ids are resolved through the registry here, which hands the same id to
+    the registry migration that later writes it into the records.
+
+    Returns the number of accounts migrated.
+    """
+    users = storage.load_users()
+    plaintext = {email: info for email, info in users.items() if 'password' in info}
+    if not plaintext:
+        return 0
+    from Utils.player_registry import get_registry
+    registry = get_registry()
+    credentials.set_many(
+        (email, info['password'], info.get('player_id') or registry.register(info['name'], email))
+        for email, info in plaintext.items()
+    )
+    storage.save_users({
+        email: {key: value for key, value in info.items() if key != 'password'} for email, info in users.items()
+    })
+    return len(plaintext)
+
+
+def get_credentials():
+    """Return the process-wide credential store, migrating plaintext passwords on first start"""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            credentials = CredentialStore()
+            credentials.load()
+            if credentials._signature is None:
+                # No credentials file yet: older installs kept passwords in the user records
+                from Utils.storage import get_storage
+                migrate(get_storage(), credentials)
+            _credentials = credentials
+        return _credentials
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage login credentials")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('migrate', help="hash plaintext passwords found in the user records")
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        from Utils.storage import get_storage
+        credentials = CredentialStore()
+        credentials.load()
+        print(f"Migrated {migrate(get_storage(), credentials)} accounts")
+
+
+if __name__ == '__main__':
+    main()
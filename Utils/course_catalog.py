@@ -0,0 +1,291 @@
+"""Catalog of golf courses and their holes.
+
+Course definitions (par, yardage, stroke index and the positions of tee,
+green and hazards per hole, plus course rating and slope) live in
+courses.json. Positions are (x, y) in yards on a flat grid with the first
+tee at the origin. The file is read once per process
+and only re-read when another process rewrites it, so pages render holes
+from the same cached objects on every rerun instead of generating them.
+
+On first use the file is created from the built-in courses below. Their hole
+layouts are derived from a hash of the course name, so every install starts
+with the same numbers; edit courses.json to enter real scorecards. Holes
+without positions are given the built-in layout. Distance queries go
+through Utils.course_geometry, built once per course (catalog.geometry).
+
+    python -m Utils.course_catalog list
+    python -m Utils.course_catalog show "Willingdon Sports Club"
+"""
+import argparse
+import math
+import random
+import threading
+import zlib
+from dataclasses import dataclass
+
+from Utils.course_geometry import CourseGeometry
+from Utils.persistence import atomic_write_json, file_lock, file_signature, read_json
+
+COURSES_FILE = 'courses.json'
+
+# Par used for matches on courses that are not in the catalog
+DEFAULT_PAR = 72
+
+# (name, other names it has been entered under)
+DEFAULT_COURSES = [
+    ('Bombay Presidency Golf Club', ['Bombay Presidency Golf Club (BPGC)']),
+    ('Willingdon Sports Club', []),
+    ('Juhu Vile Parle Gymkhana Club', []),
+    ('Kharghar Valley Golf Course', []),
+    ('Royal Palms Golf & Country Club', []),
+    ('9 Aces Golf Greens & Academy', []),
+    ('Golden Swan Country Club', []),
+    ('Aamby Valley Golf Course', []),
+    ('Pebble Beach Golf Links', []),
+    ('St. Andrews Links', []),
+    ('Augusta National Golf Club', []),
+    ('TPC Sawgrass', []),
+    ('Bethpage Black Course', []),
+    ('Royal Melbourne Golf Club', []),
+]
+
+# Par of each hole of the built-in layouts
+DEFAULT_PARS = [4, 4, 3, 5, 4, 4, 3, 4, 5, 4, 3, 4, 5, 4, 4, 3, 4, 5]
+YARDAGE_RANGES = {3: (140, 220), 4: (340, 450), 5: (480, 570)}
+HAZARD_KINDS = ('bunker', 'water')
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class Hazard:
+    kind: str
+    x: float
+    y: float
+
+    def to_dict(self):
+        return {'kind': self.kind, 'x': self.x, 'y': self.y}
+
+
+@dataclass(frozen=True, slots=True)
+class Hole:
+    number: int
+    par: int
+    yardage: int
+    # 1 = hardest hole, where handicap strokes are received first
+    stroke_index: int
+    tee: tuple = None
+    green: tuple = None
+    hazards: tuple = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            number=data['number'],
+            par=data['par'],
+            yardage=data['yardage'],
+            stroke_index=data['stroke_index'],
+            tee=tuple(data['tee']) if data.get('tee') else None,
+            green=tuple(data['green']) if data.get('green') else None,
+            hazards=tuple(Hazard(**hazard) for hazard in data.get('hazards', ()))
+        )
+
+    def to_dict(self):
+        data = {'number': self.number, 'par': self.par, 'yardage': self.yardage,
+                'stroke_index': self.stroke_index}
+        if self.tee is not None:
+            data.update(tee=list(self.tee), green=list(self.green),
+                        hazards=[hazard.to_dict() for hazard in self.hazards])
+        return data
+
+
+@dataclass(frozen=True, slots=True)
+class Course:
+    name: str
+    holes: tuple
+    rating: float
+    slope: int
+    aliases: tuple = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        holes = tuple(Hole.from_dict(hole) for hole in data['holes'])
+        if any(hole.tee is None or hole.green is None for hole in holes):
+            holes = layout_holes(data['name'], holes)
+        return cls(
+            name=data['name'],
+            holes=holes,
+            rating=data['rating'],
+            slope=data['slope'],
+            aliases=tuple(data.get('aliases', ()))
+        )
+
+    def to_dict(self):
+        return {'name': self.name, 'aliases': list(self.aliases), 'rating': self.rating,
+                'slope': self.slope, 'holes': [hole.to_dict() for hole in self.holes]}
+
+    @property
+    def par(self):
+        return sum(hole.par for hole in self.holes)
+
+    @property
+    def yardage(self):
+        return sum(hole.yardage for hole in self.holes)
+
+    def hole(self, number):
+        return self.holes[number - 1]
+
+
+def layout_holes(name, holes):
+    """Holes with built-in tee, green and hazard positions
+
+    Each green is placed ``yardage`` from its tee, and the next tee a short
+    walk from the previous green, so the routing is the same on every
+    install and consistent with the scorecard.
+    """
+    rng = random.Random(zlib.crc32(('layout:' + name).encode('utf-8')))
+    heading = rng.uniform(0, 2 * math.pi)
+    x = y = 0.0
+    placed = []
+    for hole in holes:
+        dx, dy = math.cos(heading), math.sin(heading)
+        tee = (round(x, 1), round(y, 1))
+        green = (round(x + dx * hole.yardage, 1), round(y + dy * hole.yardage, 1))
+
+        # Hazards at a distance along the hole and an offset to either side
+        hazards = []
+        spots = [(min(hole.yardage - 20, rng.uniform(200, 260)), rng.uniform(15, 30))] if hole.par > 3 else []
+        spots.append((hole.yardage - rng.uniform(5, 15), rng.uniform(12, 22)))
+        if rng.random() < 0.3:
+            spots.append((rng.uniform(0.3, 0.7) * hole.yardage, rng.uniform(25, 45)))
+        for i, (along, across) in enumerate(spots):
+            side = rng.choice((-1, 1))
+            kind = HAZARD_KINDS[1] if i == 2 else HAZARD_KINDS[0]
+            hazards.append(Hazard(kind, round(x + dx * along - dy * across * side, 1),
+                                  round(y + dy * along + dx * across * side, 1)))
+        placed.append(Hole(hole.number, hole.par, hole.yardage, hole.stroke_index, tee, green, tuple(hazards)))
+
+        # Walk to the next tee, then turn
+        x, y = green[0] - dy * 30, green[1] + dx * 30
+        heading += rng.uniform(math.pi / 2, math.pi * 0.9) * rng.choice((-1, 1))
+    return tuple(placed)
+
+def default_course(name, aliases=()):
+    """Built-in definition of a course, the same on every install"""
+    rng = random.Random(zlib.crc32(name.encode('utf-8')))
+    yardages = [rng.randrange(*YARDAGE_RANGES[par], 5) for par in DEFAULT_PARS]
+
+    # Longer holes for their par are harder; odd indexes go to the front nine
+    stroke_index = [0] * len(DEFAULT_PARS)
+    for nine, first in ((range(0, 9), 1), (range(9, 18), 2)):
+        ranked = sorted(nine, key=lambda i: yardages[i] / DEFAULT_PARS[i], reverse=True)
+        for rank, i in enumerate(ranked):
+            stroke_index[i] = first + 2 * rank
+
+    yardage = sum(yardages)
+    holes = tuple(Hole(i + 1, par, yardages[i], stroke_index[i]) for i, par in enumerate(DEFAULT_PARS))
+    return Course(
+        name=name,
+        holes=layout_holes(name, holes),
+        rating=round(sum(DEFAULT_PARS) + (yardage - 6500) / 220, 1),
+        slope=113 + (yardage - 6000) // 40,
+        aliases=tuple(aliases)
+    )
+
+
+class CourseCatalog:
+    """Courses by name, loaded from courses.json and cached until it changes"""
+
+    def __init__(self, path=COURSES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._courses = {}
+        self._by_name = {}
+        self._geometry = {}
+        self._signature = None
+
+    def load(self):
+        with self._lock:
+            with file_lock(self.path):
+                data = read_json(self.path)
+                if data is None:
+                    data = [default_course(name, aliases).to_dict() for name, aliases in DEFAULT_COURSES]
+                    atomic_write_json(self.path, data, indent=2)
+                self._signature = file_signature(self.path)
+            courses = {course.name: course for course in map(Course.from_dict, data)}
+            by_name = {alias: course for course in courses.values() for alias in course.aliases}
+            by_name.update(courses)
+            self._courses, self._by_name, self._geometry = courses, by_name, {}
+
+    def refresh(self):
+        """Reload if another process has rewritten the file"""
+        if file_signature(self.path) != self._signature:
+            self.load()
+
+    def names(self):
+        """Course names in catalog order"""
+        return list(self._courses)
+
+    def get(self, name):
+        """Course by name or alias, or None"""
+        return self._by_name.get(name)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(self._courses.values())
+
+    def __len__(self):
+        return len(self._courses)
+
+    def geometry(self, name):
+        """Cached distance model of a course (Utils.course_geometry), or None"""
+        course = self._by_name.get(name)
+        if course is None:
+            return None
+        geometry = self._geometry.get(course.name)
+        if geometry is None:
+            geometry = self._geometry.setdefault(course.name, CourseGeometry(course))
+        return geometry
+
+    def par_of(self, name, default=DEFAULT_PAR):
+        course = self._by_name.get(name)
+        return course.par if course is not None else default
+
+
+def get_catalog():
+    """Return the process-wide course catalog, up to date with courses.json"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = CourseCatalog()
+            _catalog.load()
+        else:
+            _catalog.refresh()
+        return _catalog
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the course catalog")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('list', help="list courses with par, yardage, rating and slope")
+    show = subcommands.add_parser('show', help="show one course hole by hole")
+    show.add_argument('name')
+    args = parser.parse_args(argv)
+
+    catalog = get_catalog()
+    if args.command == 'list':
+        for course in catalog:
+            print(f"{course.name}: par {course.par}, {course.yardage} yds, "
+                  f"rating {course.rating}, slope {course.slope}")
+    else:
+        course = catalog.get(args.name)
+        if course is None:
+            parser.error(f"unknown course: {args.name}")
+        for hole in course.holes:
+            print(f"{hole.number:2d}  par {hole.par}  {hole.yardage:3d} yds  SI {hole.stroke_index}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Vectorized distance model of one course.
+
+CourseGeometry turns a catalog course into NumPy arrays once: tee and green
+positions, every hazard with the hole it belongs to, and the pairwise
+distance matrix between all tees and greens. GPS questions on the Ground
+Details page ("how far to the green from here", "nearest hazard") are then
+a single vectorized expression over a few dozen points instead of Python
+loops per interaction. Instances are cached by Utils.course_catalog.
+"""
+import numpy as np
+
+
+def distances(point, targets):
+    """Straight-line distance in yards from one point to each of ``targets`` (k x 2)"""
+    delta = np.asarray(targets, dtype=np.float64) - np.asarray(point, dtype=np.float64)
+    return np.hypot(delta[..., 0], delta[..., 1])
+
+
+class CourseGeometry:
+    """Tee, green and hazard positions of a course as arrays"""
+
+    def __init__(self, course):
+        holes = course.holes
+        self.holes = len(holes)
+        self.tees = np.array([hole.tee for hole in holes], dtype=np.float64)
+        self.greens = np.array([hole.green for hole in holes], dtype=np.float64)
+
+        hazards = [(hole.number, hazard) for hole in holes for hazard in hole.hazards]
+        self.hazards = np.array([(hazard.x, hazard.y) for _, hazard in hazards], dtype=np.float64).reshape(-1, 2)
+        self.hazard_kinds = [hazard.kind for _, hazard in hazards]
+        # hazards[hazard_starts[i]:hazard_starts[i + 1]] belong to hole i + 1
+        hazard_holes = np.array([number for number, _ in hazards], dtype=np.int64)
+        self.hazard_starts = np.searchsorted(hazard_holes, np.arange(1, self.holes + 2))
+
+        # Rows and columns: tees of holes 1..n, then greens of holes 1..n
+        self.points = np.vstack([self.tees, self.greens])
+        delta = self.points[:, None, :] - self.points[None, :, :]
+        self.matrix = np.hypot(delta[..., 0], delta[..., 1])
+        for array in (self.tees, self.greens, self.hazards, self.points, self.matrix):
+            array.flags.writeable = False
+
+    def tee_to_green(self, from_hole, to_hole):
+        """Yards from the tee of one hole to the green of another (or the same) hole"""
+        return float(self.matrix[from_hole - 1, self.holes + to_hole - 1])
+
+    def green_to_tee(self, from_hole, to_hole):
+        """Walking distance from one green to another hole's tee"""
+        return float(self.matrix[self.holes + from_hole - 1, to_hole - 1])
+
+    def point_on_hole(self, hole, yards):
+        """Position ``yards`` from the tee towards the green"""
+        tee, green = self.tees[hole - 1], self.greens[hole - 1]
+        length = np.hypot(*(green - tee))
+        return tee + (green - tee) * (yards / length if length else 0.0)
+
+    def advance(self, point, hole, yards):
+        """Position after a shot of ``yards`` from ``point`` straight at the green"""
+        green = self.greens[hole - 1]
+        remaining = distances(point, green)
+        if remaining <= yards:
+            return green.copy()
+        return np.asarray(point, dtype=np.float64) + (green - point) * (yards / remaining)
+
+    def to_green(self, hole, point):
+        return float(distances(point, self.greens[hole - 1]))
+
+    def hole_hazards(self, hole):
+        start, stop = self.hazard_starts[hole - 1], self.hazard_starts[hole]
+        return self.hazards[start:stop], self.hazard_kinds[start:stop]
+
+    def nearest_hazard(self, hole, point):
+        """(kind, yards) of the closest hazard on a hole, or None if it has none"""
+        positions, kinds = self.hole_hazards(hole)
+        if not len(positions):
+            return None
+        yards = distances(point, positions)
+        closest = int(np.argmin(yards))
+        return kinds[closest], float(yards[closest])
+
+    def hazard_distances(self, hole, point):
+        """(kind, yards) of every hazard on a hole, nearest first"""
+        positions, kinds = self.hole_hazards(hole)
+        yards = distances(point, positions)
+        return [(kinds[i], float(yards[i])) for i in np.argsort(yards)]
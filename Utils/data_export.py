@@ -0,0 +1,232 @@
+"""Streaming export of matches, player statistics and the leaderboard.
+
+Rows are produced in chunks of CHUNK_SIZE by generators: matches are paged
+out of storage with the (date, id) keyset cursor of query_matches, archived
+seasons are sliced from their memory-mapped rounds, and players and
+leaderboard entries are read a page at a time. Each chunk is written out
+before the next one is read, so an export holds one chunk in memory no
+matter how many seasons it covers.
+
+CSV is always available. Parquet is written (one row group per chunk) when
+pyarrow is installed. The matches export has one row per player's round,
+in the column layout Utils.match_import reads back.
+
+    python -m Utils.data_export matches matches.csv --season 2024
+    python -m Utils.data_export player_stats stats.parquet
+    python -m Utils.data_export leaderboard leaderboard.csv
+"""
+import argparse
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export needs pyarrow; CSV works without it
+    pa = pq = None
+
+from Utils.match_archive import get_archive
+from Utils.player_stats import merge_records, summarize
+from Utils.shared_store import get_store
+
+CHUNK_SIZE = 5000
+# Exports larger than this spill from memory to a temporary file
+SPOOL_SIZE = 8 * 1024 * 1024
+
+# (column, pyarrow type name) per dataset
+MATCH_COLUMNS = [
+    ('match', 'int64'), ('date', 'timestamp'), ('status', 'string'), ('course', 'string'),
+    ('course_par', 'int64'), ('handicap', 'float64'), ('format', 'string'),
+    ('player_id', 'int64'), ('player', 'string'), ('score', 'int64'),
+    ('total_putts', 'int64'), ('fairways_hit', 'int64'), ('greens_in_regulation', 'int64'),
+]
+PLAYER_STATS_COLUMNS = [
+    ('player_id', 'int64'), ('player', 'string'), ('matches', 'int64'), ('wins', 'int64'),
+    ('win_rate', 'float64'), ('avg_score', 'float64'), ('best_score', 'int64'),
+    ('avg_putts', 'float64'), ('handicap_index', 'float64'),
+]
+LEADERBOARD_COLUMNS = [
+    ('rank', 'int64'), ('player_id', 'int64'), ('player', 'string'), ('handicap', 'float64'),
+    ('points', 'int64'), ('matches_played', 'int64'),
+]
+
+
+def _match_rows(match):
+    """One row per player of a match"""
+    shared = (match['id'], match['date'], match.get('status'), match.get('location'),
+              match.get('course_par'), match.get('handicap'), match.get('format'))
+    scores = match.get('scores') or ()
+    stats = match.get('player_stats') or {}
+    for i, (player_id, player) in enumerate(zip(match.player_ids or (), match.players)):
+        player_stats = stats.get(player) or {}
+        yield (*shared, player_id, player, scores[i] if i < len(scores) else None,
+               player_stats.get('total_putts'), player_stats.get('fairways_hit'),
+               player_stats.get('greens_in_regulation'))
+
+def _optional_ints(series):
+    return [None if value != value else int(value) for value in series.tolist()]
+
+def _archived_chunks(season, chunk_size):
+    """Rows of an archived season's rounds, chunk_size at a time"""
+    archived = get_archive().seasons().get(season)
+    rounds = archived.rounds() if archived is not None else None
+    if rounds is None:
+        return
+    for start in range(0, len(rounds), chunk_size):
+        part = rounds.iloc[start:start + chunk_size]
+        missing = [None] * len(part)
+        yield list(zip(
+            part['match_id'].tolist(),
+            part['date'].tolist(),
+            ['Completed'] * len(part),
+            part['course'].astype(str).tolist(),
+            part['course_par'].tolist(),
+            # Archives do not keep the handicap or format
+            missing,
+            missing,
+            part['player_id'].tolist(),
+            part['player'].astype(str).tolist(),
+            *(_optional_ints(part[column]) for column in ('score', 'putts', 'fairways', 'gir'))
+        ))
+
+def match_chunks(season=None, status='Completed', chunk_size=CHUNK_SIZE):
+    """Match rows of archived seasons, then of live matches in date order
+
+    With ``season`` only that year's matches are exported, wherever they are.
+    """
+    store = get_store()
+    store.sync()
+    if status in (None, 'Completed'):
+        for archived in [season] if season is not None else sorted(get_archive().seasons()):
+            yield from _archived_chunks(archived, chunk_size)
+
+    after = (datetime(season, 1, 1), 0) if season is not None else None
+    while True:
+        page = store.query_matches(status=status, limit=chunk_size, after=after)
+        matches = [match for match in page if season is None or match['date'].year == season]
+        rows = [row for match in matches for row in _match_rows(match)]
+        if rows:
+            yield rows
+        # A short page is the last one; a match past the season ends it too
+        if len(page) < chunk_size or len(matches) < len(page):
+            return
+        after = (page[-1]['date'], page[-1]['id'])
+
+def player_stats_chunks(chunk_size=CHUNK_SIZE):
+    """Career statistics of every player, archived seasons included"""
+    store = get_store()
+    store.sync()
+    archive = get_archive()
+    player_ids = sorted({int(player_id) for player_id in store.player_stats.aggregates} | archive.player_ids())
+    for start in range(0, len(player_ids), chunk_size):
+        rows = []
+        for player_id in player_ids[start:start + chunk_size]:
+            stats = summarize(merge_records(store.player_stats.get(player_id), archive.player_record(player_id)))
+            rows.append((player_id, store.registry.name_of(player_id), stats['total_matches'], stats['wins'],
+                         stats['win_rate'], stats['avg_score'], stats['best_score'] or None,
+                         stats['avg_putts'], store.handicaps.get(player_id)))
+        yield rows
+
+def leaderboard_chunks(chunk_size=CHUNK_SIZE):
+    """Leaderboard standings by points"""
+    store = get_store()
+    store.sync()
+    leaderboard = store.leaderboard
+    for offset in range(0, len(leaderboard), chunk_size):
+        yield [(rank, entry['player_id'], entry['name'], entry.get('handicap'), entry.get('points', 0),
+                entry.get('matches_played', 0))
+               for rank, entry in enumerate(leaderboard.page('points', True, offset, chunk_size), offset + 1)]
+
+DATASETS = {
+    'matches': (MATCH_COLUMNS, match_chunks),
+    'player_stats': (PLAYER_STATS_COLUMNS, player_stats_chunks),
+    'leaderboard': (LEADERBOARD_COLUMNS, leaderboard_chunks),
+}
+
+
+def parquet_available():
+    return pq is not None
+
+def write_csv(chunks, columns, f):
+    """Write chunks of rows to a text file as CSV"""
+    writer = csv.writer(f)
+    writer.writerow([name for name, _ in columns])
+    rows = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        rows += len(chunk)
+    return rows
+
+def _arrow_type(name):
+    return pa.timestamp('us') if name == 'timestamp' else getattr(pa, name)()
+
+def write_parquet(chunks, columns, f):
+    """Write chunks of rows to a path or binary file as Parquet, one row group per chunk"""
+    if pq is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    schema = pa.schema([(name, _arrow_type(type_name)) for name, type_name in columns])
+    rows = 0
+    with pq.ParquetWriter(f, schema) as writer:
+        for chunk in chunks:
+            arrays = [pa.array(list(values), type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+def export(dataset, f, file_format='csv', **options):
+    """Stream one dataset into an open file; returns the number of rows written
+
+    CSV needs a text file opened with newline='', Parquet a binary file or path.
+    """
+    columns, chunks = DATASETS[dataset]
+    if file_format == 'parquet':
+        return write_parquet(chunks(**options), columns, f)
+    return write_csv(chunks(**options), columns, f)
+
+def export_file(dataset, file_format='csv', **options):
+    """A dataset exported to a temporary file, rewound for reading"""
+    f = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    if file_format == 'parquet':
+        export(dataset, f, file_format, **options)
+    else:
+        text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+        export(dataset, text, file_format, **options)
+        text.detach()
+    f.seek(0)
+    return f
+
+def export_bytes(dataset, file_format='csv', **options):
+    """A dataset exported as bytes, the form st.download_button accepts"""
+    with export_file(dataset, file_format, **options) as f:
+        return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export matches, player statistics or the leaderboard")
+    parser.add_argument('dataset', choices=sorted(DATASETS))
+    parser.add_argument('path', help="output file; .parquet writes Parquet, anything else CSV")
+    parser.add_argument('--season', type=int, help="matches of one season only")
+    parser.add_argument('--status', default='Completed', help="match status to export, or 'all'")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    options = {'chunk_size': args.chunk_size}
+    if args.dataset == 'matches':
+        options.update(season=args.season, status=None if args.status == 'all' else args.status)
+    file_format = 'parquet' if os.path.splitext(args.path)[1] == '.parquet' else 'csv'
+    if file_format == 'parquet' and not parquet_available():
+        parser.error("writing Parquet needs pyarrow (pip install pyarrow)")
+
+    if file_format == 'parquet':
+        rows = export(args.dataset, args.path, file_format, **options)
+    else:
+        with open(args.path, 'w', newline='', encoding='utf-8') as f:
+            rows = export(args.dataset, f, file_format, **options)
+    print(f"Wrote {rows} rows to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
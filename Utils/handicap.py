@@ -0,0 +1,219 @@
+"""Handicap index engine in the style of the World Handicap System.
+
+Every completed round becomes a score differential
+
+    (113 / slope) * (adjusted gross score - course rating)
+
+using the rating and slope from Utils.course_catalog (par and 113 for
+courses not in the catalog). A player's handicap index after a round is the
+average of the best N of their last 20 differentials (N from BEST_OF, with
+the WHS adjustment for short records), capped against the lowest index of
+the preceding 365 days once 20 scores are on record.
+
+Gross scores are adjusted with the totals-only form of net double bogey:
+at most par + 2 per hole plus the course handicap from the index before
+the round, or par + 5 per hole while a player has no index yet. Hole by
+hole adjustment and the playing conditions calculation are not applied.
+
+The whole club is computed at once: each player's last-20 windows are
+built as one (rounds x 20) array, so a recompute is a handful of NumPy
+operations regardless of the number of players. Results are persisted to
+handicaps.json and recomputed once a day, or on demand with:
+
+    python -m Utils.handicap recompute
+    python -m Utils.handicap show
+"""
+import argparse
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from Utils.persistence import atomic_write_json, file_lock, file_signature, read_json
+
+HANDICAPS_FILE = 'handicaps.json'
+
+WINDOW = 20
+MIN_ROUNDS = 3
+MAX_INDEX = 54.0
+SOFT_CAP = 3.0
+HARD_CAP = 5.0
+STANDARD_SLOPE = 113
+
+# Indexed by the number of differentials on record (0..20)
+BEST_OF = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4, 5, 5, 6, 6, 7, 8])
+ADJUSTMENT = np.array([0, 0, 0, -2.0, -1.0, 0, -1.0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0])
+
+
+def _round(values):
+    """Round half up to one decimal, as handicap indexes are published"""
+    return np.floor(np.asarray(values) * 10 + 0.5) / 10
+
+def _course_terms(courses, pars, catalog):
+    """Rating, slope and hole count per round from the course catalog"""
+    names, codes = np.unique(courses, return_inverse=True)
+    known = [catalog.get(name) for name in names]
+    rating = np.array([c.rating if c else np.nan for c in known], dtype=np.float64)[codes]
+    slope = np.array([c.slope if c else STANDARD_SLOPE for c in known], dtype=np.float64)[codes]
+    holes = np.array([len(c.holes) if c else 18 for c in known], dtype=np.float64)[codes]
+    rating = np.where(np.isnan(rating), pars, rating)
+    return rating, slope, holes
+
+def _positions(player_ids):
+    """Position of each round within its player's (sorted) history"""
+    starts = np.r_[0, np.flatnonzero(np.diff(player_ids)) + 1]
+    lengths = np.diff(np.r_[starts, len(player_ids)])
+    return np.arange(len(player_ids)) - np.repeat(starts, lengths)
+
+def _uncapped(differentials, positions):
+    """Best-N-of-last-20 average after every round (NaN with fewer than 3)"""
+    n = len(differentials)
+    back = np.arange(WINDOW)
+    rows = np.arange(n)[:, None] - back[None, :]
+    valid = back[None, :] <= positions[:, None]
+    window = np.where(valid, differentials[np.maximum(rows, 0)], np.inf)
+    window.sort(axis=1)
+
+    counts = np.minimum(positions + 1, WINDOW)
+    best = BEST_OF[counts]
+    sums = np.cumsum(np.where(np.isinf(window), 0.0, window), axis=1)
+    average = sums[np.arange(n), np.maximum(best - 1, 0)] / np.maximum(best, 1)
+    index = np.minimum(_round(average + ADJUSTMENT[counts]), MAX_INDEX)
+    return np.where(best > 0, index, np.nan), counts
+
+def _capped(player_ids, dates, index, counts):
+    """Apply the soft and hard caps against the 365-day low index
+
+    The low index is taken from the uncapped indexes, so every player is
+    capped in one vectorized pass instead of round by round.
+    """
+    frame = pd.DataFrame({'player_id': player_ids, 'date': dates, 'index': index})
+    low = (frame.groupby('player_id', sort=False)
+                .rolling('365D', on='date', closed='left')['index'].min()
+                .to_numpy())
+    increase = index - low
+    soft = np.where(increase > SOFT_CAP, low + SOFT_CAP + (increase - SOFT_CAP) / 2, index)
+    capped = _round(np.minimum(soft, low + HARD_CAP))
+    established = (counts >= WINDOW) & ~np.isnan(low) & ~np.isnan(index)
+    return np.where(established, np.minimum(capped, index), index)
+
+def compute(rounds, catalog):
+    """Index history: one row per scored round with its differential and the index after it
+
+    ``rounds`` is a rounds frame in the Utils.match_frame layout.
+    """
+    scored = rounds.dropna(subset=['score'])
+    scored = scored[scored['player_id'] > 0].sort_values(['player_id', 'date', 'match_id'], kind='stable')
+    player_ids = scored['player_id'].to_numpy(dtype=np.int64)
+    dates = pd.to_datetime(scored['date']).to_numpy()
+    scores = scored['score'].to_numpy(dtype=np.float64)
+    pars = scored['course_par'].to_numpy(dtype=np.float64)
+    rating, slope, holes = _course_terms(scored['course'].astype(str).to_numpy(), pars, catalog)
+    positions = _positions(player_ids)
+
+    def differentials(max_scores):
+        return _round(STANDARD_SLOPE / slope * (np.minimum(scores, max_scores) - rating))
+
+    # First pass without an index; the second adjusts with the index before each round
+    first, counts = _uncapped(differentials(pars + 5 * holes), positions)
+    previous = np.where(positions > 0, np.roll(first, 1), np.nan)
+    course_handicap = np.round(previous * slope / STANDARD_SLOPE + (rating - pars))
+    max_scores = np.where(np.isnan(previous), pars + 5 * holes, pars + 2 * holes + course_handicap)
+    final = differentials(max_scores)
+    index, counts = _uncapped(final, positions)
+    index = _capped(player_ids, dates, index, counts)
+
+    return pd.DataFrame({
+        'player_id': player_ids,
+        'date': dates,
+        'match_id': scored['match_id'].to_numpy(dtype=np.int64),
+        'differential': final,
+        'index': index
+    })
+
+def current_indexes(history):
+    """Latest index of every player who has one"""
+    return history.dropna(subset=['index']).groupby('player_id')['index'].last()
+
+
+class HandicapStore:
+    """Persisted index history, recomputed at most once a day"""
+
+    def __init__(self, path=HANDICAPS_FILE):
+        self.path = path
+        self.computed_on = None
+        self.current = {}
+        self.history = {}
+        self._signature = None
+
+    def load(self):
+        self._signature = file_signature(self.path)
+        data = read_json(self.path, {})
+        self.computed_on = data.get('computed_on')
+        self.current = {int(player_id): index for player_id, index in data.get('current', {}).items()}
+        self.history = {int(player_id): entries for player_id, entries in data.get('history', {}).items()}
+
+    def refresh(self):
+        """Reload if another process has rewritten the file"""
+        if file_signature(self.path) != self._signature:
+            self.load()
+
+    def save(self):
+        atomic_write_json(self.path, {
+            'computed_on': self.computed_on,
+            'current': self.current,
+            'history': self.history
+        })
+        self._signature = file_signature(self.path)
+
+    def is_stale(self, today=None):
+        return self.computed_on != (today or date.today()).isoformat()
+
+    def recompute(self, rounds, catalog, today=None):
+        """Recompute every index from ``rounds``; returns {player id: index}"""
+        with file_lock(self.path):
+            history = compute(rounds, catalog).dropna(subset=['index'])
+            self.current = {int(player_id): float(index) for player_id, index in current_indexes(history).items()}
+            self.history = {
+                int(player_id): [[day.isoformat(), float(index)] for day, index in
+                                 zip(group['date'].dt.date, group['index'])]
+                for player_id, group in history.groupby('player_id')
+            }
+            self.computed_on = (today or date.today()).isoformat()
+            self.save()
+        return self.current
+
+    def get(self, player_id):
+        """Current index, or None while the player has fewer than 3 scores"""
+        return self.current.get(player_id)
+
+    def index_on(self, player_id, days):
+        """Index in effect at the end of each of ``days`` (None before the first)"""
+        entries = self.history.get(player_id, [])
+        recorded = [day for day, _ in entries]
+        values = []
+        for day in days:
+            position = np.searchsorted(recorded, day.isoformat(), side='right') - 1
+            values.append(entries[position][1] if position >= 0 else None)
+        return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute handicap indexes from score history")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('recompute', help="recompute every index now (e.g. from a nightly job)")
+    subcommands.add_parser('show', help="print current indexes")
+    args = parser.parse_args(argv)
+
+    from Utils.shared_store import get_store
+    store = get_store()
+    if args.command == 'recompute':
+        current = store.recompute_handicaps(force=True)
+        print(f"Recomputed {len(current)} handicap indexes")
+    else:
+        for player_id, index in sorted(store.handicaps.current.items()):
+            print(f"{store.registry.name_of(player_id)}: {index:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Materialized player leaderboard.
+
+Entries are keyed by player registry id and carry the player's display
+name. They are kept sorted per sort key as (value, player id) lists maintained with
+bisect, so looking up a player's rank is O(log n) and rendering one page of
+ranks only touches the rows on that page. The leaderboard is persisted to
+leaderboard.json; writers go through editing() so concurrent server
+processes never lose each other's changes.
+
+Every session reads the same instance, so it is copy-on-write: a writer
+changes a private copy of the entries and orders and publishes it with a
+single assignment when its edit ends. Readers always see one complete
+state, never an entry halfway through being re-sorted.
+"""
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+
+from Utils.persistence import atomic_write_json, file_lock, file_signature, read_json
+
+LEADERBOARD_FILE = 'leaderboard.json'
+
+SORT_KEYS = ('points', 'handicap', 'matches_played')
+
+
+def match_points(score):
+    """Points credited for a completed round (lower scores earn more)"""
+    return max(0, 100 - score)
+
+def history_credit(rounds):
+    """{player id: (points, matches played)} for the scored rounds of a rounds frame"""
+    scored = rounds.dropna(subset=['score'])
+    points = (100 - scored['score']).clip(lower=0)
+    grouped = points.groupby(scored['player_id'].to_numpy()).agg(['sum', 'size'])
+    return {int(player_id): (int(total), int(played))
+            for player_id, total, played in zip(grouped.index, grouped['sum'], grouped['size'])}
+
+
+class RankedLeaderboard:
+    """Leaderboard entries plus one sorted order per sort key"""
+
+    def __init__(self, path=LEADERBOARD_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        # Published (entries, orders); replaced as a whole, never changed in place
+        self._state = ({}, {key: [] for key in SORT_KEYS})
+        # [writer thread id, working state or None until first changed]
+        self._draft = None
+        self._signature = None
+
+    def load(self):
+        self._signature = file_signature(self.path)
+        entries = read_json(self.path)
+        if entries is not None:
+            self.replace(entries)
+
+    def refresh(self):
+        """Reload if another process has rewritten the file"""
+        if file_signature(self.path) != self._signature:
+            self.load()
+
+    def save(self):
+        atomic_write_json(self.path, list(self._view()[0].values()), indent=2)
+        self._signature = file_signature(self.path)
+
+    @contextmanager
+    def _writing(self):
+        """Collect changes in a draft and publish it when the outermost edit ends"""
+        with self._lock:
+            if self._draft is not None:
+                yield
+                return
+            self._draft = [threading.get_ident(), None]
+            try:
+                yield
+                if self._draft[1] is not None:
+                    self._state = self._draft[1]
+            finally:
+                self._draft = None
+
+    @contextmanager
+    def editing(self):
+        """Lock the file, pick up other writers' changes, then save on exit"""
+        with self._writing(), file_lock(self.path):
+            self.refresh()
+            yield self
+            self.save()
+
+    def _view(self):
+        """The state this thread should read: its own draft while editing, else the published one"""
+        draft = self._draft
+        if draft is not None and draft[0] == threading.get_ident() and draft[1] is not None:
+            return draft[1]
+        return self._state
+
+    def _working(self):
+        """The draft state, copied from the published one on the first change"""
+        if self._draft[1] is None:
+            entries, orders = self._state
+            self._draft[1] = (dict(entries), {key: list(order) for key, order in orders.items()})
+        return self._draft[1]
+
+    def __len__(self):
+        return len(self._view()[0])
+
+    def __contains__(self, player_id):
+        return player_id in self._view()[0]
+
+    def get(self, player_id):
+        return self._view()[0].get(player_id)
+
+    @staticmethod
+    def _insert(state, entry):
+        entries, orders = state
+        entries[entry['player_id']] = entry
+        for key, order in orders.items():
+            insort(order, (entry.get(key, 0), entry['player_id']))
+
+    @staticmethod
+    def _remove(state, player_id):
+        entries, orders = state
+        entry = entries.pop(player_id)
+        for key, order in orders.items():
+            pos = bisect_left(order, (entry.get(key, 0), player_id))
+            del order[pos]
+
+    def replace(self, entries):
+        """Rebuild the leaderboard from a list of entries"""
+        state = ({}, {key: [] for key in SORT_KEYS})
+        for entry in entries:
+            entry = dict(entry)
+            state[0][entry['player_id']] = entry
+        for key, order in state[1].items():
+            order.extend((entry.get(key, 0), player_id) for player_id, entry in state[0].items())
+            order.sort()
+        with self._writing():
+            self._draft[1] = state
+
+    def upsert(self, entry):
+        """Add an entry or replace the one with the same player id"""
+        with self._writing():
+            state = self._working()
+            if entry['player_id'] in state[0]:
+                self._remove(state, entry['player_id'])
+            self._insert(state, dict(entry))
+
+    def update(self, player_id, **changes):
+        """Change fields of an existing entry and re-sort it"""
+        with self._writing():
+            state = self._working()
+            entry = dict(state[0][player_id])
+            entry.update(changes)
+            self._remove(state, player_id)
+            self._insert(state, entry)
+
+    def rank_of(self, player_id, sort_key='points', descending=True):
+        """1-based rank of a player, or None if they are not listed"""
+        entries, orders = self._view()
+        entry = entries.get(player_id)
+        if entry is None:
+            return None
+        pos = bisect_left(orders[sort_key], (entry.get(sort_key, 0), player_id))
+        return len(entries) - pos if descending else pos + 1
+
+    def page(self, sort_key='points', descending=True, offset=0, limit=None):
+        """Entries ranked offset+1 .. offset+limit for the given ordering"""
+        entries, orders = self._view()
+        order = orders[sort_key]
+        if descending:
+            start = max(len(order) - offset, 0)
+            stop = max(start - limit, 0) if limit is not None else 0
+            keys = reversed(order[stop:start])
+        else:
+            keys = order[offset:offset + limit if limit is not None else None]
+        return [entries[player_id] for _, player_id in keys]
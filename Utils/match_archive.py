@@ -0,0 +1,291 @@
+"""Memory-mapped archives of past seasons.
+
+Completed matches of old seasons are moved out of live storage into
+archive/season-<year>.bin, one file per season in the columnar format of
+Utils.match_snapshot. Archives are opened with a read-only memory map and
+queried with vectorized NumPy scans over the player, score and stats
+columns, so years of history stay available to Profile and Home without
+being loaded into every session or turned back into match dicts.
+
+Archive a season (a maintenance task; run it while the app is idle):
+
+    python -m Utils.match_archive archive 2023
+    python -m Utils.match_archive list
+"""
+import argparse
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from Utils import match_snapshot
+from Utils.match_frame import COLUMNS
+from Utils.persistence import file_signature
+from Utils.player_registry import get_registry
+from Utils.player_stats import RECENT_WINDOW, empty_record
+
+ARCHIVE_DIR = 'archive'
+SEASON_FILE = re.compile(r'^season-(\d{4})' + re.escape(match_snapshot.EXTENSION) + '$')
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def season_path(season, directory=ARCHIVE_DIR):
+    return os.path.join(directory, f'season-{season}{match_snapshot.EXTENSION}')
+
+def _offsets(lengths):
+    """Start of each row's run in a flat list column"""
+    counts = np.maximum(lengths, 0)
+    return np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64), counts
+
+
+class ArchivedSeason:
+    """One season file, mapped read-only"""
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = file_signature(path)
+        self.rows, self.strings, self.columns = match_snapshot.read_columns(path)
+        self._codes = None
+
+    def code(self, value):
+        """String table code of a player or course name, or None"""
+        if self._codes is None:
+            self._codes = {value: code for code, value in enumerate(self.strings)}
+        return self._codes.get(value)
+
+    def _has_player_ids(self):
+        columns = self.columns
+        return 'player_ids' in columns and np.array_equal(columns['player_ids_lengths'], columns['players_lengths'])
+
+    def _player_entries(self, player_id):
+        """Positions of a player in the flat players column"""
+        columns = self.columns
+        if self._has_player_ids():
+            return np.flatnonzero(columns['player_ids'] == player_id)
+        # Seasons archived before player ids only list names, current or old
+        player = get_registry().get(player_id)
+        names = [player['name'], *player['previous_names']] if player else []
+        codes = [code for code in map(self.code, names) if code is not None]
+        return np.flatnonzero(np.isin(columns['players'], codes))
+
+    def _entry_player_ids(self):
+        """Player id of every entry in the flat players column (0 if unknown)"""
+        if self._has_player_ids():
+            return self.columns['player_ids']
+        registry = get_registry()
+        ids = np.array([registry.id_of(name) or 0 for name in self.strings] + [0], dtype=np.int64)
+        return ids[self.columns['players']]
+
+    def player_ids(self):
+        """Ids of every player with a round in this season"""
+        ids = np.unique(self._entry_player_ids())
+        return set(ids[ids > 0].tolist())
+
+    def player_rounds(self, player_id):
+        """Rounds frame (Utils.match_frame layout) of one player's archived rounds"""
+        return self._rounds(self._player_entries(player_id))
+
+    def rounds(self):
+        """Rounds frame of every archived round"""
+        return self._rounds(np.arange(len(self.columns['players'])))
+
+    def _rounds(self, entries):
+        columns = self.columns
+        completed = self.code('Completed')
+        if completed is None:
+            return None
+
+        player_starts, player_counts = _offsets(columns['players_lengths'])
+        entry_rows = np.repeat(np.arange(self.rows), player_counts)
+        rows = entry_rows[entries]
+        keep = columns['status'][rows] == completed
+        entries, rows = entries[keep], rows[keep]
+        if not len(rows):
+            return None
+        position = entries - player_starts[rows]
+
+        # Own score and the best opponent score, for rows with one score per player
+        score_starts, score_counts = _offsets(columns['scores_lengths'])
+        scores = columns['scores'].astype(np.float64)
+        has_scores = score_counts[rows] == player_counts[rows]
+        score = np.full(len(rows), np.nan)
+        score[has_scores] = scores[score_starts[rows][has_scores] + position[has_scores]]
+
+        score_rows = np.repeat(np.arange(self.rows), score_counts)
+        ordered = scores[np.lexsort((scores, score_rows))]
+        lowest = np.full(self.rows, np.nan)
+        second = np.full(self.rows, np.nan)
+        lowest[score_counts > 0] = ordered[score_starts[score_counts > 0]]
+        second[score_counts > 1] = ordered[score_starts[score_counts > 1] + 1]
+        opponent_score = np.where(score == lowest[rows], second[rows], lowest[rows])
+        # In team matches only the other team's scores count
+        if 'teams_lengths' in columns:
+            team = has_scores & (columns['teams_lengths'][rows] > 0)
+            if team.any():
+                half = score_counts // 2
+                second_team = np.arange(len(scores)) - score_starts[score_rows] >= half[score_rows]
+                team_lowest = np.full((self.rows, 2), np.inf)
+                np.minimum.at(team_lowest, (score_rows, second_team.astype(np.intp)), scores)
+                own_team = (position[team] >= half[rows[team]]).astype(np.intp)
+                opponent_score[team] = team_lowest[rows[team], 1 - own_team]
+        opponent_score[~has_scores | (score_counts[rows] < 2)] = np.nan
+
+        has_stats = columns['player_stats'][rows].astype(bool)
+        def stat(field):
+            values = columns['player_stats.' + field][entries].astype(np.float64)
+            values[~has_stats | (values == match_snapshot.ABSENT)] = np.nan
+            return values
+
+        course_par = columns['course_par'][rows]
+        course_codes = columns['location'][rows]
+        player_ids = self._entry_player_ids()[entries]
+        ids, id_codes = np.unique(player_ids, return_inverse=True)
+        registry = get_registry()
+        frame = pd.DataFrame({
+            'match_id': columns['id'][rows],
+            'date': pd.to_datetime(columns['date'][rows].view('datetime64[us]')),
+            'player_id': player_ids,
+            'player': pd.Categorical.from_codes(id_codes, categories=[registry.name_of(int(i)) or '' for i in ids]),
+            'course': pd.Categorical.from_codes(course_codes, categories=self.strings).remove_unused_categories(),
+            'course_par': np.where(course_par == match_snapshot.INT_ABSENT, 72, course_par).astype(np.int16),
+            'score': score,
+            'opponent_score': opponent_score,
+            'putts': stat('total_putts'),
+            'gir': stat('greens_in_regulation'),
+            'fairways': stat('fairways_hit'),
+        })
+        frame['won'] = frame['score'] < frame['opponent_score']
+        frame['tied'] = frame['score'] == frame['opponent_score']
+        return frame[COLUMNS]
+
+
+class SeasonArchive:
+    """Every season file in an archive directory, reopened when files change"""
+
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._seasons = {}
+
+    def seasons(self):
+        """Mapped seasons keyed by year, refreshed from the directory"""
+        with self._lock:
+            found = {}
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    match = SEASON_FILE.match(name)
+                    if match:
+                        found[int(match.group(1))] = os.path.join(self.directory, name)
+            seasons = {}
+            for season, path in sorted(found.items()):
+                current = self._seasons.get(season)
+                if current is None or current.signature != file_signature(path):
+                    current = ArchivedSeason(path)
+                seasons[season] = current
+            self._seasons = seasons
+            return seasons
+
+    def player_rounds(self, player_id):
+        """One player's rounds across all seasons, or None if there are none"""
+        frames = []
+        for season in self.seasons().values():
+            rounds = season.player_rounds(player_id)
+            if rounds is not None:
+                frames.append(rounds)
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def player_ids(self):
+        """Ids of every player with archived rounds"""
+        return set().union(*(season.player_ids() for season in self.seasons().values()))
+
+    def rounds(self):
+        """Every archived round across all seasons, or None if there are none"""
+        frames = [rounds for rounds in (season.rounds() for season in self.seasons().values())
+                  if rounds is not None]
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def player_record(self, player_id):
+        """Archived rounds folded into a Utils.player_stats aggregate record"""
+        return rounds_record(self.player_rounds(player_id))
+
+    def team_matches(self):
+        """Archived team matches as match dicts, for rebuilding the team standings"""
+        return [match for season in self.seasons().values() for match in match_snapshot.read(season.path)
+                if match.get('teams')]
+
+
+def rounds_record(rounds):
+    """Aggregate record (Utils.player_stats layout) for a player's rounds frame"""
+    record = empty_record()
+    if rounds is None or not len(rounds):
+        return record
+    scored = rounds.dropna(subset=['score']).sort_values(['date', 'match_id'])
+    putts = rounds['putts'].dropna()
+    record.update({
+        'matches': len(rounds),
+        'wins': int(rounds['won'].sum()),
+        'ties': int(rounds['tied'].sum()),
+        'scored': len(scored),
+        'score_sum': int(scored['score'].sum()),
+        'best_score': int(scored['score'].min()) if len(scored) else None,
+        'putts_sum': int(putts.sum()),
+        'putts_count': len(putts),
+        'recent': [[date.isoformat(), int(score)] for date, score in
+                   zip(scored['date'].iloc[-RECENT_WINDOW:], scored['score'].iloc[-RECENT_WINDOW:])]
+    })
+    return record
+
+def get_archive(directory=ARCHIVE_DIR):
+    """Process-wide archive for a directory"""
+    with _archives_lock:
+        return _archives.setdefault(directory, SeasonArchive(directory))
+
+def archive_season(season, directory=ARCHIVE_DIR):
+    """Move the completed matches of one season from live storage to its archive file"""
+    from Utils.shared_store import get_store
+    store = get_store()
+    matches = store.storage.load_matches()
+    archived = [m for m in matches if m.get('status') == 'Completed' and m['date'].year == season]
+    if not archived:
+        return 0
+
+    path = season_path(season, directory)
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(path):
+        archived = match_snapshot.read(path) + archived
+    match_snapshot.write(archived, path)
+
+    archived_ids = {m['id'] for m in archived}
+    remaining = [m for m in matches if m['id'] not in archived_ids]
+    # Rebuilds the derived indexes and bumps the data version, like an import
+    store.save_matches(remaining)
+    store.recompute_handicaps(force=True)
+    return len(matches) - len(remaining)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive past seasons of completed matches")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    archive = subcommands.add_parser('archive', help="move a season's completed matches into the archive")
+    archive.add_argument('season', type=int)
+    subcommands.add_parser('list', help="show archived seasons")
+    parser.add_argument('--directory', default=ARCHIVE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'archive':
+        moved = archive_season(args.season, args.directory)
+        print(f"Archived {moved} matches from {args.season} to {season_path(args.season, args.directory)}")
+    else:
+        for season, archived in SeasonArchive(args.directory).seasons().items():
+            print(f"{season}: {archived.rows} matches ({archived.path})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Columnar view of completed matches for analytics.
+
+build_rounds_frame flattens completed matches into one row per (match,
+player) with the player id, categorical player name and course columns.
+Per-player helpers select by player id. The frame is built once
+per data version, and the helpers below answer analytics questions with
+vectorized group-bys instead of per-match Python loops.
+"""
+import numpy as np
+import pandas as pd
+
+from Utils.match_model import as_match
+from Utils.teams import opponent_scores
+
+COLUMNS = ['match_id', 'date', 'player_id', 'player', 'course', 'course_par', 'score',
+           'opponent_score', 'won', 'tied', 'putts', 'gir', 'fairways']
+
+
+def build_rounds_frame(matches):
+    """One row per player per completed match"""
+    rows = {column: [] for column in COLUMNS}
+    for match in matches:
+        if match.get('status') != 'Completed':
+            continue
+        match = as_match(match)
+        scores = match.get('scores')
+        player_stats = match.get('player_stats', {})
+        for i, (player_id, player) in enumerate(zip(match.player_ids or (), match.players)):
+            stats = player_stats.get(player, {})
+            score = scores[i] if scores else np.nan
+            opponents = opponent_scores(match, i) if scores else []
+            opponent_score = min(opponents) if opponents else np.nan
+
+            rows['match_id'].append(match['id'])
+            rows['date'].append(match['date'])
+            rows['player_id'].append(player_id)
+            rows['player'].append(player)
+            rows['course'].append(match.get('location', 'Unknown'))
+            rows['course_par'].append(match.get('course_par', 72))
+            rows['score'].append(score)
+            rows['opponent_score'].append(opponent_score)
+            rows['putts'].append(stats.get('total_putts', np.nan))
+            rows['gir'].append(stats.get('greens_in_regulation', np.nan))
+            rows['fairways'].append(stats.get('fairways_hit', np.nan))
+
+    frame = pd.DataFrame({
+        'match_id': np.asarray(rows['match_id'], dtype=np.int64),
+        'date': pd.to_datetime(pd.Series(rows['date'], dtype=object)),
+        'player_id': np.asarray(rows['player_id'], dtype=np.int64),
+        'player': pd.Categorical(rows['player']),
+        'course': pd.Categorical(rows['course']),
+        'course_par': np.asarray(rows['course_par'], dtype=np.int16),
+        'score': np.asarray(rows['score'], dtype=np.float64),
+        'opponent_score': np.asarray(rows['opponent_score'], dtype=np.float64),
+        'putts': np.asarray(rows['putts'], dtype=np.float64),
+        'gir': np.asarray(rows['gir'], dtype=np.float64),
+        'fairways': np.asarray(rows['fairways'], dtype=np.float64),
+    })
+    frame['won'] = frame['score'] < frame['opponent_score']
+    frame['tied'] = frame['score'] == frame['opponent_score']
+    return frame[COLUMNS]
+
+def player_rounds(frame, player_id):
+    return frame[frame['player_id'] == player_id]
+
+def _mean(series):
+    """Rounded mean, or None when there is no data"""
+    value = series.mean()
+    return None if pd.isna(value) else round(float(value), 1)
+
+def performance_summary(frame, player_id):
+    """Average GIR %, fairways %, putts and score for one player"""
+    rounds = player_rounds(frame, player_id)
+    return {
+        'rounds': len(rounds),
+        'avg_score': _mean(rounds['score']),
+        'avg_putts': _mean(rounds['putts']),
+        'gir_percentage': _mean(rounds['gir']),
+        'fairway_percentage': _mean(rounds['fairways'])
+    }
+
+def course_breakdown(frame, player_id):
+    """Per-course average/best score and rounds played for one player"""
+    rounds = player_rounds(frame, player_id).dropna(subset=['score'])
+    grouped = rounds.groupby('course', observed=True)['score'].agg(['mean', 'min', 'count'])
+    return [
+        {
+            'course': course,
+            'avg_score': round(float(row['mean']), 1),
+            'best_score': int(row['min']),
+            'rounds_played': int(row['count'])
+        }
+        for course, row in grouped.iterrows()
+    ]
+
+def win_rates(frame):
+    """Rounds, wins and win rate (%) for every player, indexed by player id"""
+    grouped = frame.groupby('player_id').agg(rounds=('match_id', 'size'), wins=('won', 'sum'))
+    grouped['win_rate'] = (grouped['wins'] / grouped['rounds'] * 100).round(1)
+    return grouped
@@ -0,0 +1,241 @@
+"""Bulk import of historical scorecards from CSV.
+
+Each CSV row is one player's round:
+
+    date,course,player,score[,match,course_par,handicap,format,total_putts,fairways_hit,greens_in_regulation]
+
+Rows with the same ``match`` value form one completed match; files without
+that column group rows by date and course. Rows are validated as they are
+streamed from the file. A row that fails is reported with its line number
+and its whole match is left out. A match already stored (same date, course
+and players), or one repeated in the file, is counted as a duplicate and
+skipped. Everything else is written in one batch through
+SharedStore.import_matches. That is one storage write, one player stats
+write and one leaderboard write, instead of a full rewrite per round.
+
+    python -m Utils.match_import rounds.csv
+    python -m Utils.match_import rounds.csv --dry-run
+"""
+import argparse
+import csv
+import io
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from Utils.course_catalog import get_catalog
+from Utils.match_model import MatchFormat
+from Utils.shared_store import get_store
+
+REQUIRED_COLUMNS = ('date', 'course', 'player', 'score')
+DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%Y %H:%M')
+
+# Same bounds as the Score Entry form
+SCORE_RANGE = (50, 150)
+STAT_RANGES = {'total_putts': (10, 50), 'fairways_hit': (0, 100), 'greens_in_regulation': (0, 100)}
+PAR_RANGE = (27, 90)
+HANDICAP_RANGE = (0, 54)
+# The CSV layout has no team columns, so team-only formats cannot be imported
+FORMATS = [match_format.value for match_format in MatchFormat
+           if match_format not in (MatchFormat.BEST_BALL, MatchFormat.FOURSOMES)]
+
+
+@dataclass(slots=True)
+class ImportReport:
+    rows: int = 0
+    matches: int = 0
+    duplicates: int = 0
+    # (line number, message)
+    errors: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (f"{self.rows} rows, {self.matches} matches imported, {self.duplicates} duplicates, "
+                f"{len(self.errors)} errors in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)")
+
+
+def _parse_date(value, today):
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        for date_format in DATE_FORMATS:
+            try:
+                date = datetime.strptime(value, date_format)
+                break
+            except ValueError:
+                pass
+        else:
+            raise ValueError(f"unrecognised date {value!r}")
+    if date.date() > today:
+        raise ValueError(f"date {value} is in the future")
+    return date
+
+def _parse_int(row, column, bounds):
+    value = row.get(column)
+    if value in (None, ''):
+        return None
+    try:
+        number = int(float(value))
+    except ValueError:
+        raise ValueError(f"{column} {value!r} is not a number")
+    if not bounds[0] <= number <= bounds[1]:
+        raise ValueError(f"{column} {number} is outside {bounds[0]}-{bounds[1]}")
+    return number
+
+def parse_round(row, today=None):
+    """Validated fields of one CSV row; raises ValueError with the reason"""
+    missing = [column for column in REQUIRED_COLUMNS if not row.get(column)]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    match_format = row.get('format') or None
+    if match_format is not None and match_format not in FORMATS:
+        raise ValueError(f"unknown format {match_format!r}")
+    stats = {column: _parse_int(row, column, bounds) for column, bounds in STAT_RANGES.items()}
+    return {
+        'date': _parse_date(row['date'], today or datetime.now().date()),
+        'course': row['course'],
+        'player': row['player'],
+        'score': _parse_int(row, 'score', SCORE_RANGE),
+        'course_par': _parse_int(row, 'course_par', PAR_RANGE),
+        'handicap': _parse_int(row, 'handicap', HANDICAP_RANGE),
+        'format': match_format,
+        'stats': {column: value for column, value in stats.items() if value is not None}
+    }
+
+def read_rows(lines):
+    """(line number, row) for each CSV record, with normalized column names"""
+    reader = csv.reader(lines)
+    header = [column.strip().lower() for column in next(reader, [])]
+    for row in reader:
+        if any(value.strip() for value in row):
+            yield reader.line_num, dict(zip(header, (value.strip() for value in row)))
+
+def _build_match(rounds, catalog):
+    first = rounds[0]
+    dates = {r['date'] for r in rounds}
+    courses = {r['course'] for r in rounds}
+    if len(dates) > 1 or len(courses) > 1:
+        raise ValueError("rows of one match have different dates or courses")
+    if len(rounds) < 2:
+        raise ValueError("a match needs at least two players")
+    match = {
+        'date': first['date'],
+        'players': [r['player'] for r in rounds],
+        'status': 'Completed',
+        'location': first['course'],
+        'handicap': first['handicap'] or 0,
+        'course_par': first['course_par'] or catalog.par_of(first['course']),
+        'format': first['format'] or MatchFormat.STROKE_PLAY.value,
+        'scores': [r['score'] for r in rounds]
+    }
+    player_stats = {r['player']: r['stats'] for r in rounds if r['stats']}
+    if player_stats:
+        match['player_stats'] = player_stats
+    return match
+
+def _match_key(match, player_ids):
+    return match['date'], match['location'], frozenset(player_ids)
+
+def parse_matches(lines, report, catalog, today=None):
+    """Valid matches from a CSV stream; failures are added to ``report``"""
+    today = today or datetime.now().date()
+    header_checked = False
+    groups, first_lines, failed = {}, {}, set()
+    for line, row in read_rows(lines):
+        if not header_checked:
+            missing = [column for column in REQUIRED_COLUMNS if column not in row]
+            if missing:
+                report.errors.append((1, f"missing columns: {', '.join(missing)}"))
+                return []
+            header_checked = True
+
+        report.rows += 1
+        key = row['match'] if row.get('match') else (row.get('date'), row.get('course'))
+        first_lines.setdefault(key, line)
+        try:
+            parsed = parse_round(row, today)
+        except ValueError as error:
+            report.errors.append((line, str(error)))
+            failed.add(key)
+            continue
+        players = groups.setdefault(key, {})
+        if parsed['player'] in players:
+            # The same round exported twice
+            report.duplicates += 1
+            continue
+        players[parsed['player']] = parsed
+
+    matches = []
+    for key, players in groups.items():
+        if key in failed:
+            continue
+        try:
+            matches.append(_build_match(list(players.values()), catalog))
+        except ValueError as error:
+            report.errors.append((first_lines[key], str(error)))
+    report.errors.sort()
+    return matches
+
+def import_csv(lines, store=None, dry_run=False, today=None):
+    """Validate, dedupe and store the matches in a CSV stream; returns an ImportReport"""
+    store = store or get_store()
+    report = ImportReport()
+    began = time.perf_counter()
+    try:
+        matches = parse_matches(lines, report, get_catalog(), today)
+    except (UnicodeDecodeError, csv.Error) as error:
+        report.errors.append((report.rows + 2, f"unreadable CSV: {error}"))
+        matches = []
+
+    # Players not in the registry yet cannot have stored matches
+    registry = store.registry
+    seen = {_match_key(match, match.player_ids or ()) for match in store.query_matches()}
+    new = []
+    for match in matches:
+        key = _match_key(match, [registry.id_of(name) or name for name in match['players']])
+        if key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+        new.append(match)
+
+    if new and not dry_run:
+        ids = registry.resolve_all([name for match in new for name in match['players']])
+        for match in new:
+            match['player_ids'] = [ids[name] for name in match['players']]
+        store.import_matches(new)
+    report.matches = len(new)
+    report.seconds = time.perf_counter() - began
+    return report
+
+def import_upload(uploaded_file, dry_run=False):
+    """import_csv for a Streamlit UploadedFile (or any binary file object)"""
+    uploaded_file.seek(0)
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    try:
+        return import_csv(text, dry_run=dry_run)
+    finally:
+        # Leave the upload open for Streamlit
+        text.detach()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import historical scorecards from CSV")
+    parser.add_argument('path')
+    parser.add_argument('--dry-run', action='store_true', help="validate and report without writing")
+    args = parser.parse_args(argv)
+
+    with open(args.path, encoding='utf-8-sig', newline='') as f:
+        report = import_csv(f, dry_run=args.dry_run)
+    for line, message in report.errors:
+        print(f"line {line}: {message}")
+    print(report.summary())
+    return 1 if report.errors else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""In-memory index of matches by player id and status.
+
+Each bucket is a list of (date, match id) kept sorted with bisect, so finding
+one player's matches costs O(k) instead of a scan over every match. The
+initial build appends every entry and sorts each bucket once; after that
+the index is updated in place with insort whenever a match is created or
+re-saved.
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+ALL = None
+
+
+class PlayerMatchIndex:
+    """player id -> status -> date-sorted [(date, match id)]"""
+
+    def __init__(self, matches=()):
+        # _buckets[player][status]; ALL is used as the wildcard for either key
+        self._buckets = defaultdict(lambda: defaultdict(list))
+        # A later copy of a match id replaces the earlier one, as with add()
+        self._entries = {match['id']: self._entry(match) for match in matches}
+        for entry, players, status in self._entries.values():
+            for player, bucket_status in self._keys(players, status):
+                self._buckets[player][bucket_status].append(entry)
+        for statuses in self._buckets.values():
+            for bucket in statuses.values():
+                bucket.sort()
+
+    @staticmethod
+    def _entry(match):
+        return (match['date'], match['id']), tuple(match.get('player_ids') or ()), match.get('status')
+
+    def _keys(self, players, status):
+        """Every (player, status) bucket a match belongs to"""
+        return {(player, bucket_status)
+                for player in (ALL,) + tuple(players)
+                for bucket_status in (ALL, status)}
+
+    def add(self, match):
+        """Index a new match, or re-index one that changed"""
+        if match['id'] in self._entries:
+            self.remove(match['id'])
+
+        entry, players, status = self._entries[match['id']] = self._entry(match)
+        for player, bucket_status in self._keys(players, status):
+            insort(self._buckets[player][bucket_status], entry)
+
+    def remove(self, match_id):
+        if match_id not in self._entries:
+            return
+        entry, players, status = self._entries.pop(match_id)
+        for player, bucket_status in self._keys(players, status):
+            bucket = self._buckets[player][bucket_status]
+            pos = bisect_left(bucket, entry)
+            if pos < len(bucket) and bucket[pos] == entry:
+                del bucket[pos]
+            if not bucket:
+                del self._buckets[player][bucket_status]
+        for player in players:
+            if not self._buckets[player]:
+                del self._buckets[player]
+
+    def match_ids(self, player=ALL, status=ALL, newest_first=False, limit=None, offset=0, after=None):
+        """Match ids for a player and/or status, ordered by date
+
+        ``after`` is a (date, match id) cursor; only matches strictly past it
+        in the requested order are returned, so a page does not shift when
+        matches are added before it.
+        """
+        bucket = self._buckets.get(player, {}).get(status, [])
+        if newest_first:
+            end = bisect_left(bucket, after) if after is not None else len(bucket)
+            start = max(end - offset, 0)
+            stop = max(start - limit, 0) if limit is not None else 0
+            return [match_id for _, match_id in reversed(bucket[stop:start])]
+        start = (bisect_right(bucket, after) if after is not None else 0) + offset
+        stop = start + limit if limit is not None else None
+        return [match_id for _, match_id in bucket[start:stop]]
+
+    def count(self, player=ALL, status=ALL):
+        return len(self._buckets.get(player, {}).get(status, []))
+
+    def players(self):
+        """Ids of every player with at least one indexed match"""
+        return sorted(player for player in self._buckets if player is not ALL)
@@ -0,0 +1,118 @@
+"""Append-only journal for match data.
+
+matches.json holds the last compacted snapshot. Every match created or updated
+since then is appended to matches.journal as one JSON line, so a save costs
+O(1) instead of rewriting the whole file. Loading replays the snapshot and
+then the journal tail; compaction folds the journal back into the snapshot.
+
+The snapshot is JSON by default. With GOLF_SNAPSHOT_FORMAT=columnar it is
+kept in the binary format of Utils.match_snapshot (matches.bin) instead,
+which loads without parsing every record.
+
+Callers that write hold Utils.persistence.file_lock on the journal file.
+"""
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from Utils import scorecard
+from Utils.persistence import atomic_write_json
+
+SNAPSHOT_FORMAT = os.environ.get('GOLF_SNAPSHOT_FORMAT', 'json').lower()
+SNAPSHOT_FILE = 'matches.bin' if SNAPSHOT_FORMAT == 'columnar' else 'matches.json'
+JOURNAL_FILE = 'matches.journal'
+
+# Number of journal records after which the next save compacts
+COMPACT_THRESHOLD = 500
+
+DATE_FIELDS = ('date', 'created_date', 'completed_date')
+
+
+def encode_match(match):
+    """Return a JSON-serializable copy of a match"""
+    data = dict(match)
+    for field in DATE_FIELDS:
+        if field in data:
+            data[field] = data[field].isoformat()
+    if isinstance(data.get('scorecards'), np.ndarray):
+        data['scorecards'] = scorecard.encode(data['scorecards'])
+    return data
+
+def decode_match(data):
+    """Convert a stored match back into its in-memory form"""
+    for field in DATE_FIELDS:
+        if field in data:
+            data[field] = datetime.fromisoformat(data[field])
+    return data
+
+def is_columnar(snapshot_file):
+    from Utils.match_snapshot import EXTENSION
+    return snapshot_file.endswith(EXTENSION)
+
+def load_snapshot(snapshot_file=SNAPSHOT_FILE):
+    if not os.path.exists(snapshot_file):
+        return []
+    if is_columnar(snapshot_file):
+        from Utils import match_snapshot
+        return match_snapshot.read(snapshot_file)
+    with open(snapshot_file, 'r') as f:
+        return [decode_match(data) for data in json.load(f)]
+
+def read_journal(journal_file=JOURNAL_FILE, offset=0):
+    """Matches appended after byte ``offset``, and the offset to resume from
+
+    Only complete lines are consumed, so a record still being appended by
+    another process is picked up on the next read.
+    """
+    if not os.path.exists(journal_file) or os.path.getsize(journal_file) <= offset:
+        return [], offset
+
+    with open(journal_file, 'rb') as f:
+        f.seek(offset)
+        chunk = f.read()
+    end = chunk.rfind(b'\n') + 1
+
+    matches = []
+    for line in chunk[:end].splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # A torn line from an interrupted append
+            continue
+        matches.append(decode_match(entry['match']))
+    return matches, offset + end
+
+def load(snapshot_file=SNAPSHOT_FILE, journal_file=JOURNAL_FILE):
+    """Rebuild the match list from the snapshot plus the journal tail"""
+    matches = {m['id']: m for m in load_snapshot(snapshot_file)}
+    for match in read_journal(journal_file)[0]:
+        matches[match['id']] = match
+    return list(matches.values())
+
+def append(match, journal_file=JOURNAL_FILE):
+    """Append one created or updated match; returns the new journal size"""
+    line = json.dumps({'op': 'upsert', 'match': encode_match(match)})
+    with open(journal_file, 'a') as f:
+        # Start on a fresh line if a previous append was torn
+        if f.tell() > 0:
+            with open(journal_file, 'rb') as check:
+                check.seek(-1, os.SEEK_END)
+                if check.read(1) != b'\n':
+                    f.write('\n')
+        f.write(line + '\n')
+        f.flush()
+        return f.tell()
+
+def compact(matches, snapshot_file=SNAPSHOT_FILE, journal_file=JOURNAL_FILE):
+    """Write a fresh snapshot of all matches and truncate the journal"""
+    if is_columnar(snapshot_file):
+        from Utils import match_snapshot
+        match_snapshot.write(matches, snapshot_file)
+    else:
+        atomic_write_json(snapshot_file, [encode_match(m) for m in matches], indent=2)
+
+    # The snapshot already contains everything in the journal
+    if os.path.exists(journal_file):
+        os.remove(journal_file)
@@ -0,0 +1,320 @@
+"""Compact in-memory match records.
+
+Stored matches are held as Match objects instead of plain dicts:
+
+- slotted dataclasses, so there is no per-instance __dict__
+- status, format, weather and course condition are enum members
+- course names are interned, and players are ids from the player
+  registry (Utils.player_registry), so renaming a player keeps history
+- per-player stats are PlayerStats objects aligned with the players
+- hole-by-hole scorecards are one int8 array (Utils.scorecard)
+- team matches also carry the two team ids and one score per team
+  (Utils.teams)
+
+Match also implements the read-only mapping protocol (match['players'],
+match.get('scores'), 'scores' in match, dict(match)), so pages written
+against match dicts keep working; match['players'] gives the players'
+current names and match['player_ids'] their ids. to_dict/from_dict convert
+at the storage boundary. Dicts without ``player_ids`` (written before the
+registry existed) are resolved by name. Values that do not fit the typed
+fields (unknown enum values, extra keys) are kept as they are.
+"""
+import sys
+from dataclasses import dataclass, field
+from enum import Enum
+
+from Utils import scorecard
+from Utils.player_registry import get_registry
+
+
+class MatchStatus(Enum):
+    UPCOMING = 'Upcoming'
+    COMPLETED = 'Completed'
+
+
+class MatchFormat(Enum):
+    STROKE_PLAY = 'Stroke Play'
+    MATCH_PLAY = 'Match Play'
+    STABLEFORD = 'Stableford'
+    SCRAMBLE = 'Scramble'
+    BEST_BALL = 'Best Ball'
+    FOURSOMES = 'Foursomes'
+
+
+class Weather(Enum):
+    SUNNY = 'Sunny'
+    PARTLY_CLOUDY = 'Partly Cloudy'
+    CLOUDY = 'Cloudy'
+    RAINY = 'Rainy'
+    WINDY = 'Windy'
+    STORMY = 'Stormy'
+
+
+class CourseCondition(Enum):
+    EXCELLENT = 'Excellent'
+    GOOD = 'Good'
+    FAIR = 'Fair'
+    POOR = 'Poor'
+    WET = 'Wet'
+
+
+def _code(enum_type, value):
+    """Enum member for a known value, otherwise the value itself"""
+    try:
+        return enum_type(value)
+    except ValueError:
+        return sys.intern(value) if isinstance(value, str) else value
+
+def _plain(value):
+    return value.value if isinstance(value, Enum) else value
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+PLAYER_STAT_FIELDS = ('fairways_hit', 'greens_in_regulation', 'total_putts')
+
+
+@dataclass(slots=True)
+class PlayerStats:
+    """One player's stats for a completed match (None = not recorded)"""
+    fairways_hit: int = None
+    greens_in_regulation: int = None
+    total_putts: int = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """PlayerStats for a stats dict, or None if it has other keys"""
+        if not isinstance(data, dict) or not set(data) <= set(PLAYER_STAT_FIELDS):
+            return None
+        return cls(**data)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in PLAYER_STAT_FIELDS
+                if getattr(self, field) is not None}
+
+
+@dataclass(slots=True)
+class Match:
+    """A stored match; fields set to None are absent from the dict form"""
+    id: int = None
+    date: object = None
+    player_ids: tuple = None
+    status: object = None
+    location: str = None
+    handicap: object = None
+    course_par: object = None
+    format: object = None
+    created_by: str = None
+    created_date: object = None
+    scores: tuple = None
+    weather: object = None
+    course_condition: object = None
+    duration: object = None
+    notes: object = None
+    completed_date: object = None
+    # Aligned with player_ids
+    player_stats: tuple = None
+    # int8 (players, holes, fields) array, see Utils.scorecard
+    scorecards: object = field(default=None, compare=False)
+    # Team matches only: the two team ids and their scores
+    team_ids: tuple = None
+    team_scores: tuple = None
+    version: int = None
+    # Any other keys of the dict form
+    extra: dict = None
+
+    @property
+    def players(self):
+        """Current display names of the players"""
+        registry = get_registry()
+        return [registry.name_of(player_id) for player_id in self.player_ids or ()]
+
+    @classmethod
+    def from_dict(cls, data):
+        match = cls()
+        extra = {}
+        for key, value in data.items():
+            if value is None or key in ('players', 'player_stats'):
+                continue
+            decode = _DECODERS.get(key)
+            if decode is None or not decode(match, value):
+                extra[key] = value
+
+        # Names only identify the players when no ids were stored
+        names = data.get('players')
+        if names is not None and not _is_name_list(names):
+            extra['players'] = names
+            names = None
+        if match.player_ids is None and names is not None:
+            registry = get_registry()
+            match.player_ids = tuple(registry.resolve(name) for name in names)
+
+        # Stats are keyed by the names as saved, and stored by player position
+        stats = data.get('player_stats')
+        if stats is not None and not _decode_player_stats(match, stats, names):
+            extra['player_stats'] = stats
+        match.extra = extra or None
+        return match
+
+    def to_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    # Read-only mapping protocol, for code written against match dicts
+
+    def keys(self):
+        keys = [key for key, attribute in _FIELDS.items() if getattr(self, attribute) is not None]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def __getitem__(self, key):
+        attribute = _FIELDS.get(key)
+        if attribute is not None:
+            value = getattr(self, attribute)
+            if value is not None:
+                encode = _ENCODERS.get(key)
+                return encode(self, value) if encode else _plain(value)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        attribute = _FIELDS.get(key)
+        if attribute is not None and getattr(self, attribute) is not None:
+            return True
+        return bool(self.extra) and key in self.extra
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+
+def _is_name_list(value):
+    return isinstance(value, (list, tuple)) and all(isinstance(name, str) for name in value)
+
+def _decode_player_ids(match, value):
+    if not isinstance(value, (list, tuple)) or not all(type(player_id) is int for player_id in value):
+        return False
+    match.player_ids = tuple(value)
+    return True
+
+def _decode_scores(match, value):
+    if not isinstance(value, (list, tuple)):
+        return False
+    match.scores = tuple(value)
+    return True
+
+def _int_tuple(attribute):
+    def decode(match, value):
+        if not isinstance(value, (list, tuple)) or not all(type(item) is int for item in value):
+            return False
+        setattr(match, attribute, tuple(value))
+        return True
+    return decode
+
+def _decode_player_stats(match, value, names):
+    if match.player_ids is None or not isinstance(value, dict):
+        return False
+    names = names or match.players
+    if len(names) != len(match.player_ids) or len(value) != len(names) or set(value) != set(names):
+        return False
+    stats = tuple(PlayerStats.from_dict(value[name]) for name in names)
+    if any(entry is None for entry in stats):
+        return False
+    match.player_stats = stats
+    return True
+
+def _decode_scorecards(match, value):
+    cards = scorecard.decode(value)
+    if cards is None:
+        return False
+    match.scorecards = cards
+    return True
+
+def _setter(attribute, convert=lambda value: value):
+    def decode(match, value):
+        setattr(match, attribute, convert(value))
+        return True
+    return decode
+
+
+# dict key -> Match attribute
+_FIELDS = {
+    'id': 'id',
+    'date': 'date',
+    'players': 'player_ids',
+    'player_ids': 'player_ids',
+    'status': 'status',
+    'location': 'location',
+    'handicap': 'handicap',
+    'course_par': 'course_par',
+    'format': 'format',
+    'created_by': 'created_by',
+    'created_date': 'created_date',
+    'scores': 'scores',
+    'weather': 'weather',
+    'course_condition': 'course_condition',
+    'duration': 'duration',
+    'notes': 'notes',
+    'completed_date': 'completed_date',
+    'player_stats': 'player_stats',
+    'scorecards': 'scorecards',
+    'teams': 'team_ids',
+    'team_scores': 'team_scores',
+    'version': 'version',
+}
+
+_DECODERS = {
+    'id': _setter('id'),
+    'date': _setter('date'),
+    'player_ids': _decode_player_ids,
+    'status': _setter('status', lambda value: _code(MatchStatus, value)),
+    'location': _setter('location', _intern),
+    'handicap': _setter('handicap'),
+    'course_par': _setter('course_par'),
+    'format': _setter('format', lambda value: _code(MatchFormat, value)),
+    'created_by': _setter('created_by', _intern),
+    'created_date': _setter('created_date'),
+    'scores': _decode_scores,
+    'weather': _setter('weather', lambda value: _code(Weather, value)),
+    'course_condition': _setter('course_condition', lambda value: _code(CourseCondition, value)),
+    'duration': _setter('duration', _intern),
+    'notes': _setter('notes'),
+    'completed_date': _setter('completed_date'),
+    'scorecards': _decode_scorecards,
+    'teams': _int_tuple('team_ids'),
+    'team_scores': _int_tuple('team_scores'),
+    'version': _setter('version'),
+}
+
+# Match attribute -> dict value, for attributes not stored as-is
+_ENCODERS = {
+    'players': lambda match, value: match.players,
+    'player_ids': lambda match, value: list(value),
+    'scores': lambda match, value: list(value),
+    'teams': lambda match, value: list(value),
+    'team_scores': lambda match, value: list(value),
+    'player_stats': lambda match, value: {
+        name: stats.to_dict() for name, stats in zip(match.players, value)
+    },
+}
+
+
+def as_match(match):
+    """Match for a match dict (Match objects are returned as they are)"""
+    return match if isinstance(match, Match) else Match.from_dict(match)
@@ -0,0 +1,91 @@
+"""Append-only storage for the Match Details records CSV.
+
+Saving a round appends one row under a file lock instead of reading,
+concatenating and rewriting the whole file. Readers use MatchRecordsView,
+which keeps a parsed DataFrame in memory and only parses rows appended since
+its last refresh.
+
+Set GOLF_CSV_FSYNC=1 to fsync after every append.
+"""
+import csv
+import io
+import os
+import threading
+
+import pandas as pd
+
+from Utils.persistence import file_lock
+
+DATA_FILE = 'match_records.csv'
+
+COLUMNS = [
+    "User", "User Score", "Opponent", "Opponent Handicap", "Opponent Score",
+    "Ground", "Match Type", "Match Date", "Match Time", "Notes"
+]
+
+FSYNC = os.environ.get('GOLF_CSV_FSYNC', '0') == '1'
+
+_views = {}
+_views_lock = threading.Lock()
+
+
+def append_record(record, path=DATA_FILE, fsync=None):
+    """Append one record, writing the header only when the file is new"""
+    if fsync is None:
+        fsync = FSYNC
+    with file_lock(path):
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            if write_header:
+                writer.writeheader()
+            writer.writerow({column: record.get(column, '') for column in COLUMNS})
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+
+
+class MatchRecordsView:
+    """In-memory DataFrame of the CSV, refreshed incrementally"""
+
+    def __init__(self, path=DATA_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._frame = pd.DataFrame(columns=COLUMNS)
+        self._offset = 0
+
+    def refresh(self):
+        """Parse only the bytes appended since the last refresh"""
+        with self._lock:
+            if not os.path.exists(self.path):
+                self._frame = pd.DataFrame(columns=COLUMNS)
+                self._offset = 0
+                return self._frame
+
+            with file_lock(self.path):
+                size = os.path.getsize(self.path)
+                if size < self._offset:
+                    # The file was replaced or truncated; start over
+                    self._frame = pd.DataFrame(columns=COLUMNS)
+                    self._offset = 0
+                if size == self._offset:
+                    return self._frame
+                with open(self.path, 'rb') as f:
+                    f.seek(self._offset)
+                    chunk = f.read(size - self._offset)
+
+            text = chunk.decode('utf-8')
+            if self._offset == 0:
+                new_rows = pd.read_csv(io.StringIO(text))
+            else:
+                new_rows = pd.read_csv(io.StringIO(text), header=None, names=COLUMNS)
+            self._frame = pd.concat([self._frame, new_rows], ignore_index=True) if len(self._frame) else new_rows
+            self._offset = size
+            return self._frame
+
+
+def get_view(path=DATA_FILE):
+    """Process-wide view of a records file, refreshed before it is returned"""
+    with _views_lock:
+        view = _views.setdefault(path, MatchRecordsView(path))
+    return view.refresh()
@@ -0,0 +1,308 @@
+"""Compact columnar snapshot format for matches.
+
+A snapshot file is a short JSON header followed by raw little-endian column
+arrays, so loading is a handful of np.frombuffer calls over a memory map
+instead of parsing every record:
+
+- ids and other integer fields are int64 columns, durations float64
+- dates are int64 microseconds since the epoch, decoded in one vectorized
+  conversion instead of one datetime.fromisoformat call per field
+- repeated strings (status, location, player names, ...) are int32 codes
+  into a single string table stored in the header
+- list fields (players, scores) are one flat array plus per-row lengths,
+  and per-player stats are flat arrays aligned with the players column
+- hole-by-hole scorecards are one flat int8 array plus holes per row
+- anything else is kept in a single JSON "extras" blob
+
+Use it for the match snapshot with GOLF_SNAPSHOT_FORMAT=columnar, and convert
+existing data with:
+
+    python -m Utils.match_snapshot to-columnar matches.json matches.bin
+    python -m Utils.match_snapshot to-json matches.bin matches.json
+"""
+import argparse
+import gc
+import io
+import json
+import mmap
+from datetime import datetime
+
+import numpy as np
+
+from Utils import scorecard
+from Utils.match_journal import DATE_FIELDS, decode_match, encode_match, load_snapshot
+from Utils.persistence import atomic_write_bytes, atomic_write_json
+
+MAGIC = b'GOLFCOL1'
+EXTENSION = '.bin'
+ALIGNMENT = 8
+
+INT_FIELDS = ('id', 'version', 'course_par', 'handicap')
+FLOAT_FIELDS = ('duration',)
+STRING_FIELDS = ('status', 'location', 'format', 'created_by', 'weather', 'course_condition', 'notes')
+# List fields and whether their items are strings (coded) or integers
+LIST_FIELDS = {'players': 'str', 'player_ids': 'int', 'scores': 'int', 'teams': 'int', 'team_scores': 'int'}
+# Keys of each player's entry in match['player_stats']
+PLAYER_STAT_FIELDS = ('fairways_hit', 'greens_in_regulation', 'total_putts')
+
+# Markers for "field not set" in integer, string-code and list-length columns
+INT_ABSENT = np.iinfo(np.int64).min
+ABSENT = -1
+
+
+def _is_int(value):
+    return type(value) is int and INT_ABSENT < value <= np.iinfo(np.int64).max
+
+def _fits(kind, value):
+    """Whether a list field value can be stored in its column"""
+    if not isinstance(value, list):
+        return False
+    if kind == 'str':
+        return all(isinstance(item, str) for item in value)
+    return all(_is_int(item) for item in value)
+
+def _stats_fit(match):
+    """Whether player_stats has exactly one integer entry per listed player"""
+    stats, players = match.get('player_stats'), match.get('players')
+    if not isinstance(stats, dict) or not _fits('str', players) or set(stats) != set(players):
+        return False
+    return len(stats) == len(players) and all(
+        isinstance(entry, dict) and set(entry) == set(PLAYER_STAT_FIELDS)
+        and all(_is_int(value) for value in entry.values())
+        for entry in stats.values()
+    )
+
+def encode_columns(matches):
+    """Split matches into (string table, column arrays)"""
+    strings = {}
+    n = len(matches)
+    ints = {field: np.full(n, INT_ABSENT, dtype=np.int64) for field in INT_FIELDS}
+    floats = {field: np.full(n, np.nan) for field in FLOAT_FIELDS}
+    dates = {field: [None] * n for field in DATE_FIELDS}
+    codes = {field: np.full(n, ABSENT, dtype=np.int32) for field in STRING_FIELDS}
+    lists = {field: [] for field in LIST_FIELDS}
+    lengths = {field: np.full(n, ABSENT, dtype=np.int32) for field in LIST_FIELDS}
+    # One value per entry of the players column, ABSENT-filled when a match has no stats
+    player_stats = {field: [] for field in PLAYER_STAT_FIELDS}
+    has_stats = np.zeros(n, dtype=np.int8)
+    # Flattened (players, holes, fields) cards, and holes per row
+    scorecards, scorecard_holes = [], np.full(n, ABSENT, dtype=np.int32)
+    extra_rows, extra_values = [], []
+
+    for row, match in enumerate(matches):
+        extra = {}
+        stats_fit = _stats_fit(match)
+        cards = scorecard.decode(match['scorecards']) if 'scorecards' in match else None
+        cards_fit = (cards is not None and _fits('str', match.get('players'))
+                     and cards.shape[0] == len(match['players']))
+        for field, value in match.items():
+            if field in ints and _is_int(value):
+                ints[field][row] = value
+            elif field in floats and type(value) is float and value == value:
+                floats[field][row] = value
+            elif field in dates and isinstance(value, datetime) and value.tzinfo is None:
+                dates[field][row] = value
+            elif field in codes and isinstance(value, str):
+                codes[field][row] = strings.setdefault(value, len(strings))
+            elif field in lists and _fits(LIST_FIELDS[field], value):
+                if LIST_FIELDS[field] == 'str':
+                    value = [strings.setdefault(item, len(strings)) for item in value]
+                lists[field].extend(value)
+                lengths[field][row] = len(value)
+            elif field == 'player_stats' and stats_fit:
+                has_stats[row] = 1
+            elif field == 'scorecards' and cards_fit:
+                scorecards.append(cards.ravel())
+                scorecard_holes[row] = cards.shape[1]
+            else:
+                extra[field] = value
+        if lengths['players'][row] != ABSENT:
+            for player in match['players']:
+                entry = match['player_stats'][player] if stats_fit else {}
+                for field, values in player_stats.items():
+                    values.append(entry.get(field, ABSENT))
+        if extra:
+            extra_rows.append(row)
+            extra_values.append(encode_match(extra))
+
+    columns = dict(ints)
+    columns.update(floats)
+    for field, values in dates.items():
+        columns[field] = np.array(values, dtype='datetime64[us]').view(np.int64)
+    columns.update(codes)
+    for field, kind in LIST_FIELDS.items():
+        columns[field] = np.array(lists[field], dtype=np.int32 if kind == 'str' else np.int64)
+        columns[field + '_lengths'] = lengths[field]
+    for field, values in player_stats.items():
+        columns['player_stats.' + field] = np.array(values, dtype=np.int64)
+    columns['player_stats'] = has_stats
+    columns['scorecards'] = np.concatenate(scorecards) if scorecards else np.zeros(0, dtype=np.int8)
+    columns['scorecards_holes'] = scorecard_holes
+    extras = json.dumps({'rows': extra_rows, 'values': extra_values}).encode('utf-8')
+    columns['extras'] = np.frombuffer(extras, dtype=np.uint8)
+    return list(strings), columns
+
+def write(matches, path, fsync=True):
+    """Atomically write matches as a columnar snapshot"""
+    strings, columns = encode_columns(list(matches))
+    layout, offset = {}, 0
+    for name, array in columns.items():
+        layout[name] = [array.dtype.str, offset, len(array)]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({
+        'rows': len(columns['id']),
+        'strings': strings,
+        'columns': layout
+    }).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 8 + len(header)) % ALIGNMENT)
+
+    buffer = io.BytesIO()
+    buffer.write(MAGIC)
+    buffer.write(np.uint64(len(header)).tobytes())
+    buffer.write(header)
+    data_start = buffer.tell()
+    for name, array in columns.items():
+        buffer.seek(data_start + layout[name][1])
+        buffer.write(np.ascontiguousarray(array).tobytes())
+    buffer.seek(0, io.SEEK_END)
+    buffer.write(b'\0' * (data_start + offset - buffer.tell()))
+    atomic_write_bytes(path, buffer.getvalue(), fsync)
+
+def read_columns(path):
+    """(row count, string table, column arrays) backed by a read-only memory map"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a columnar match snapshot")
+    header_size = int(np.frombuffer(mapped, dtype=np.uint64, count=1, offset=len(MAGIC))[0])
+    data_start = len(MAGIC) + 8 + header_size
+    header = json.loads(mapped[len(MAGIC) + 8:data_start])
+    columns = {
+        name: np.frombuffer(mapped, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+        for name, (dtype, offset, count) in header['columns'].items()
+    }
+    return header['rows'], header['strings'], columns
+
+def _split(values, lengths):
+    """Cut a flat list into per-row lists (None where the field is absent)"""
+    ends = np.cumsum(np.maximum(lengths, 0)).tolist()
+    starts = [0] + ends[:-1]
+    return [values[start:end] if length != ABSENT else None
+            for start, end, length in zip(starts, ends, lengths.tolist())]
+
+def _player_stats(columns, players):
+    """Per-row player_stats dicts rebuilt from the flat per-player columns"""
+    has_stats = columns['player_stats'].astype(bool)
+    rows = [None] * len(has_stats)
+    if not has_stats.any():
+        return rows, has_stats
+    # Entries follow the players column; keep those of matches with stats
+    keep = np.repeat(has_stats, np.maximum(columns['players_lengths'], 0))
+    entries = list(map(dict, map(
+        lambda values: zip(PLAYER_STAT_FIELDS, values),
+        zip(*(columns['player_stats.' + field][keep].tolist() for field in PLAYER_STAT_FIELDS))
+    )))
+    start = 0
+    for row in np.flatnonzero(has_stats).tolist():
+        names = players[row]
+        rows[row] = dict(zip(names, entries[start:start + len(names)]))
+        start += len(names)
+    return rows, has_stats
+
+def _scorecards(columns):
+    """Per-row scorecard arrays, views into one copy of the flat column"""
+    holes = columns['scorecards_holes']
+    present = holes != ABSENT
+    rows = [None] * len(holes)
+    if not present.any():
+        return rows, present
+    sizes = np.where(present, holes * np.maximum(columns['players_lengths'], 0) * len(scorecard.FIELDS), 0)
+    ends = np.cumsum(sizes)
+    # Copied out of the memory map so the snapshot file can be replaced
+    flat = columns['scorecards'].copy()
+    flat.flags.writeable = False
+    players = columns['players_lengths']
+    for row in np.flatnonzero(present).tolist():
+        rows[row] = flat[ends[row] - sizes[row]:ends[row]].reshape(players[row], holes[row], len(scorecard.FIELDS))
+    return rows, present
+
+def decode_columns(rows, strings, columns):
+    """Rebuild match dicts from the arrays returned by read_columns"""
+    # Code -1 (absent) indexes the trailing None
+    string_table = np.array(strings + [None], dtype=object)
+
+    # (field, per-row values, rows where the field is set)
+    fields = []
+    for field in INT_FIELDS:
+        column = columns[field]
+        fields.append((field, column.tolist(), column != INT_ABSENT))
+    for field in FLOAT_FIELDS:
+        column = columns[field]
+        fields.append((field, column.tolist(), ~np.isnan(column)))
+    for field in DATE_FIELDS:
+        column = columns[field]
+        fields.append((field, column.view('datetime64[us]').astype(object).tolist(), column != INT_ABSENT))
+    for field in STRING_FIELDS:
+        column = columns[field]
+        fields.append((field, string_table[column].tolist(), column != ABSENT))
+    for field, kind in LIST_FIELDS.items():
+        # Files written before player ids (or teams) existed lack those columns
+        if field not in columns:
+            continue
+        flat = columns[field]
+        flat = string_table[flat].tolist() if kind == 'str' else flat.tolist()
+        lengths = columns[field + '_lengths']
+        fields.append((field, _split(flat, lengths), lengths != ABSENT))
+    players = next(values for field, values, _ in fields if field == 'players')
+    fields.append(('player_stats', *_player_stats(columns, players)))
+    # Files written before scorecards existed have no scorecards column
+    if 'scorecards_holes' in columns:
+        fields.append(('scorecards', *_scorecards(columns)))
+
+    # Fields set on every row are zipped straight into the dicts
+    complete = [(field, values) for field, values, present in fields if present.all()]
+    if complete:
+        names = [field for field, _ in complete]
+        records = [dict(zip(names, row)) for row in zip(*(values for _, values in complete))]
+    else:
+        records = [{} for _ in range(rows)]
+    for field, values, present in fields:
+        if 0 < present.sum() < rows:
+            for row in np.flatnonzero(present).tolist():
+                records[row][field] = values[row]
+
+    extras = json.loads(columns['extras'].tobytes())
+    for row, extra in zip(extras['rows'], extras['values']):
+        records[row].update(decode_match(extra))
+    return records
+
+def read(path):
+    """Load every match from a columnar snapshot"""
+    # Building millions of small containers would otherwise trigger repeated
+    # full garbage collections that find nothing to free
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return decode_columns(*read_columns(path))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert match snapshots between JSON and the columnar format")
+    parser.add_argument('command', choices=['to-columnar', 'to-json'])
+    parser.add_argument('source')
+    parser.add_argument('target')
+    args = parser.parse_args(argv)
+
+    if args.command == 'to-columnar':
+        matches = load_snapshot(args.source)
+        write(matches, args.target)
+    else:
+        matches = read(args.source)
+        atomic_write_json(args.target, [encode_match(m) for m in matches], indent=2)
+    print(f"Wrote {len(matches)} matches to {args.target}")
+
+
+if __name__ == '__main__':
+    main()
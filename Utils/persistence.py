@@ -0,0 +1,112 @@
+"""Shared helpers for writing data files safely.
+
+Every data file is written through these helpers:
+
+- file_lock serializes writers across threads and processes with an
+  advisory lock on a sidecar ``.lock`` file
+- atomic_write_* write to a temp file in the same directory and os.replace
+  it over the target, so readers never see a truncated file
+- records carry a ``version`` counter; writers pass the version they read and
+  get StaleWriteError if someone else has written since
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to msvcrt byte-range locks
+    fcntl = None
+    import msvcrt
+
+
+# Lock files held by the current thread, so file_lock is re-entrant
+_held = threading.local()
+
+
+class StaleWriteError(Exception):
+    """The record changed since the caller read it"""
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on ``path + '.lock'`` across processes
+
+    Nested calls for the same path from the same thread do not block.
+    """
+    key = os.path.abspath(path)
+    held = getattr(_held, 'paths', None)
+    if held is None:
+        held = _held.paths = set()
+    if key in held:
+        yield
+        return
+
+    lock_file = open(path + '.lock', 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        held.add(key)
+        yield
+    finally:
+        held.discard(key)
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        lock_file.close()
+
+def file_signature(path):
+    """(inode, mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def atomic_write_bytes(path, data, fsync=True):
+    """Replace ``path`` with ``data`` without ever exposing a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def atomic_write_text(path, text, fsync=True):
+    atomic_write_bytes(path, text.encode('utf-8'), fsync)
+
+def atomic_write_json(path, data, fsync=True, **dump_kwargs):
+    atomic_write_text(path, json.dumps(data, **dump_kwargs), fsync)
+
+def read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def check_version(current, expected_version):
+    """Raise StaleWriteError unless ``current`` is still at ``expected_version``
+
+    ``current`` is the stored record (None if it does not exist yet, which is
+    version 0); ``expected_version`` None skips the check.
+    """
+    current_version = current.get('version', 0) if current else 0
+    if expected_version is not None and current_version != expected_version:
+        raise StaleWriteError(
+            f"expected version {expected_version}, found {current_version}"
+        )
+    return current_version
@@ -0,0 +1,219 @@
+"""Registry of players with stable integer ids.
+
+Users are keyed by email and display names can change, so matches,
+leaderboard entries and statistics refer to players by id instead. Ids are
+dense (1, 2, 3, ...), so a player is found by list index and a name by one
+dict lookup. Renaming a player keeps the old name as an alias, so history
+recorded under it still resolves.
+
+Players without an account (opponents entered by name) get an id as well;
+registering later with the same name claims that id.
+
+Existing data files are migrated on first start, or explicitly with:
+
+    python -m Utils.player_registry migrate
+"""
+import argparse
+import sys
+import threading
+from contextlib import contextmanager
+
+from Utils.persistence import atomic_write_json, file_lock, file_signature, read_json
+
+PLAYERS_FILE = 'players.json'
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class PlayerRegistry:
+    """Player records indexed by id, current and previous name, and email"""
+
+    def __init__(self, path=PLAYERS_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._players = []
+        self._by_name = {}
+        self._by_email = {}
+        self._signature = None
+
+    def load(self):
+        with self._lock:
+            self._signature = file_signature(self.path)
+            self._replace(read_json(self.path, []))
+
+    def refresh(self):
+        """Reload if another process has rewritten the file"""
+        if file_signature(self.path) != self._signature:
+            self.load()
+
+    def save(self):
+        atomic_write_json(self.path, self._players, indent=2)
+        self._signature = file_signature(self.path)
+
+    @contextmanager
+    def editing(self):
+        """Lock the file, pick up other writers' changes, then save on exit"""
+        with self._lock, file_lock(self.path):
+            self.refresh()
+            yield self
+            self.save()
+
+    def _replace(self, players):
+        by_name, by_email = {}, {}
+        # Current names take precedence over aliases
+        for player in players:
+            for name in player.get('previous_names', []):
+                by_name.setdefault(name, player['id'])
+        for player in players:
+            player['name'] = sys.intern(player['name'])
+            by_name[player['name']] = player['id']
+            if player.get('email'):
+                by_email[player['email']] = player['id']
+        self._players, self._by_name, self._by_email = players, by_name, by_email
+
+    def _add(self, name, email=None):
+        player = {'id': len(self._players) + 1, 'name': sys.intern(name), 'email': email, 'previous_names': []}
+        self._players.append(player)
+        self._by_name[player['name']] = player['id']
+        if email:
+            self._by_email[email] = player['id']
+        return player['id']
+
+    def __len__(self):
+        return len(self._players)
+
+    def all(self):
+        return list(self._players)
+
+    def get(self, player_id):
+        if player_id is None or player_id < 1:
+            return None
+        if player_id > len(self._players):
+            # Possibly added by another process since the last load
+            self.refresh()
+            if player_id > len(self._players):
+                return None
+        return self._players[player_id - 1]
+
+    def name_of(self, player_id):
+        player = self.get(player_id)
+        return player['name'] if player else None
+
+    def id_of(self, name):
+        """Id for a current or previous name, or None"""
+        return self._by_name.get(name)
+
+    def id_for_email(self, email):
+        return self._by_email.get(email)
+
+    def resolve(self, name):
+        """Id for a name, adding a player without an account if it is new"""
+        player_id = self._by_name.get(name)
+        if player_id is None:
+            with self.editing():
+                player_id = self._by_name.get(name)
+                if player_id is None:
+                    player_id = self._add(name)
+        return player_id
+
+    def resolve_all(self, names):
+        """{name: id} for many names, adding all new players with one write"""
+        missing = [name for name in dict.fromkeys(names) if name not in self._by_name]
+        if missing:
+            with self.editing():
+                for name in missing:
+                    if name not in self._by_name:
+                        self._add(name)
+        return {name: self._by_name[name] for name in names}
+
+    def register(self, name, email=None):
+        """Id for a user account, claiming an account-less player of the same name"""
+        with self.editing():
+            if email and email in self._by_email:
+                return self._by_email[email]
+            player_id = self._by_name.get(name)
+            player = self.get(player_id)
+            if player is not None and not player.get('email') and player['name'] == name:
+                player['email'] = email
+                if email:
+                    self._by_email[email] = player_id
+                return player_id
+            return self._add(name, email)
+
+    def rename(self, player_id, name):
+        """Change a player's display name, keeping the old one as an alias"""
+        with self.editing():
+            player = self.get(player_id)
+            if player is None or player['name'] == name:
+                return
+            player['previous_names'].append(player['name'])
+            player['name'] = sys.intern(name)
+            self._by_name[player['name']] = player_id
+
+
+def get_registry():
+    """Return the process-wide player registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PlayerRegistry()
+            _registry.load()
+        return _registry
+
+def needs_migration(storage, leaderboard):
+    """Whether users or leaderboard entries predate player ids"""
+    return (any('player_id' not in info for info in storage.load_users().values())
+            or any('player_id' not in entry for entry in read_json(leaderboard.path, [])))
+
+def migrate(storage, leaderboard, player_stats, registry=None):
+    """Give every user, match and leaderboard entry a player id
+
+    Safe to run more than once: records that already have ids keep them.
+    """
+    registry = registry or get_registry()
+    with file_lock(registry.path):
+        registry.refresh()
+        for email, info in storage.load_users().items():
+            if 'player_id' not in info:
+                player_id = registry.register(info['name'], email)
+                storage.update_user(email, dict(info, player_id=player_id))
+
+        # Decoding a match resolves its player names; saving writes the ids
+        matches = storage.load_matches()
+        storage.save_matches(matches)
+
+        # Old entries are keyed by name, so read the file directly
+        with file_lock(leaderboard.path):
+            entries = [dict(entry, player_id=entry.get('player_id') or registry.resolve(entry['name']))
+                       for entry in read_json(leaderboard.path, [])]
+            leaderboard.replace(entries)
+            leaderboard.save()
+
+        player_stats.rebuild(matches)
+        registry.save()
+    return len(registry)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the player registry")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('migrate', help="assign player ids to existing users, matches and leaderboard")
+    subcommands.add_parser('list', help="show registered players")
+    args = parser.parse_args(argv)
+
+    registry = get_registry()
+    if args.command == 'migrate':
+        from Utils.leaderboard import RankedLeaderboard
+        from Utils.player_stats import PlayerStatsStore
+        from Utils.storage import get_storage
+        count = migrate(get_storage(), RankedLeaderboard(), PlayerStatsStore(), registry)
+        print(f"{count} players registered in {registry.path}")
+    else:
+        for player_id in range(1, len(registry) + 1):
+            player = registry.get(player_id)
+            aliases = f" (was {', '.join(player['previous_names'])})" if player['previous_names'] else ''
+            print(f"{player_id}: {player['name']} <{player.get('email') or 'no account'}>{aliases}")
+
+
+if __name__ == '__main__':
+    main()
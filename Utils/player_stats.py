@@ -0,0 +1,206 @@
+"""Running per-player statistics aggregates.
+
+Instead of recomputing wins, averages and best scores from every completed
+match on each rerun, one aggregate record per player is updated when scores
+are submitted and persisted to player_stats.json. Pages read it in O(1).
+Records are keyed by player registry id (as a string, since it is a JSON
+object key), so they follow a player through renames. Every session reads
+the same aggregates, so writers fold matches into copies of the records
+they touch and swap the whole map in.
+
+Rebuild the aggregates from match history (and report any drift) with:
+
+    python -m Utils.player_stats --check
+    python -m Utils.player_stats --rebuild
+"""
+import argparse
+from bisect import insort
+
+from Utils.match_model import as_match
+from Utils.persistence import atomic_write_json, file_lock, file_signature, read_json
+from Utils.storage import get_storage
+from Utils.teams import opponent_scores
+
+STATS_FILE = 'player_stats.json'
+
+# Number of most recent rounds kept per player
+RECENT_WINDOW = 20
+
+
+def empty_record():
+    return {
+        'matches': 0,
+        'wins': 0,
+        'ties': 0,
+        'scored': 0,
+        'score_sum': 0,
+        'best_score': None,
+        'putts_sum': 0,
+        'putts_count': 0,
+        'recent': []
+    }
+
+def apply_match(aggregates, match):
+    """Fold one completed match into the aggregates of its players"""
+    if match.get('status') != 'Completed':
+        return
+
+    match = as_match(match)
+    scores = match.get('scores')
+    # Stored stats are keyed by display name
+    player_stats = match.get('player_stats', {})
+    for i, (player_id, player) in enumerate(zip(match.player_ids or (), match.players)):
+        record = aggregates.setdefault(str(player_id), empty_record())
+        record['matches'] += 1
+
+        if scores:
+            score = scores[i]
+            opponents = opponent_scores(match, i)
+            if opponents and score < min(opponents):
+                record['wins'] += 1
+            elif opponents and score == min(opponents):
+                record['ties'] += 1
+
+            record['scored'] += 1
+            record['score_sum'] += score
+            if record['best_score'] is None or score < record['best_score']:
+                record['best_score'] = score
+
+            # Keep the rolling window ordered by match date
+            insort(record['recent'], [match['date'].isoformat(), score])
+            del record['recent'][:-RECENT_WINDOW]
+
+        if player in player_stats:
+            record['putts_sum'] += player_stats[player].get('total_putts', 30)
+            record['putts_count'] += 1
+
+def build(matches):
+    """Compute aggregates for every player from scratch"""
+    aggregates = {}
+    for match in matches:
+        apply_match(aggregates, match)
+    return aggregates
+
+def merge_records(*records):
+    """Combine aggregate records of the same player (None entries are skipped)"""
+    merged = empty_record()
+    for record in records:
+        if record is None:
+            continue
+        for field in ('matches', 'wins', 'ties', 'scored', 'score_sum', 'putts_sum', 'putts_count'):
+            merged[field] += record[field]
+        if record['best_score'] is not None and (merged['best_score'] is None or record['best_score'] < merged['best_score']):
+            merged['best_score'] = record['best_score']
+        merged['recent'] = sorted(merged['recent'] + record['recent'])[-RECENT_WINDOW:]
+    return merged
+
+def summarize(record):
+    """Display-ready statistics for one aggregate record"""
+    if record is None:
+        record = empty_record()
+
+    matches = record['matches']
+    scored = record['scored']
+    recent = record['recent']
+    return {
+        'total_matches': matches,
+        'wins': record['wins'],
+        'win_rate': round(record['wins'] / matches * 100, 1) if matches > 0 else 0,
+        'avg_score': round(record['score_sum'] / scored, 1) if scored > 0 else 0,
+        'best_score': record['best_score'] or 0,
+        'avg_putts': round(record['putts_sum'] / record['putts_count'], 1) if record['putts_count'] > 0 else 30.0,
+        'recent_scores': [score for _, score in recent],
+        'recent_dates': [date for date, _ in recent]
+    }
+
+
+class PlayerStatsStore:
+    """Persisted aggregates keyed by player id"""
+
+    def __init__(self, path=STATS_FILE):
+        self.path = path
+        self.aggregates = {}
+        self._signature = None
+
+    def load(self, load_matches):
+        """Read persisted aggregates, rebuilding them on first use"""
+        with file_lock(self.path):
+            self._signature = file_signature(self.path)
+            aggregates = read_json(self.path)
+        # Files from before player ids were keyed by name
+        if aggregates is not None and all(key.isdigit() for key in aggregates):
+            self.aggregates = aggregates
+        else:
+            self.rebuild(load_matches())
+
+    def refresh(self):
+        """Reload if another process has rewritten the file"""
+        if file_signature(self.path) != self._signature:
+            self.aggregates = read_json(self.path, {})
+            self._signature = file_signature(self.path)
+
+    def save(self):
+        atomic_write_json(self.path, self.aggregates)
+        self._signature = file_signature(self.path)
+
+    def get(self, player_id):
+        return self.aggregates.get(str(player_id))
+
+    def record_match(self, match):
+        self.record_matches([match])
+
+    def record_matches(self, matches):
+        """Fold a batch of matches in with a single write"""
+        with file_lock(self.path):
+            self.refresh()
+            aggregates = dict(self.aggregates)
+            copied = set()
+            for match in matches:
+                match = as_match(match)
+                # Published records are never changed in place
+                for player_id in match.player_ids or ():
+                    key = str(player_id)
+                    if key not in copied and key in aggregates:
+                        aggregates[key] = dict(aggregates[key], recent=list(aggregates[key]['recent']))
+                    copied.add(key)
+                apply_match(aggregates, match)
+            self.aggregates = aggregates
+            self.save()
+
+    def rebuild(self, matches):
+        with file_lock(self.path):
+            self.aggregates = build(matches)
+            self.save()
+
+
+def find_drift(stored, rebuilt):
+    """Players whose stored aggregates differ from a rebuild"""
+    return sorted(player for player in set(stored) | set(rebuilt)
+                  if stored.get(player) != rebuilt.get(player))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild player statistics from match history")
+    parser.add_argument('--check', action='store_true', help="report drift without writing")
+    parser.add_argument('--rebuild', action='store_true', help="overwrite the stored aggregates")
+    parser.add_argument('--path', default=STATS_FILE)
+    args = parser.parse_args(argv)
+
+    store = PlayerStatsStore(args.path)
+    stored = read_json(args.path, {})
+    rebuilt = build(get_storage().load_matches())
+
+    drift = find_drift(stored, rebuilt)
+    for player_id in drift:
+        print(f"drift: player {player_id}")
+    print(f"{len(rebuilt)} players, {len(drift)} with drift")
+
+    if args.rebuild:
+        with file_lock(args.path):
+            store.aggregates = rebuilt
+            store.save()
+        print(f"Wrote {args.path}")
+    return 1 if drift and args.check else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,167 @@
+"""Hole-by-hole scorecards as compact integer arrays.
+
+A match's scorecards are one int8 array of shape (players, holes, fields),
+in the player order of the match, with the fields in FIELDS order:
+
+- strokes and putts on the hole
+- fairway: 1 hit, 0 missed (NOT_RECORDED on par 3s)
+- gir: 1 if the green was reached in regulation, else 0
+- penalties: penalty strokes on the hole
+
+NOT_RECORDED (-1) marks anything that was not entered. Stored matches keep
+the array in Match.scorecards; JSON storage writes it as base64 of the raw
+bytes (encode/decode), the columnar snapshot as one flat int8 column.
+
+The helpers below take the cards of many rounds stacked into one
+(rounds, holes, fields) array, with the matching (rounds, holes) pars from
+the course catalog, and answer each question with one masked NumPy
+reduction.
+"""
+import base64
+
+import numpy as np
+import pandas as pd
+
+from Utils.course_catalog import DEFAULT_PARS
+
+FIELDS = ('strokes', 'putts', 'fairway', 'gir', 'penalties')
+STROKES, PUTTS, FAIRWAY, GIR, PENALTIES = range(len(FIELDS))
+HOLES = 18
+NOT_RECORDED = -1
+
+
+def empty(players, holes=HOLES):
+    return np.full((players, holes, len(FIELDS)), NOT_RECORDED, dtype=np.int8)
+
+def decode(value):
+    """Scorecards array for any stored form, or None if it is not one
+
+    Accepts an array, the encode() form, or nested lists.
+    """
+    if isinstance(value, dict):
+        try:
+            cards = np.frombuffer(base64.b64decode(value['int8']), dtype=np.int8).reshape(value['shape'])
+        except (KeyError, TypeError, ValueError):
+            return None
+    else:
+        try:
+            cards = np.asarray(value)
+        except ValueError:
+            return None
+        if cards.dtype.kind not in 'iu' or (cards.size and (cards.min() < NOT_RECORDED or cards.max() > 127)):
+            return None
+        cards = cards.astype(np.int8, copy=False)
+    if cards.ndim != 3 or cards.shape[2] != len(FIELDS):
+        return None
+    # Shared between sessions like the rest of a stored match
+    cards.flags.writeable = False
+    return cards
+
+def encode(cards):
+    """JSON-serializable form of a scorecards array"""
+    return {'shape': list(cards.shape), 'int8': base64.b64encode(np.ascontiguousarray(cards).tobytes()).decode('ascii')}
+
+def totals(card):
+    """Round totals of one player's (holes, fields) card, in the match player_stats layout"""
+    strokes = card[:, STROKES]
+    fairway_holes = card[:, FAIRWAY] >= 0
+    gir_holes = card[:, GIR] >= 0
+    putts = card[:, PUTTS]
+    return {
+        'score': int(strokes[strokes >= 0].sum()),
+        'total_putts': int(putts[putts >= 0].sum()),
+        'fairways_hit': round(float(card[fairway_holes, FAIRWAY].mean()) * 100) if fairway_holes.any() else 0,
+        'greens_in_regulation': round(float(card[gir_holes, GIR].mean()) * 100) if gir_holes.any() else 0
+    }
+
+def course_pars(catalog, location):
+    """Hole pars of a catalog course; courses not in the catalog get the built-in pars"""
+    course = catalog.get(location)
+    if course is not None and len(course.holes) == HOLES:
+        return [hole.par for hole in course.holes]
+    return list(DEFAULT_PARS)
+
+def from_holes(strokes, putts, fairway, gir, penalties, pars):
+    """(holes, fields) card of one player from per-hole values; None is not recorded
+
+    Fairways are not recorded on par 3s.
+    """
+    def column(values):
+        return [NOT_RECORDED if value is None else int(value) for value in values]
+    card = np.array([column(strokes), column(putts), column(fairway), column(gir), column(penalties)],
+                    dtype=np.int8).T.copy()
+    card[np.asarray(pars) == 3, FAIRWAY] = NOT_RECORDED
+    return card
+
+def player_cards(matches, player_id, catalog):
+    """(cards, pars, dates) of a player's 18-hole scorecards, oldest first
+
+    cards is (rounds, holes, fields) and pars (rounds, holes); courses not in
+    the catalog are compared against the built-in hole pars.
+    """
+    cards, pars, dates = [], [], []
+    for match in sorted(matches, key=lambda match: match['date']):
+        scorecards = getattr(match, 'scorecards', None)
+        if scorecards is None or scorecards.shape[1] != HOLES or player_id not in match['player_ids']:
+            continue
+        cards.append(scorecards[match['player_ids'].index(player_id)])
+        pars.append(course_pars(catalog, match.get('location')))
+        dates.append(match['date'])
+    if not cards:
+        return empty(0), np.zeros((0, HOLES), dtype=np.int8), []
+    return np.stack(cards), np.asarray(pars, dtype=np.int8), dates
+
+def _masked_mean(values, mask, axis=None):
+    """Mean of ``values`` where ``mask`` holds (NaN where nothing is recorded)"""
+    count = mask.sum(axis=axis)
+    total = np.where(mask, values, 0).sum(axis=axis, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+def hole_averages(cards, pars):
+    """Per-hole averages over all rounds, one row per hole"""
+    recorded = cards >= 0
+    strokes = _masked_mean(cards[..., STROKES], recorded[..., STROKES], axis=0)
+    return pd.DataFrame({
+        'hole': np.arange(1, cards.shape[1] + 1),
+        'par': pars.mean(axis=0) if len(pars) else np.full(cards.shape[1], np.nan),
+        'avg_strokes': strokes,
+        # Strokes gained against par: positive is better than par
+        'vs_par': _masked_mean(pars - cards[..., STROKES].astype(np.int16), recorded[..., STROKES], axis=0),
+        'avg_putts': _masked_mean(cards[..., PUTTS], recorded[..., PUTTS], axis=0),
+        'fairway_pct': _masked_mean(cards[..., FAIRWAY], recorded[..., FAIRWAY], axis=0) * 100,
+        'gir_pct': _masked_mean(cards[..., GIR], recorded[..., GIR], axis=0) * 100,
+        'avg_penalties': _masked_mean(cards[..., PENALTIES], recorded[..., PENALTIES], axis=0)
+    })
+
+def par_type_summary(cards, pars):
+    """Average strokes gained against par on par 3s, 4s and 5s"""
+    recorded = cards[..., STROKES] >= 0
+    gained = pars - cards[..., STROKES].astype(np.int16)
+    return {
+        f'Par {par}': float(np.round(_masked_mean(gained, recorded & (pars == par)), 2))
+        for par in np.unique(pars).tolist()
+    }
+
+def _percentage(value):
+    return None if np.isnan(value) else round(float(value) * 100, 1)
+
+def summary(cards, pars):
+    """Driving, approach, short game and putting percentages over all rounds"""
+    if not len(cards):
+        return None
+    recorded = cards >= 0
+    strokes = cards[..., STROKES]
+    missed_green = recorded[..., GIR] & (cards[..., GIR] == 0) & recorded[..., STROKES]
+    # Scrambling: par or better after missing the green
+    saves = missed_green & (strokes <= pars)
+    round_putts = np.where(recorded[..., PUTTS], cards[..., PUTTS], 0).sum(axis=1)
+    putts_rounds = recorded[..., PUTTS].any(axis=1)
+    return {
+        'rounds': len(cards),
+        'fairway_percentage': _percentage(_masked_mean(cards[..., FAIRWAY], recorded[..., FAIRWAY])),
+        'gir_percentage': _percentage(_masked_mean(cards[..., GIR], recorded[..., GIR])),
+        'scrambling_percentage': _percentage(saves.sum() / missed_green.sum()) if missed_green.any() else None,
+        'avg_putts': round(float(round_putts[putts_rounds].mean()), 1) if putts_rounds.any() else None,
+        'penalties_per_round': round(float(np.where(recorded[..., PENALTIES], cards[..., PENALTIES], 0).sum(axis=1).mean()), 2)
+    }
@@ -0,0 +1,339 @@
+"""Process-wide data store shared by every Streamlit session.
+
+A single SharedStore holds the authoritative users map and fronts the match
+storage backend, so memory stays flat as sessions are added. Readers get a
+read-only snapshot; writers build a new copy and swap it in (copy-on-write),
+and every write bumps ``version`` so caches keyed on it are invalidated.
+The leaderboard, player stats and team objects follow the same rule, so a
+reader never sees one of them half updated. Writes made by other server
+processes are noticed through the storage signature and bump ``version``
+too.
+
+Handicap indexes are recomputed once a day by the first sync() of the day,
+outside the store lock: other sessions keep reading (and writing) while
+the indexes are computed, and only publishing them takes the lock.
+
+Players are referred to by their Utils.player_registry id everywhere;
+data from before the registry existed is migrated on first start. Every
+player with an account has a leaderboard entry; accounts from before the
+leaderboard was persisted get one on first start, credited from match
+history. Teams and their standings live in Utils.teams.
+"""
+import threading
+from types import MappingProxyType
+
+import pandas as pd
+
+from Utils.course_catalog import get_catalog
+from Utils.handicap import HandicapStore
+from Utils.leaderboard import RankedLeaderboard, history_credit, match_points
+from Utils.match_archive import get_archive
+from Utils.match_frame import build_rounds_frame
+from Utils.player_registry import get_registry, migrate, needs_migration
+from Utils.player_stats import PlayerStatsStore
+from Utils.storage import get_storage
+from Utils.teams import TeamStandings, get_team_registry, is_team_match
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class SharedStore:
+    """One authoritative copy of users plus versioned access to matches"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.version = 0
+        self._lock = threading.RLock()
+        # Held for a whole handicap recompute; never taken while holding _lock
+        self._recompute_lock = threading.Lock()
+        self.registry = get_registry()
+        self.player_stats = PlayerStatsStore()
+        self.leaderboard = RankedLeaderboard()
+        if needs_migration(storage, self.leaderboard):
+            migrate(storage, self.leaderboard, self.player_stats, self.registry)
+        self._signature = storage.signature()
+        self._users = MappingProxyType(storage.load_users())
+        self.player_stats.load(storage.load_matches)
+        self.leaderboard.load()
+        self.handicaps = HandicapStore()
+        self.handicaps.load()
+        self.teams = get_team_registry()
+        self.team_standings = TeamStandings()
+        self.team_standings.load()
+        # (data version, rounds frame); built under its own lock so the
+        # store lock is not held while matches are read
+        self._frame = (None, None)
+        self._frame_lock = threading.Lock()
+        self.add_missing_leaderboard_entries()
+
+    def sync(self):
+        """Pick up writes made by other processes since the last check"""
+        with self._lock:
+            self.registry.refresh()
+            self.player_stats.refresh()
+            self.leaderboard.refresh()
+            self.handicaps.refresh()
+            self.teams.refresh()
+            self.team_standings.refresh()
+            signature = self.storage.signature()
+            if signature != self._signature:
+                self._signature = signature
+                self._users = MappingProxyType(self.storage.load_users())
+                self.version += 1
+            stale = self.handicaps.is_stale()
+        if stale:
+            self.recompute_handicaps()
+
+    @property
+    def users(self):
+        """Read-only snapshot of all users; do not mutate the records"""
+        self.sync()
+        return self._users
+
+    def get_user(self, email):
+        return self.users.get(email)
+
+    def _bump(self):
+        self._signature = self.storage.signature()
+        self.version += 1
+
+    def save_users(self, users):
+        """Replace every user record"""
+        with self._lock:
+            users = dict(users)
+            self.storage.save_users(users)
+            self._users = MappingProxyType(users)
+            self._bump()
+
+    def update_user(self, email, info, expected_version=None):
+        """Create or replace a single user record
+
+        Raises StaleWriteError if the stored record is no longer at
+        ``expected_version``.
+        """
+        with self._lock:
+            users = self.storage.update_user(email, info, expected_version)
+            self._users = MappingProxyType(users)
+            self._bump()
+
+    def register_player(self, name, email=None):
+        """Player id for a new user account"""
+        return self.registry.register(name, email)
+
+    def rename_player(self, player_id, name):
+        """Change a player's display name everywhere it is shown"""
+        with self._lock:
+            self.registry.rename(player_id, name)
+            with self.leaderboard.editing():
+                if player_id in self.leaderboard:
+                    self.leaderboard.update(player_id, name=name)
+            self._bump()
+
+    def save_match(self, match, expected_version=None):
+        """Persist one match and return the stored copy
+
+        Stored match dicts are replaced, never mutated. Raises StaleWriteError
+        if the stored match is no longer at ``expected_version``.
+        """
+        with self._lock:
+            previous = self.storage.get_match(match['id']) if match.get('id') is not None else None
+            match = self.storage.save_match(match, expected_version)
+            # Aggregates are updated once, when the scores are submitted
+            if match.get('status') == 'Completed' and (previous is None or previous.get('status') != 'Completed'):
+                self.player_stats.record_match(match)
+                if is_team_match(match):
+                    self.team_standings.record_match(match)
+            self._bump()
+            return match
+
+    def save_matches(self, matches):
+        with self._lock:
+            self.storage.save_matches(matches)
+            # Live aggregates only cover live matches; archived rounds are
+            # added on read. Standings have no such merge, so they are
+            # rebuilt from the archived team matches as well.
+            self.player_stats.rebuild(matches)
+            self.team_standings.rebuild(get_archive().team_matches() + list(matches))
+            self._bump()
+
+    def create_team(self, name, player_ids):
+        """Id of a new team of players; raises ValueError if it cannot be created"""
+        with self._lock:
+            team_id = self.teams.create(name, player_ids)
+            self._bump()
+            return team_id
+
+    def import_matches(self, matches):
+        """Store a batch of completed matches and credit them like submitted scores
+
+        Matches, player stats and the leaderboard are each written once for
+        the whole batch. Returns the stored matches.
+        """
+        with self._lock:
+            stored = self.storage.add_matches(matches)
+            self.player_stats.record_matches(stored)
+
+            credit = {}
+            for match in stored:
+                for player_id, score in zip(match.player_ids, match.get('scores') or ()):
+                    points, played = credit.get(player_id, (0, 0))
+                    credit[player_id] = (points + match_points(score), played + 1)
+            with self.leaderboard.editing():
+                for player_id, (points, played) in credit.items():
+                    self._credit(player_id, points, played)
+            self._bump()
+        # Historical rounds change indexes, so do not wait for tomorrow
+        if stored:
+            self.recompute_handicaps(force=True)
+        return stored
+
+    def save_leaderboard(self, entries):
+        """Replace every leaderboard entry"""
+        with self._lock, self.leaderboard.editing():
+            self.leaderboard.replace(entries)
+            self._bump()
+
+    def add_leaderboard_entry(self, entry):
+        with self._lock, self.leaderboard.editing():
+            self.leaderboard.upsert(entry)
+            self._bump()
+
+    def update_leaderboard_entry(self, player_id, **changes):
+        with self._lock, self.leaderboard.editing():
+            if player_id in self.leaderboard:
+                self.leaderboard.update(player_id, **changes)
+                self._bump()
+
+    def add_leaderboard_points(self, player_id, points):
+        """Credit one played match and its points to a player"""
+        with self._lock, self.leaderboard.editing():
+            if self._credit(player_id, points, 1):
+                self._bump()
+
+    def _leaderboard_entry(self, player_id, points=0, played=0):
+        """New leaderboard entry of a player with an account, or None for players without one"""
+        player = self.registry.get(player_id)
+        if player is None or not player.get('email'):
+            return None
+        handicap = self.handicaps.get(player_id)
+        if handicap is None:
+            handicap = self._users.get(player['email'], {}).get('handicap', 0)
+        return {'player_id': player_id, 'name': player['name'], 'handicap': handicap,
+                'points': points, 'matches_played': played}
+
+    def _credit(self, player_id, points, played):
+        """Add to a player's entry, creating it on their first credit; call inside leaderboard.editing()"""
+        entry = self.leaderboard.get(player_id) or self._leaderboard_entry(player_id)
+        if entry is None:
+            return False
+        self.leaderboard.upsert(dict(entry, points=entry['points'] + points,
+                                     matches_played=entry.get('matches_played', 0) + played))
+        return True
+
+    def add_missing_leaderboard_entries(self):
+        """Give every player with an account a leaderboard entry, credited from match history
+
+        Returns the number of entries added.
+        """
+        with self._lock:
+            missing = [player['id'] for player in self.registry.all()
+                       if player.get('email') and player['id'] not in self.leaderboard]
+            if not missing:
+                return 0
+            credit = history_credit(self._all_rounds())
+            with self.leaderboard.editing():
+                for player_id in missing:
+                    if player_id not in self.leaderboard:
+                        self.leaderboard.upsert(self._leaderboard_entry(player_id, *credit.get(player_id, (0, 0))))
+            self._bump()
+            return len(missing)
+
+    def recompute_handicaps(self, force=False):
+        """Recompute every handicap index and publish it to users and the leaderboard
+
+        Runs once a day (from sync) unless forced; returns {player id: index}.
+        A daily recompute that finds another one running returns the current
+        indexes instead of waiting; a forced one waits its turn. Must not be
+        called while holding the store lock.
+        """
+        if not self._recompute_lock.acquire(blocking=force):
+            return self.handicaps.current
+        try:
+            self.handicaps.refresh()
+            if not force and not self.handicaps.is_stale():
+                return self.handicaps.current
+            current = self.handicaps.recompute(self._all_rounds(), get_catalog())
+            self._publish_handicaps(current)
+            return current
+        finally:
+            self._recompute_lock.release()
+
+    def _publish_handicaps(self, current):
+        """Write new indexes to users and the leaderboard"""
+        with self._lock:
+            # Players keep the handicap they entered until they have an index.
+            # All changes are written at once: one users write, one leaderboard sort
+            changes = {}
+            for email, info in self.storage.load_users().items():
+                index = current.get(info.get('player_id'))
+                if index is not None and info.get('handicap') != index:
+                    changes[email] = {'handicap': index}
+            users = self.storage.update_users(changes) if changes else self.storage.load_users()
+            with self.leaderboard.editing():
+                entries = self.leaderboard.page()
+                updated = [dict(entry, handicap=current.get(entry['player_id'], entry.get('handicap')))
+                           for entry in entries]
+                if updated != entries:
+                    self.leaderboard.replace(updated)
+            self._users = MappingProxyType(users)
+            self._bump()
+
+    def rounds_frame(self):
+        """Columnar frame of completed rounds, rebuilt once per data version"""
+        self.sync()
+        return self._rounds_frame()
+
+    def _rounds_frame(self):
+        with self._frame_lock:
+            version, frame = self._frame
+            if version != self.version:
+                # Read the version first: a write landing during the build
+                # makes the frame look stale, never up to date
+                version = self.version
+                frame = build_rounds_frame(self.storage.query_matches(status='Completed'))
+                self._frame = (version, frame)
+            return frame
+
+    def _all_rounds(self):
+        """Archived and live completed rounds in one frame"""
+        rounds = self._rounds_frame()
+        archived = get_archive().rounds()
+        if archived is not None:
+            rounds = pd.concat([archived, rounds], ignore_index=True) if len(rounds) else archived
+        return rounds
+
+    def load_matches(self):
+        return self.storage.load_matches()
+
+    def get_match(self, match_id):
+        return self.storage.get_match(match_id)
+
+    def query_matches(self, player=None, status=None, location=None,
+                      newest_first=False, limit=None, offset=0, after=None):
+        return self.storage.query_matches(player, status, location, newest_first, limit, offset, after)
+
+    def count_matches(self, player=None, status=None, location=None):
+        return self.storage.count_matches(player, status, location)
+
+    def list_match_players(self):
+        return self.storage.list_match_players()
+
+
+def get_store():
+    """Return the process-wide SharedStore over the configured backend"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SharedStore(get_storage())
+        return _store
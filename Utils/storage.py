@@ -0,0 +1,447 @@
+"""Pluggable storage backends for users and matches.
+
+The backend is chosen with the GOLF_STORAGE environment variable:
+
+- ``json`` (default): users.json plus the match snapshot/journal files
+- ``sqlite``: a single SQLite database (GOLF_DB_PATH, default golf.db) with
+  indexes on player id, status, date and location
+
+Both backends expose the same interface, so app.py only needs thin adapters
+and pages can ask for just the rows they render through query_matches.
+Matches are returned as Utils.match_model.Match records, and the ``player``
+filter of query_matches/count_matches is a player registry id. Both
+are safe to share between server processes: update_user and save_match take
+an ``expected_version`` and raise StaleWriteError instead of overwriting a
+record someone else changed.
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from Utils import match_journal
+from Utils.match_index import PlayerMatchIndex
+from Utils.match_model import Match, as_match
+from Utils.persistence import atomic_write_json, check_version, file_lock, file_signature, read_json
+
+USERS_FILE = 'users.json'
+DB_FILE = 'golf.db'
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+class JsonStorage:
+    """File backend: users.json and the append-only match journal
+
+    Matches are cached in memory and kept in step with the files on disk, so
+    writes made by other server processes are picked up before every read
+    and every write.
+    """
+
+    def __init__(self, users_file=USERS_FILE, snapshot_file=match_journal.SNAPSHOT_FILE,
+                 journal_file=match_journal.JOURNAL_FILE):
+        self.users_file = users_file
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self._lock = threading.RLock()
+        self._matches = None
+        self._index = None
+        self._snapshot_signature = None
+        self._journal_offset = 0
+        self._journal_records = 0
+
+    def load_users(self):
+        return read_json(self.users_file, {})
+
+    def save_users(self, users):
+        with file_lock(self.users_file):
+            atomic_write_json(self.users_file, users, indent=2)
+
+    def update_user(self, email, info, expected_version=None):
+        """Write one user record; returns the current users map"""
+        with file_lock(self.users_file):
+            users = read_json(self.users_file, {})
+            version = check_version(users.get(email), expected_version)
+            users[email] = dict(info, version=version + 1)
+            atomic_write_json(self.users_file, users, indent=2)
+        return users
+
+    def update_users(self, changes):
+        """Change fields of many existing user records with one write
+
+        ``changes`` maps email to {field: value}; emails without a record are
+        skipped. Returns the current users map.
+        """
+        with file_lock(self.users_file):
+            users = read_json(self.users_file, {})
+            for email, fields in changes.items():
+                if email in users:
+                    users[email] = dict(users[email], **fields, version=users[email].get('version', 0) + 1)
+            atomic_write_json(self.users_file, users, indent=2)
+        return users
+
+    def signature(self):
+        """Changes whenever any process writes users or matches"""
+        return (file_signature(self.users_file), file_signature(self.snapshot_file),
+                file_signature(self.journal_file))
+
+    def _all_matches(self):
+        """Cached matches, brought up to date with the files on disk"""
+        if self._matches is not None and file_signature(self.snapshot_file) == self._snapshot_signature:
+            tail, offset = match_journal.read_journal(self.journal_file, self._journal_offset)
+            # A compaction between the two checks invalidates the tail
+            if file_signature(self.snapshot_file) == self._snapshot_signature:
+                for match in map(Match.from_dict, tail):
+                    self._matches[match.id] = match
+                    self._index.add(match)
+                self._journal_offset = offset
+                self._journal_records += len(tail)
+                return self._matches
+
+        # First load, or another process compacted: read everything
+        with file_lock(self.journal_file):
+            self._snapshot_signature = file_signature(self.snapshot_file)
+            snapshot = match_journal.load_snapshot(self.snapshot_file)
+            tail, self._journal_offset = match_journal.read_journal(self.journal_file)
+        matches = {}
+        for match in map(Match.from_dict, snapshot + tail):
+            matches[match.id] = match
+        self._matches = matches
+        self._index = PlayerMatchIndex(matches.values())
+        self._journal_records = len(tail)
+        return self._matches
+
+    def _compact(self):
+        match_journal.compact(self._matches.values(), self.snapshot_file, self.journal_file)
+        self._snapshot_signature = file_signature(self.snapshot_file)
+        self._journal_offset = 0
+        self._journal_records = 0
+
+    def load_matches(self):
+        with self._lock:
+            return list(self._all_matches().values())
+
+    def save_match(self, match, expected_version=None):
+        """Append one match to the journal and return the stored copy
+
+        A match without an id is given the next free one.
+        """
+        # A fresh copy, so player ids are resolved and written to the journal
+        stored = Match.from_dict(match)
+        with self._lock, file_lock(self.journal_file):
+            matches = self._all_matches()
+            if stored.id is None:
+                stored.id = max(matches, default=0) + 1
+            stored.version = check_version(matches.get(stored.id), expected_version) + 1
+
+            self._journal_offset = match_journal.append(stored, self.journal_file)
+            self._journal_records += 1
+            matches[stored.id] = stored
+            self._index.add(stored)
+            if self._journal_records >= match_journal.COMPACT_THRESHOLD:
+                self._compact()
+            return stored
+
+    def save_matches(self, matches):
+        matches = [as_match(match) for match in matches]
+        with self._lock, file_lock(self.journal_file):
+            self._matches = {match.id: match for match in matches}
+            self._index = PlayerMatchIndex(matches)
+            self._compact()
+
+    def add_matches(self, matches):
+        """Store a batch of new matches with a single write; returns the stored copies
+
+        Every match is given the next free id.
+        """
+        stored = [Match.from_dict(match) for match in matches]
+        with self._lock, file_lock(self.journal_file):
+            existing = self._all_matches()
+            for match_id, match in enumerate(stored, max(existing, default=0) + 1):
+                match.id, match.version = match_id, 1
+                existing[match_id] = match
+                self._index.add(match)
+            self._compact()
+        return stored
+
+    def get_match(self, match_id):
+        with self._lock:
+            return self._all_matches().get(match_id)
+
+    def query_matches(self, player=None, status=None, location=None,
+                      newest_first=False, limit=None, offset=0, after=None):
+        with self._lock:
+            matches = self._all_matches()
+            if location is None:
+                match_ids = self._index.match_ids(player, status, newest_first, limit, offset, after)
+                return [matches[match_id] for match_id in match_ids]
+            match_ids = self._index.match_ids(player, status, newest_first, after=after)
+            rows = [matches[match_id] for match_id in match_ids
+                    if matches[match_id].get('location') == location]
+        end = offset + limit if limit is not None else None
+        return rows[offset:end]
+
+    def count_matches(self, player=None, status=None, location=None):
+        with self._lock:
+            matches = self._all_matches()
+            if location is None:
+                return self._index.count(player, status)
+            return sum(1 for match_id in self._index.match_ids(player, status)
+                       if matches[match_id].get('location') == location)
+
+    def list_match_players(self):
+        with self._lock:
+            self._all_matches()
+            return self._index.players()
+
+
+class SqliteStorage:
+    """SQLite backend with indexed match queries"""
+
+    TABLES = """
+        CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY,
+            date TEXT,
+            status TEXT,
+            location TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS match_players (
+            match_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            player TEXT NOT NULL,
+            player_id INTEGER,
+            PRIMARY KEY (match_id, position)
+        );
+    """
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_match_players_player_id ON match_players (player_id, match_id);
+        CREATE INDEX IF NOT EXISTS idx_matches_status_date ON matches (status, date);
+        CREATE INDEX IF NOT EXISTS idx_matches_date ON matches (date);
+        CREATE INDEX IF NOT EXISTS idx_matches_location ON matches (location);
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        # Streamlit serves every session from its own thread; transactions
+        # are managed explicitly in _transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(self.TABLES)
+        self._add_player_ids()
+        self._conn.executescript(self.INDEXES)
+        self._import_json_if_empty()
+
+    def _add_player_ids(self):
+        """Upgrade databases created before matches referred to players by id"""
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(match_players)')]
+        if 'player_id' not in columns:
+            self._conn.execute('ALTER TABLE match_players ADD COLUMN player_id INTEGER')
+        self._conn.execute('DROP INDEX IF EXISTS idx_match_players_player')
+        if self._conn.execute('SELECT 1 FROM match_players WHERE player_id IS NULL LIMIT 1').fetchone():
+            # Decoding resolves each match's player names to ids
+            self.save_matches(self.load_matches())
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction holding the database write lock from the start"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _import_json_if_empty(self):
+        """Seed a fresh database from existing JSON data files"""
+        if self._conn.execute('SELECT 1 FROM matches LIMIT 1').fetchone():
+            return
+        if self._conn.execute('SELECT 1 FROM users LIMIT 1').fetchone():
+            return
+        json_storage = JsonStorage()
+        users = json_storage.load_users()
+        matches = json_storage.load_matches()
+        if users:
+            self.save_users(users)
+        if matches:
+            self.save_matches(matches)
+
+    def load_users(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT email, data FROM users').fetchall()
+        return {email: json.loads(data) for email, data in rows}
+
+    def save_users(self, users):
+        with self._transaction():
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO users (email, data) VALUES (?, ?)',
+                [(email, json.dumps(info)) for email, info in users.items()]
+            )
+            placeholders = ','.join('?' * len(users))
+            if users:
+                self._conn.execute(f'DELETE FROM users WHERE email NOT IN ({placeholders})', list(users))
+            else:
+                self._conn.execute('DELETE FROM users')
+
+    def update_user(self, email, info, expected_version=None):
+        """Write one user record; returns the current users map"""
+        with self._transaction():
+            row = self._conn.execute('SELECT data FROM users WHERE email = ?', (email,)).fetchone()
+            version = check_version(json.loads(row[0]) if row else None, expected_version)
+            self._conn.execute(
+                'INSERT OR REPLACE INTO users (email, data) VALUES (?, ?)',
+                (email, json.dumps(dict(info, version=version + 1)))
+            )
+        return self.load_users()
+
+    def update_users(self, changes):
+        """Change fields of many existing user records in one transaction
+
+        ``changes`` maps email to {field: value}; emails without a record are
+        skipped. Returns the current users map.
+        """
+        with self._transaction():
+            users = {email: json.loads(data)
+                     for email, data in self._conn.execute('SELECT email, data FROM users').fetchall()}
+            rows = []
+            for email, fields in changes.items():
+                if email in users:
+                    users[email] = dict(users[email], **fields, version=users[email].get('version', 0) + 1)
+                    rows.append((email, json.dumps(users[email])))
+            self._conn.executemany('INSERT OR REPLACE INTO users (email, data) VALUES (?, ?)', rows)
+        return users
+
+    def signature(self):
+        """Changes whenever any connection commits to the database"""
+        with self._lock:
+            return (self._conn.execute('PRAGMA data_version').fetchone()[0], self._conn.total_changes)
+
+    def _write_match(self, match):
+        match = as_match(match)
+        data = match_journal.encode_match(match)
+        self._conn.execute(
+            'INSERT OR REPLACE INTO matches (id, date, status, location, data) VALUES (?, ?, ?, ?, ?)',
+            (match['id'], data.get('date'), match.get('status'), match.get('location'), json.dumps(data))
+        )
+        self._conn.execute('DELETE FROM match_players WHERE match_id = ?', (match['id'],))
+        self._conn.executemany(
+            'INSERT INTO match_players (match_id, position, player, player_id) VALUES (?, ?, ?, ?)',
+            [(match.id, i, name, player_id)
+             for i, (name, player_id) in enumerate(zip(match.players, match.player_ids or ()))]
+        )
+
+    def _select(self, sql, params=()):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [Match.from_dict(match_journal.decode_match(json.loads(row[0]))) for row in rows]
+
+    def load_matches(self):
+        return self._select('SELECT data FROM matches ORDER BY id')
+
+    def save_match(self, match, expected_version=None):
+        """Insert or update one match and return the stored copy
+
+        A match without an id is given the next free one.
+        """
+        stored = Match.from_dict(match)
+        with self._transaction():
+            if stored.id is None:
+                stored.id = self._conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM matches').fetchone()[0]
+            row = self._conn.execute('SELECT data FROM matches WHERE id = ?', (stored.id,)).fetchone()
+            stored.version = check_version(json.loads(row[0]) if row else None, expected_version) + 1
+            self._write_match(stored)
+        return stored
+
+    def save_matches(self, matches):
+        with self._transaction():
+            self._conn.execute('DELETE FROM match_players')
+            self._conn.execute('DELETE FROM matches')
+            for match in matches:
+                self._write_match(match)
+
+    def add_matches(self, matches):
+        """Insert a batch of new matches in one transaction; returns the stored copies
+
+        Every match is given the next free id.
+        """
+        stored = [Match.from_dict(match) for match in matches]
+        with self._transaction():
+            next_id = self._conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM matches').fetchone()[0]
+            for match_id, match in enumerate(stored, next_id):
+                match.id, match.version = match_id, 1
+                self._write_match(match)
+        return stored
+
+    def get_match(self, match_id):
+        rows = self._select('SELECT data FROM matches WHERE id = ?', (match_id,))
+        return rows[0] if rows else None
+
+    def _where(self, player, status, location):
+        clauses, params = [], []
+        if player is not None:
+            clauses.append('id IN (SELECT match_id FROM match_players WHERE player_id = ?)')
+            params.append(player)
+        if status is not None:
+            clauses.append('status = ?')
+            params.append(status)
+        if location is not None:
+            clauses.append('location = ?')
+            params.append(location)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        return where, params
+
+    def query_matches(self, player=None, status=None, location=None,
+                      newest_first=False, limit=None, offset=0, after=None):
+        where, params = self._where(player, status, location)
+        if after is not None:
+            # Keyset cursor on (date, id) in the requested direction
+            op = '<' if newest_first else '>'
+            cursor_date = after[0].isoformat()
+            where += (' AND ' if where else ' WHERE ') + f'(date {op} ? OR (date = ? AND id {op} ?))'
+            params += [cursor_date, cursor_date, after[1]]
+        direction = 'DESC' if newest_first else 'ASC'
+        sql = f'SELECT data FROM matches{where} ORDER BY date {direction}, id {direction}'
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [limit, offset]
+        elif offset:
+            sql += ' LIMIT -1 OFFSET ?'
+            params.append(offset)
+        return self._select(sql, params)
+
+    def count_matches(self, player=None, status=None, location=None):
+        where, params = self._where(player, status, location)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM matches{where}', params).fetchone()[0]
+
+    def list_match_players(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT DISTINCT player_id FROM match_players ORDER BY player_id').fetchall()
+        return [row[0] for row in rows]
+
+
+BACKENDS = {
+    'json': JsonStorage,
+    'sqlite': lambda: SqliteStorage(os.environ.get('GOLF_DB_PATH', DB_FILE)),
+}
+
+
+def get_storage():
+    """Return the process-wide storage backend selected by GOLF_STORAGE"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            backend = os.environ.get('GOLF_STORAGE', 'json').lower()
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown storage backend: {backend}")
+            _storage = BACKENDS[backend]()
+        return _storage
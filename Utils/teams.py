@@ -0,0 +1,315 @@
+"""Teams, team-format matches and the materialized team standings.
+
+A team is a named pair of players from the player registry, kept in
+teams.json with a dense integer id the way players are. A team match is
+a match between two teams:
+
+- match['teams'] holds the two team ids, and match['player_ids'] the
+  players of the first team followed by those of the second, so player
+  filters and player statistics see everyone who played
+- match['team_scores'] holds one score per team. Scramble and Foursomes
+  play one ball per team, so only team scores are recorded; Best Ball
+  records every player's score and each team counts its better ball,
+  hole by hole when scorecards were entered
+
+Standings (3 points for a win, 1 for a tie) are updated once, when a team
+match is completed, and persisted to team_standings.json, so showing them
+costs O(teams) however many matches have been played. Writers go through
+editing(), like the player leaderboard, and swap in changed copies rather
+than editing records sessions may be reading. Rebuild them from match history
+(and report any drift) with:
+
+    python -m Utils.teams rebuild
+    python -m Utils.teams list
+"""
+import argparse
+import sys
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from Utils import scorecard
+from Utils.match_model import MatchFormat, as_match
+from Utils.persistence import atomic_write_json, file_lock, file_signature, read_json
+
+TEAMS_FILE = 'teams.json'
+STANDINGS_FILE = 'team_standings.json'
+
+TEAM_SIZE = 2
+TEAM_FORMATS = (MatchFormat.BEST_BALL.value, MatchFormat.SCRAMBLE.value, MatchFormat.FOURSOMES.value)
+# Formats with one ball, and so one score, per team
+ONE_BALL_FORMATS = (MatchFormat.SCRAMBLE.value, MatchFormat.FOURSOMES.value)
+
+WIN_POINTS = 3
+TIE_POINTS = 1
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class TeamRegistry:
+    """Team records indexed by id and name"""
+
+    def __init__(self, path=TEAMS_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._teams = []
+        self._by_name = {}
+        self._signature = None
+
+    def load(self):
+        with self._lock:
+            self._signature = file_signature(self.path)
+            self._replace(read_json(self.path, []))
+
+    def refresh(self):
+        """Reload if another process has rewritten the file"""
+        if file_signature(self.path) != self._signature:
+            self.load()
+
+    def save(self):
+        atomic_write_json(self.path, self._teams, indent=2)
+        self._signature = file_signature(self.path)
+
+    @contextmanager
+    def editing(self):
+        """Lock the file, pick up other writers' changes, then save on exit"""
+        with self._lock, file_lock(self.path):
+            self.refresh()
+            yield self
+            self.save()
+
+    def _replace(self, teams):
+        for team in teams:
+            team['name'] = sys.intern(team['name'])
+        self._teams = teams
+        self._by_name = {team['name']: team['id'] for team in teams}
+
+    def __len__(self):
+        return len(self._teams)
+
+    def get(self, team_id):
+        if team_id is None or team_id < 1:
+            return None
+        if team_id > len(self._teams):
+            # Possibly added by another process since the last load
+            self.refresh()
+            if team_id > len(self._teams):
+                return None
+        return self._teams[team_id - 1]
+
+    def name_of(self, team_id):
+        team = self.get(team_id)
+        return team['name'] if team else None
+
+    def id_of(self, name):
+        return self._by_name.get(name)
+
+    def all(self):
+        return list(self._teams)
+
+    def teams_of(self, player_id):
+        """Teams a player belongs to"""
+        return [team for team in self._teams if player_id in team['player_ids']]
+
+    def create(self, name, player_ids):
+        """Id of a new team; raises ValueError for a taken name or a wrong line-up"""
+        name = name.strip()
+        player_ids = list(dict.fromkeys(player_ids))
+        if not name:
+            raise ValueError("A team needs a name")
+        if len(player_ids) != TEAM_SIZE:
+            raise ValueError(f"A team has {TEAM_SIZE} different players")
+        with self.editing():
+            if name in self._by_name:
+                raise ValueError(f"There is already a team called {name}")
+            team = {'id': len(self._teams) + 1, 'name': sys.intern(name), 'player_ids': player_ids}
+            self._teams = self._teams + [team]
+            self._by_name = {**self._by_name, team['name']: team['id']}
+            return team['id']
+
+
+def get_team_registry():
+    """Return the process-wide team registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TeamRegistry()
+            _registry.load()
+        return _registry
+
+
+def is_team_match(match):
+    return match.get('teams') is not None
+
+def sides(match):
+    """Player ids of the first and of the second team of a team match"""
+    player_ids = list(match['player_ids'])
+    half = len(player_ids) // 2
+    return player_ids[:half], player_ids[half:]
+
+def opponent_scores(match, i):
+    """Scores the player at position ``i`` played against
+
+    In a team match those of the other team, otherwise everyone else's.
+    """
+    scores = match['scores']
+    if match.get('teams'):
+        half = len(scores) // 2
+        return scores[half:] if i < half else scores[:half]
+    return [s for j, s in enumerate(scores) if j != i]
+
+def best_ball(scores, scorecards=None):
+    """Team scores of a Best Ball match from each player's score
+
+    With a full scorecard each team counts its better ball on every hole;
+    otherwise the better of its players' totals.
+    """
+    half = len(scores) // 2
+    if scorecards is not None:
+        strokes = np.asarray(scorecards)[..., scorecard.STROKES]
+        if strokes.shape[0] == len(scores) and (strokes >= 0).all():
+            return [int(strokes[:half].min(axis=0).sum()), int(strokes[half:].min(axis=0).sum())]
+    return [min(scores[:half]), min(scores[half:])]
+
+def results(team_scores):
+    """'win', 'tie' or 'loss' for each team, lower score winning"""
+    first, second = team_scores
+    if first == second:
+        return ['tie', 'tie']
+    return ['win', 'loss'] if first < second else ['loss', 'win']
+
+
+def empty_record(team_id):
+    return {'team_id': team_id, 'points': 0, 'matches': 0, 'wins': 0, 'ties': 0, 'strokes': 0}
+
+def apply_match(records, match):
+    """Fold one completed team match into the records of its teams"""
+    if match.get('status') != 'Completed' or not is_team_match(match) or not match.get('team_scores'):
+        return
+    team_scores = match['team_scores']
+    for team_id, score, result in zip(match['teams'], team_scores, results(team_scores)):
+        record = records.setdefault(team_id, empty_record(team_id))
+        record['matches'] += 1
+        record['strokes'] += score
+        if result == 'win':
+            record['wins'] += 1
+            record['points'] += WIN_POINTS
+        elif result == 'tie':
+            record['ties'] += 1
+            record['points'] += TIE_POINTS
+
+def build(matches):
+    """Compute standings for every team from scratch"""
+    records = {}
+    for match in matches:
+        apply_match(records, as_match(match))
+    return records
+
+
+class TeamStandings:
+    """Persisted team standings keyed by team id"""
+
+    def __init__(self, path=STANDINGS_FILE):
+        self.path = path
+        self.records = {}
+        self._signature = None
+
+    def load(self):
+        self._signature = file_signature(self.path)
+        self.records = {record['team_id']: record for record in read_json(self.path, [])}
+
+    def refresh(self):
+        """Reload if another process has rewritten the file"""
+        if file_signature(self.path) != self._signature:
+            self.load()
+
+    def save(self):
+        atomic_write_json(self.path, list(self.records.values()), indent=2)
+        self._signature = file_signature(self.path)
+
+    @contextmanager
+    def editing(self):
+        """Lock the file, pick up other writers' changes, then save on exit"""
+        with file_lock(self.path):
+            self.refresh()
+            yield self
+            self.save()
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, team_id):
+        return self.records.get(team_id)
+
+    def record_match(self, match):
+        """Fold in a newly completed team match"""
+        with self.editing():
+            records = dict(self.records)
+            for team_id in match.get('teams') or ():
+                if team_id in records:
+                    records[team_id] = dict(records[team_id])
+            apply_match(records, match)
+            self.records = records
+
+    def rebuild(self, matches):
+        with file_lock(self.path):
+            self.records = build(matches)
+            self.save()
+
+    def ranked(self):
+        """Records by points, then wins, then fewest strokes per match"""
+        return sorted(
+            self.records.values(),
+            key=lambda record: (-record['points'], -record['wins'],
+                                record['strokes'] / record['matches'] if record['matches'] else 0, record['team_id'])
+        )
+
+
+def leaderboard_rows(standings, get_team, player_name):
+    """Rows of the team leaderboard, best team first"""
+    rows = []
+    for record in standings.ranked():
+        team = get_team(record['team_id'])
+        win_rate = (record['wins'] / record['matches']) * 100 if record['matches'] > 0 else 0
+        rows.append({
+            'Team': team['name'],
+            'Players': " & ".join(player_name(player_id) for player_id in team['player_ids']),
+            'Points': record['points'],
+            'Matches': record['matches'],
+            'Wins': record['wins'],
+            'Win Rate': f"{win_rate:.1f}%"
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage teams and the team standings")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('rebuild', help="recompute the standings from match history")
+    subcommands.add_parser('list', help="show teams and their standings")
+    args = parser.parse_args(argv)
+
+    registry = get_team_registry()
+    standings = TeamStandings()
+    standings.load()
+    if args.command == 'rebuild':
+        from Utils.match_archive import get_archive
+        from Utils.storage import get_storage
+        matches = get_archive().team_matches() + get_storage().query_matches(status='Completed')
+        expected = build(matches)
+        drift = sum(1 for team_id, record in expected.items() if standings.get(team_id) != record)
+        standings.rebuild(matches)
+        print(f"Rebuilt standings of {len(standings)} teams ({drift} differed)")
+    else:
+        for rank, record in enumerate(standings.ranked(), 1):
+            print(f"{rank}. {registry.name_of(record['team_id'])}: {record['points']} pts, "
+                  f"{record['wins']}-{record['ties']}-{record['matches'] - record['wins'] - record['ties']}")
+        for team in registry.all():
+            if standings.get(team['id']) is None:
+                print(f"-  {team['name']}: no matches")
+
+
+if __name__ == '__main__':
+    main()
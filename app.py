@@ -1,9 +1,17 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import json
 import os
+from datetime import datetime, timedelta
+
+from Utils.auth import get_credentials
+from Utils.instrumentation import timed
+from Utils.persistence import StaleWriteError
+from Utils.match_archive import get_archive
+from Utils.shared_store import get_store
+
+# Emails of the users allowed to open the Diagnostics page and bulk import rounds, comma-separated
+ADMINS = frozenset(email.strip() for email in os.environ.get('GOLF_ADMINS', '').split(',') if email.strip())
 
 # Page configuration
 st.set_page_config(
@@ -89,61 +97,295 @@ st.markdown("""
 # ---------------------------
 # Data persistence functions
 # ---------------------------
-def load_users():
+def seed_demo_data(store):
+    """Populate an empty install with demo users and matches"""
+    if not store.users:
+        users = {
+            'craig@portfreyly.co': {
+                'name': 'Craig Roberts',
+                'phone': '440-0034-5078',
+                'country': 'England',
+                'handicap': 16
+            },
+            'omkar@example.com': {
+                'name': 'Omkar Pol',
+                'phone': '440-1111-2222',
+                'country': 'India',
+                'handicap': 12
+            },
+            'mayank@example.com': {
+                'name': 'Mayank Rai',
+                'phone': '440-2222-3333',
+                'country': 'India',
+                'handicap': 14
+            },
+            'nitesh@example.com': {
+                'name': 'Nitesh Devadiga',
+                'phone': '440-3333-4444',
+                'country': 'India',
+                'handicap': 18
+            },
+            'dinesh@example.com': {
+                'name': 'Dinesh Rambade',
+                'phone': '440-4444-5555',
+                'country': 'India',
+                'handicap': 15
+            },
+            'mayank_s@example.com': {
+                'name': 'Mayank Saxena',
+                'phone': '440-5555-6666',
+                'country': 'India',
+                'handicap': 13
+            }
+        }
+        for email, info in users.items():
+            info['player_id'] = store.register_player(info['name'], email)
+        store.save_users(users)
+        get_credentials().set_many((email, 'password', info['player_id']) for email, info in users.items())
+        # Today's recompute ran before these players existed
+        store.recompute_handicaps(force=True)
+
+    if store.count_matches() == 0:
+        store.save_matches([
+            {
+                'id': 1,
+                'date': datetime.now() + timedelta(days=2),
+                'players': ['Craig Roberts', 'Omkar Pol'],
+                'status': 'Upcoming',
+                'location': 'Bombay Presidency Golf Club',
+                'handicap': 16,
+                'course_par': 72,
+                'format': 'Stroke Play'
+            },
+            {
+                'id': 2,
+                'date': datetime.now() - timedelta(days=5),
+                'players': ['Mayank Rai', 'Nitesh Devadiga'],
+                'status': 'Completed',
+                'location': 'Juhu Vile Parle Gymkhana Club',
+                'handicap': 12,
+                'course_par': 72,
+                'format': 'Stroke Play',
+                'scores': [72, 75],
+                'weather': 'Sunny',
+                'course_condition': 'Excellent'
+            }
+        ])
+
+    # One entry per player with an account, credited from the matches above
+    store.add_missing_leaderboard_entries()
+
+@timed()
+def get_leaderboard():
+    """Process-wide ranked leaderboard (read-only)"""
+    store = get_store()
+    store.sync()
+    return store.leaderboard
+
+def add_leaderboard_points(player_id, points):
+    """Add points and one played match to a player's leaderboard entry"""
+    try:
+        get_store().add_leaderboard_points(player_id, points)
+    except Exception as e:
+        st.error(f"Error saving leaderboard data: {e}")
+
+def add_leaderboard_entry(entry):
+    try:
+        get_store().add_leaderboard_entry(entry)
+    except Exception as e:
+        st.error(f"Error saving leaderboard data: {e}")
+
+def update_leaderboard_entry(player_id, **changes):
     try:
-        if os.path.exists('users.json'):
-            with open('users.json', 'r') as f:
-                return json.load(f)
-    except:
-        pass
-    return {}
+        get_store().update_leaderboard_entry(player_id, **changes)
+    except Exception as e:
+        st.error(f"Error saving leaderboard data: {e}")
+
+def get_teams(player_id=None):
+    """All teams, or the teams a player belongs to"""
+    store = get_store()
+    store.sync()
+    return store.teams.all() if player_id is None else store.teams.teams_of(player_id)
+
+def get_team(team_id):
+    """Team record with its name and player ids"""
+    return get_store().teams.get(team_id)
+
+def create_team(name, player_ids):
+    """Create a team of players; returns its id, or None if it could not be created"""
+    try:
+        return get_store().create_team(name, player_ids)
+    except ValueError as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f"Error saving team data: {e}")
+    return None
+
+def match_title(match):
+    """'A vs B' with the players of a match, or its teams for a team match"""
+    if 'teams' in match:
+        return " vs ".join(get_store().teams.name_of(team_id) or 'Team' for team_id in match['teams'])
+    return " vs ".join(match['players'][:2])
+
+@timed()
+def get_team_standings():
+    """Process-wide team standings (read-only)"""
+    store = get_store()
+    store.sync()
+    return store.team_standings
+
+def load_users():
+    """Read-only snapshot of all users"""
+    return get_store().users
 
 def save_users(users):
     try:
-        with open('users.json', 'w') as f:
-            json.dump(users, f, indent=2)
-    except:
-        st.error("Error saving user data")
+        get_store().save_users(users)
+    except Exception as e:
+        st.error(f"Error saving user data: {e}")
+
+def update_user(email, info, expected_version=None):
+    """Create or replace one user record; returns True if it was saved
+
+    Pass the ``version`` of the record as it was read to refuse overwriting
+    a change made in another session.
+    """
+    try:
+        get_store().update_user(email, info, expected_version)
+        return True
+    except StaleWriteError:
+        st.error("This profile was changed in another session. Reload the page and try again.")
+    except Exception as e:
+        st.error(f"Error saving user data: {e}")
+    return False
+
+def get_current_user():
+    """Record of the signed-in user"""
+    return get_store().get_user(st.session_state.current_user)
+
+def is_admin():
+    """Whether the signed-in user may open the Diagnostics page and bulk import rounds"""
+    return st.session_state.get('authenticated', False) and st.session_state.get('current_user') in ADMINS
+
+def get_players():
+    """Every player in the registry, accounts or not"""
+    return get_store().registry.all()
+
+def player_name(player_id):
+    """Current display name of a player"""
+    return get_store().registry.name_of(player_id)
+
+def find_player_id(name):
+    """Id of a player by current or previous name, adding a player without an account if new"""
+    return get_store().registry.resolve(name)
+
+def rename_player(player_id, name):
+    try:
+        get_store().rename_player(player_id, name)
+    except Exception as e:
+        st.error(f"Error saving player data: {e}")
 
+@timed()
 def load_matches():
     try:
-        if os.path.exists('matches.json'):
-            with open('matches.json', 'r') as f:
-                matches_data = json.load(f)
-                for match in matches_data:
-                    if 'date' in match:
-                        match['date'] = datetime.fromisoformat(match['date'])
-                    if 'created_date' in match:
-                        match['created_date'] = datetime.fromisoformat(match['created_date'])
-                    if 'completed_date' in match:
-                        match['completed_date'] = datetime.fromisoformat(match['completed_date'])
-                return matches_data
-    except:
-        pass
+        return get_store().load_matches()
+    except Exception as e:
+        st.error(f"Error loading match data: {e}")
     return []
 
+@timed()
+def save_match(match, expected_version=None):
+    """Persist one created or updated match; returns the stored match or None
+
+    New matches (``id`` None) are given an id when saved. Pass the
+    ``version`` of the match as it was read to refuse overwriting a change
+    made in another session.
+    """
+    try:
+        return get_store().save_match(match, expected_version)
+    except StaleWriteError:
+        st.error("This match was changed in another session. Reload the page and try again.")
+    except Exception as e:
+        st.error(f"Error saving match data: {e}")
+    return None
+
+@timed()
 def save_matches(matches):
+    """Replace all stored matches"""
     try:
-        matches_data = []
-        for match in matches:
-            match_copy = match.copy()
-            if 'date' in match_copy:
-                match_copy['date'] = match_copy['date'].isoformat()
-            if 'created_date' in match_copy:
-                match_copy['created_date'] = match_copy['created_date'].isoformat()
-            if 'completed_date' in match_copy:
-                match_copy['completed_date'] = match_copy['completed_date'].isoformat()
-            matches_data.append(match_copy)
-        
-        with open('matches.json', 'w') as f:
-            json.dump(matches_data, f, indent=2)
-    except:
-        st.error("Error saving match data")
+        get_store().save_matches(matches)
+    except Exception as e:
+        st.error(f"Error saving match data: {e}")
+
+@timed()
+def query_matches(player=None, status=None, location=None, newest_first=False, limit=None, offset=0, after=None):
+    """Fetch only the matches a page renders, ordered by date
+
+    ``player`` is a player id.
+    ``after`` is a (date, id) cursor taken from the last match of the
+    previous page.
+    """
+    return get_store().query_matches(player, status, location, newest_first, limit, offset, after)
+
+@timed()
+def count_matches(player=None, status=None, location=None):
+    """Count matches matching the given filters"""
+    return get_store().count_matches(player, status, location)
+
+@timed()
+def list_match_players():
+    """Ids of all players that appear in any match"""
+    return get_store().list_match_players()
+
+@timed()
+def get_player_stats(player_id):
+    """Aggregated statistics for one player, including archived seasons"""
+    from Utils.analytics import player_statistics
+    return player_statistics(player_id, data_version())
+
+@timed()
+def get_player_rounds(player_id):
+    """One player's completed rounds from live matches and archived seasons"""
+    from Utils.analytics import all_player_rounds
+    return all_player_rounds(get_store(), get_archive(), player_id)
+
+@timed()
+def get_player_scorecards(player_id):
+    """(cards, pars, dates) of a player's hole-by-hole scorecards, see Utils.scorecard"""
+    from Utils import scorecard
+    from Utils.course_catalog import get_catalog
+    return scorecard.player_cards(query_matches(player=player_id, status='Completed'), player_id, get_catalog())
+
+def get_handicap_index(player_id):
+    """Calculated handicap index, or None until the player has 3 scored rounds"""
+    store = get_store()
+    store.sync()
+    return store.handicaps.get(player_id)
+
+@timed()
+def get_handicap_history(player_id, days):
+    """Handicap index in effect on each of ``days`` (None before the first)"""
+    store = get_store()
+    store.sync()
+    return store.handicaps.index_on(player_id, days)
+
+@timed()
+def get_rounds_frame():
+    """Columnar frame of completed rounds for vectorized analytics"""
+    return get_store().rounds_frame()
+
+@timed()
+def data_version():
+    """Counter bumped on every write, for keying derived caches"""
+    store = get_store()
+    store.sync()
+    return store.version
 
 
 # ---------------------------
 # Initialize session state
 # ---------------------------
+@timed()
 def initialize_session_state():
     if 'authenticated' not in st.session_state:
         st.session_state.authenticated = False
@@ -152,127 +394,70 @@ def initialize_session_state():
     if 'redirected_after_login' not in st.session_state:
         st.session_state.redirected_after_login = False
 
-    # Load persistent data
-    if 'users' not in st.session_state:
-        st.session_state.users = load_users()
-
-        if not st.session_state.users:
-            st.session_state.users = {
-                'craig@portfreyly.co': {
-                    'name': 'Craig Roberts',
-                    'phone': '440-0034-5078',
-                    'country': 'England',
-                    'handicap': 16,
-                    'password': 'password'
-                },
-                'omkar@example.com': {
-                    'name': 'Omkar Pol',
-                    'phone': '440-1111-2222',
-                    'country': 'India',
-                    'handicap': 12,
-                    'password': 'password'
-                },
-                'mayank@example.com': {
-                    'name': 'Mayank Rai',
-                    'phone': '440-2222-3333',
-                    'country': 'India',
-                    'handicap': 14,
-                    'password': 'password'
-                },
-                'nitesh@example.com': {
-                    'name': 'Nitesh Devadiga',
-                    'phone': '440-3333-4444',
-                    'country': 'India',
-                    'handicap': 18,
-                    'password': 'password'
-                },
-                'dinesh@example.com': {
-                    'name': 'Dinesh Rambade',
-                    'phone': '440-4444-5555',
-                    'country': 'India',
-                    'handicap': 15,
-                    'password': 'password'
-                },
-                'mayank_s@example.com': {
-                    'name': 'Mayank Saxena',
-                    'phone': '440-5555-6666',
-                    'country': 'India',
-                    'handicap': 13,
-                    'password': 'password'
-                }
-            }
-            save_users(st.session_state.users)
-
-    if 'matches' not in st.session_state:
-        st.session_state.matches = load_matches()
-
-        if not st.session_state.matches:
-            st.session_state.matches = [
-                {
-                    'id': 1,
-                    'date': datetime.now() + timedelta(days=2),
-                    'players': ['Craig Roberts', 'Omkar Pol'],
-                    'status': 'Upcoming',
-                    'location': 'Bombay Presidency Golf Club',
-                    'handicap': 16,
-                    'course_par': 72,
-                    'format': 'Stroke Play'
-                },
-                {
-                    'id': 2,
-                    'date': datetime.now() - timedelta(days=5),
-                    'players': ['Mayank Rai', 'Nitesh Devadiga'],
-                    'status': 'Completed',
-                    'location': 'Juhu Vile Parle Gymkhana Club',
-                    'handicap': 12,
-                    'course_par': 72,
-                    'format': 'Stroke Play',
-                    'scores': [72, 75],
-                    'weather': 'Sunny',
-                    'course_condition': 'Excellent'
-                }
-            ]
-            save_matches(st.session_state.matches)
-
-    if 'leaderboard' not in st.session_state:
-        st.session_state.leaderboard = [
-            {'name': 'Craig Roberts', 'handicap': 16, 'points': 120, 'matches_played': 8},
-            {'name': 'Omkar Pol', 'handicap': 12, 'points': 115, 'matches_played': 7},
-            {'name': 'Mayank Rai', 'handicap': 14, 'points': 110, 'matches_played': 6},
-            {'name': 'Nitesh Devadiga', 'handicap': 18, 'points': 105, 'matches_played': 5},
-            {'name': 'Dinesh Rambade', 'handicap': 15, 'points': 95, 'matches_played': 5},
-            {'name': 'Mayank Saxena', 'handicap': 13, 'points': 90, 'matches_played': 4}
-        ]
+    # Demo data for a fresh install. Anything else leaves the shared store
+    # (every user and match) unloaded until after login
+    if 'data_seeded' not in st.session_state:
+        if not len(get_credentials()):
+            seed_demo_data(get_store())
+        st.session_state.data_seeded = True
 
 
 # ---------------------------
 # Authentication
 # ---------------------------
+@timed()
 def authenticate_user(email, password):
-    if email in st.session_state.users and st.session_state.users[email]['password'] == password:
-        st.session_state.authenticated = True
-        st.session_state.current_user = email
-        return True
-    return False
+    # Only the credential index is read; match data loads after login
+    if not get_credentials().verify(email, password):
+        return False
+    st.session_state.authenticated = True
+    st.session_state.current_user = email
+    return True
+
+def change_password(email, current_password, new_password):
+    """Replace a user's password
+
+    Returns True once changed, False if the current password is wrong and
+    None if the new one could not be saved.
+    """
+    credentials = get_credentials()
+    if not credentials.verify(email, current_password):
+        return False
+    try:
+        credentials.set(email, new_password, credentials.player_id(email))
+    except Exception as e:
+        st.error(f"Error saving credentials: {e}")
+        return None
+    return True
 
+@timed()
 def register_user(email, name, phone, country, handicap, password):
-    if email not in st.session_state.users:
-        st.session_state.users[email] = {
-            'name': name,
-            'phone': phone,
-            'country': country,
-            'handicap': handicap,
-            'password': password
-        }
-        st.session_state.leaderboard.append({
-            'name': name,
-            'handicap': handicap,
-            'points': 0,
-            'matches_played': 0
-        })
-        save_users(st.session_state.users)
-        return True
-    return False
+    if email in get_credentials():
+        return False
+    store = get_store()
+    if store.get_user(email) is not None:
+        return False
+    info = {'name': name, 'phone': phone, 'country': country, 'handicap': handicap}
+    try:
+        # Version 0 means "must not exist yet", so a concurrent signup with
+        # the same email cannot overwrite this one
+        store.update_user(email, info, expected_version=0)
+    except StaleWriteError:
+        return False
+    # Register the player only once the email is ours, so a failed signup
+    # leaves no player behind. The registry hands out one id per email, so
+    # a registry migration running in between assigns this same id.
+    player_id = store.register_player(name, email)
+    store.update_user(email, dict(info, player_id=player_id))
+    get_credentials().set(email, password, player_id)
+    add_leaderboard_entry({
+        'player_id': player_id,
+        'name': name,
+        'handicap': handicap,
+        'points': 0,
+        'matches_played': 0
+    })
+    return True
 
 
 # ---------------------------
@@ -323,19 +508,19 @@ def show_auth_page():
 # ---------------------------
 # Sidebar + Main app shell
 # ---------------------------
+@timed()
 def main_app():
     st.sidebar.title("⛳ Golf Match Manager")
 
-    user_info = st.session_state.users[st.session_state.current_user]
+    user_info = get_current_user()
     st.sidebar.markdown(f"**Welcome, {user_info['name']}**")
     st.sidebar.markdown(f"**Handicap:** {user_info['handicap']}")
 
     st.sidebar.markdown("---")
     st.sidebar.subheader("Quick Stats")
 
-    user_matches = [m for m in st.session_state.matches if user_info['name'] in m.get('players', [])]
-    upcoming_count = len([m for m in user_matches if m['status'] == 'Upcoming'])
-    completed_count = len([m for m in user_matches if m['status'] == 'Completed'])
+    upcoming_count = count_matches(player=user_info['player_id'], status='Upcoming')
+    completed_count = count_matches(player=user_info['player_id'], status='Completed')
 
     st.sidebar.markdown(f"**Upcoming Matches:** {upcoming_count}")
     st.sidebar.markdown(f"**Completed Matches:** {completed_count}")
@@ -351,6 +536,7 @@ def main_app():
 # ---------------------------
 # Main controller
 # ---------------------------
+@timed()
 def main():
     initialize_session_state()
 
@@ -0,0 +1,74 @@
+"""Time the player dashboard analytics with and without the version-keyed cache.
+
+Imports N synthetic matches into an empty data directory, then renders the
+Home analytics of a few players R times each, the way reruns and tab
+switches do: once by calling Utils.analytics.dashboard(load_player_data())
+directly, and once through the cached player_dashboard(). A write between
+rounds of reruns bumps the data version, so the cached run recomputes once
+per player after it.
+
+    python -m benchmarks.analytics_cache --matches 20000 --reruns 20
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bulk_import import write_csv
+
+
+def run(count, players, reruns):
+    with tempfile.TemporaryDirectory() as directory:
+        write_csv(os.path.join(directory, 'rounds.csv'), count)
+        # The stores keep their files in the working directory
+        os.chdir(directory)
+        from Utils import analytics
+        from Utils.match_import import import_csv
+        from Utils.shared_store import get_store
+        with open('rounds.csv', newline='') as f:
+            import_csv(f)
+
+        store = get_store()
+        player_ids = sorted(int(player_id) for player_id in store.player_stats.aggregates)[:players]
+        today = datetime.now().date()
+
+        def render(function):
+            began = time.perf_counter()
+            for rerun in range(reruns):
+                if rerun == reruns // 2:
+                    # Any write (here a no-op rename) bumps the data version
+                    store.rename_player(player_ids[0], store.registry.name_of(player_ids[0]))
+                for player_id in player_ids:
+                    function(player_id, store.version)
+            return time.perf_counter() - began
+
+        uncached_s = render(lambda player_id, version: analytics.dashboard(
+            analytics.load_player_data(player_id, today), 72))
+        analytics.player_dashboard.cache.clear()
+        cached_s = render(lambda player_id, version: analytics.player_dashboard(player_id, version, today, 72))
+        info = analytics.player_dashboard.cache.info()
+
+    calls = players * reruns
+    return {
+        'matches': count,
+        'players': players,
+        'reruns': reruns,
+        'uncached_ms_per_render': round(uncached_s / calls * 1000, 2),
+        'cached_ms_per_render': round(cached_s / calls * 1000, 2),
+        'hit_rate': round(info['hits'] / (info['hits'] + info['misses']), 3),
+        'speedup': round(uncached_s / cached_s, 1)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cached player analytics")
+    parser.add_argument('--matches', type=int, default=20_000)
+    parser.add_argument('--players', type=int, default=10)
+    parser.add_argument('--reruns', type=int, default=20)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.matches, args.players, args.reruns), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Time a bulk CSV import of historical rounds into an empty data directory.
+
+Writes N synthetic matches as one CSV row per round, then imports the file
+with Utils.match_import (backend from GOLF_STORAGE) and reports rows/s.
+
+    python -m benchmarks.bulk_import --matches 10000
+    GOLF_STORAGE=sqlite python -m benchmarks.bulk_import
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+
+from benchmarks.snapshot_load import synthetic_matches
+
+COLUMNS = ['match', 'date', 'course', 'course_par', 'player', 'score',
+           'total_putts', 'fairways_hit', 'greens_in_regulation']
+
+
+def write_csv(path, count):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for match in synthetic_matches(count):
+            for player, score in zip(match['players'], match['scores']):
+                stats = match['player_stats'][player]
+                writer.writerow([match['id'], match['date'].isoformat(), match['location'], match['course_par'],
+                                 player, score, stats['total_putts'], stats['fairways_hit'],
+                                 stats['greens_in_regulation']])
+
+def run(count):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rounds.csv')
+        write_csv(path, count)
+        # The stores keep their files in the working directory
+        os.chdir(directory)
+        from Utils.match_import import import_csv
+        with open(path, newline='') as f:
+            first = import_csv(f)
+        with open(path, newline='') as f:
+            again = import_csv(f, dry_run=True)
+    return {
+        'backend': os.environ.get('GOLF_STORAGE', 'json'),
+        'rows': first.rows,
+        'matches': first.matches,
+        'errors': len(first.errors),
+        'import_s': round(first.seconds, 3),
+        'rows_per_s': round(first.rows_per_second),
+        'reimport_duplicates': again.duplicates,
+        'reimport_rows_per_s': round(again.rows_per_second)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the bulk CSV importer")
+    parser.add_argument('--matches', type=int, default=10_000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.matches), indent=2))
+
+
+if __name__ == '__main__':
+    main()
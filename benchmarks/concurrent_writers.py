@@ -0,0 +1,133 @@
+"""Stress test for the persistence layer with N concurrent writer processes.
+
+Every writer appends matches and increments a shared counter on one user
+record with optimistic retries. At the end the data files must parse, every
+match must be present exactly once and the counter must equal the number of
+increments, i.e. no update was lost.
+
+    python -m benchmarks.concurrent_writers --writers 8 --ops 200
+    python -m benchmarks.concurrent_writers --backend sqlite
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from Utils import match_journal
+from Utils.persistence import StaleWriteError
+from Utils.storage import JsonStorage, SqliteStorage
+
+COUNTER_USER = 'counter@example.com'
+
+
+def open_storage(backend, directory):
+    if backend == 'sqlite':
+        return SqliteStorage(os.path.join(directory, 'golf.db'))
+    return JsonStorage(
+        os.path.join(directory, 'users.json'),
+        os.path.join(directory, 'matches.json'),
+        os.path.join(directory, 'matches.journal')
+    )
+
+def increment_counter(storage):
+    """Read-modify-write the shared counter; returns the number of conflicts"""
+    conflicts = 0
+    while True:
+        record = storage.load_users()[COUNTER_USER]
+        try:
+            storage.update_user(COUNTER_USER, dict(record, count=record['count'] + 1),
+                                expected_version=record['version'])
+            return conflicts
+        except StaleWriteError:
+            conflicts += 1
+
+def writer(backend, directory, compact_every, writer_id, ops, start, results):
+    match_journal.COMPACT_THRESHOLD = compact_every
+    storage = open_storage(backend, directory)
+    start.wait()
+
+    conflicts = 0
+    began = time.perf_counter()
+    for i in range(ops):
+        storage.save_match({
+            'id': None,
+            'date': datetime.now(),
+            'players': [f'Writer {writer_id}', 'Opponent'],
+            'status': 'Completed',
+            'location': 'Bombay Presidency Golf Club',
+            'course_par': 72,
+            'scores': [72 + i % 10, 75],
+            'writer': writer_id,
+            'seq': i
+        })
+        conflicts += increment_counter(storage)
+    results.put((writer_id, time.perf_counter() - began, conflicts))
+
+def verify(storage, writers, ops):
+    """List of problems found in the final data (empty if none)"""
+    problems = []
+    matches = storage.load_matches()
+    written = {(m['writer'], m['seq']) for m in matches}
+    if len(matches) != writers * ops or len(written) != writers * ops:
+        problems.append(f"expected {writers * ops} matches, found {len(matches)} ({len(written)} distinct)")
+    if len({m['id'] for m in matches}) != len(matches):
+        problems.append("duplicate match ids")
+    count = storage.load_users()[COUNTER_USER]['count']
+    if count != writers * ops:
+        problems.append(f"counter is {count}, expected {writers * ops}: lost updates")
+    return problems
+
+def run(backend='json', writers=8, ops=200, compact_every=100):
+    with tempfile.TemporaryDirectory() as directory:
+        setup = open_storage(backend, directory)
+        setup.save_users({COUNTER_USER: {'name': 'Counter', 'count': 0, 'version': 0}})
+
+        ctx = multiprocessing.get_context('spawn')
+        start = ctx.Event()
+        results = ctx.Queue()
+        processes = [
+            ctx.Process(target=writer, args=(backend, directory, compact_every, i, ops, start, results))
+            for i in range(writers)
+        ]
+        for process in processes:
+            process.start()
+        began = time.perf_counter()
+        start.set()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - began
+
+        # A fresh instance reads everything back from disk
+        problems = verify(open_storage(backend, directory), writers, ops)
+
+    total_ops = writers * ops * 2
+    return {
+        'backend': backend,
+        'writers': writers,
+        'ops_per_writer': ops,
+        'seconds': round(elapsed, 3),
+        'ops_per_sec': round(total_ops / elapsed, 1),
+        'version_conflicts': sum(conflicts for _, _, conflicts in reports),
+        'problems': problems
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run N concurrent writers against a storage backend")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=200, help="matches (and counter increments) per writer")
+    parser.add_argument('--compact-every', type=int, default=100,
+                        help="journal records between compactions (json backend)")
+    args = parser.parse_args(argv)
+
+    report = run(args.backend, args.writers, args.ops, args.compact_every)
+    print(json.dumps(report, indent=2))
+    return 1 if report['problems'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,44 @@
+"""Time Ground Details distance queries against a cached course geometry.
+
+    python -m benchmarks.course_distances --repeat 100000
+"""
+import argparse
+import json
+import time
+
+from Utils.course_catalog import DEFAULT_COURSES, default_course
+from Utils.course_geometry import CourseGeometry
+
+
+def per_call(function, repeat):
+    """Microseconds per call"""
+    began = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return round((time.perf_counter() - began) / repeat * 1e6, 2)
+
+def run(repeat):
+    course = default_course(DEFAULT_COURSES[0][0])
+    began = time.perf_counter()
+    geometry = CourseGeometry(course)
+    build = time.perf_counter() - began
+
+    point = geometry.point_on_hole(5, 180)
+    return {
+        'course': course.name,
+        'build_ms': round(build * 1e3, 3),
+        'tee_to_green_us': per_call(lambda: geometry.tee_to_green(3, 7), repeat),
+        'to_green_us': per_call(lambda: geometry.to_green(5, point), repeat),
+        'nearest_hazard_us': per_call(lambda: geometry.nearest_hazard(5, point), repeat),
+        'advance_us': per_call(lambda: geometry.advance(point, 5, 150), repeat)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark course distance queries")
+    parser.add_argument('--repeat', type=int, default=100_000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
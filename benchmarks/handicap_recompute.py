@@ -0,0 +1,80 @@
+"""Time a full handicap index recompute, from the rounds to the published indexes.
+
+For each size a synthetic league (benchmarks.league) is generated in an
+empty temporary directory. Every user's and leaderboard entry's handicap is
+then moved off its index, so the recompute has to publish every index as on
+the first recompute after an upgrade. A fresh interpreter then times
+store.recompute_handicaps(force=True) from start to finish: building the
+rounds frame, compute(), and writing the users, the leaderboard and
+handicaps.json. compute() on its own is reported alongside.
+
+    python -m benchmarks.handicap_recompute --matches 4000 --players 2000
+    GOLF_STORAGE=sqlite python -m benchmarks.handicap_recompute --matches 100000 --players 2000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+
+def generate_league(directory, count, players):
+    os.chdir(directory)
+    from benchmarks.league import generate
+    from Utils.shared_store import get_store
+    generate(count, players, records=0)
+    store = get_store()
+    store.save_users({email: dict(info, handicap=info['handicap'] + 1) for email, info in store.users.items()})
+    store.save_leaderboard([dict(entry, handicap=entry['handicap'] + 1) for entry in store.leaderboard.page()])
+
+def recompute(directory):
+    """Timings of the first forced recompute in a fresh server process in ``directory``"""
+    os.chdir(directory)
+    from Utils.course_catalog import get_catalog
+    from Utils.handicap import compute
+    from Utils.shared_store import get_store
+    store = get_store()
+    users = store.users
+    began = time.perf_counter()
+    current = store.recompute_handicaps(force=True)
+    elapsed = time.perf_counter() - began
+    published = sum(1 for email, info in store.users.items() if info['handicap'] != users[email]['handicap'])
+
+    rounds = store.rounds_frame()
+    began = time.perf_counter()
+    compute(rounds, get_catalog())
+    return elapsed, time.perf_counter() - began, len(rounds), len(current), published
+
+def run(sizes, players):
+    results = []
+    # Every step gets its own interpreter: the stores are process-wide singletons
+    context = multiprocessing.get_context('spawn')
+    for count in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            with context.Pool(1) as pool:
+                pool.apply(generate_league, (directory, count, players))
+            with context.Pool(1) as pool:
+                elapsed, compute_s, rounds, indexes, published = pool.apply(recompute, (directory,))
+        results.append({
+            'storage': os.environ.get('GOLF_STORAGE', 'json'),
+            'matches': count,
+            'players': players,
+            'rounds': rounds,
+            'indexes': indexes,
+            'users_updated': published,
+            'recompute_s': round(elapsed, 3),
+            'compute_only_s': round(compute_s, 3)
+        })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the handicap index recompute")
+    parser.add_argument('--matches', type=int, nargs='+', default=[4_000, 100_000])
+    parser.add_argument('--players', type=int, default=2_000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.matches, args.players), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Cost of a @timed() call with span recording off and on.
+
+    python -m benchmarks.instrumentation_overhead --calls 1000000
+"""
+import argparse
+import json
+import time
+
+from Utils import instrumentation
+
+
+def per_call_ns(function, calls):
+    began = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return round((time.perf_counter() - began) / calls * 1e9, 1)
+
+def run(calls):
+    def plain():
+        return None
+    wrapped = instrumentation.timed('plain')(plain)
+
+    instrumentation.set_enabled(False)
+    baseline_ns = per_call_ns(plain, calls)
+    off_ns = per_call_ns(wrapped, calls)
+    instrumentation.set_enabled(True)
+    # Recording is much slower; fewer calls keep the run short
+    on_ns = per_call_ns(wrapped, max(1, calls // 100))
+    instrumentation.set_enabled(False)
+    instrumentation.clear()
+    return {
+        'calls': calls,
+        'plain_ns': baseline_ns,
+        'disabled_ns': off_ns,
+        'enabled_ns': on_ns,
+        'disabled_overhead_ns': round(off_ns - baseline_ns, 1)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the span instrumentation overhead")
+    parser.add_argument('--calls', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.calls), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""Synthetic league at a configurable scale, written through the real stores.
+
+Creates, in the working directory (or --out), everything a running app
+reads: user accounts and their credentials, the player registry, teams,
+N matches (mostly completed Stroke Play rounds, some with hole-by-hole
+scorecards, some Best Ball team matches and a few upcoming ones), the
+leaderboard, player statistics, team standings, handicap indexes and a
+match_records.csv of Match Details rows. The data is random but seeded, so two runs with the
+same arguments produce the same league.
+
+    python -m benchmarks.league --matches 100000 --out /tmp/league
+    GOLF_STORAGE=sqlite python -m benchmarks.league --matches 1000000 --players 1000 --out /tmp/league
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.scorecard_analytics import synthetic_cards
+from benchmarks.snapshot_load import COURSES
+from Utils import match_records, scorecard
+from Utils.auth import get_credentials
+from Utils.leaderboard import match_points
+from Utils.shared_store import get_store
+from Utils.teams import best_ball
+
+FIRST_NAMES = ['Craig', 'Omkar', 'Mayank', 'Nitesh', 'Dinesh', 'Priya', 'Anita', 'Rahul', 'Sara', 'James',
+               'Aditi', 'Vikram', 'Emma', 'Rohan', 'Meera', 'Tom', 'Kiran', 'Neha', 'Arjun', 'Lucy']
+LAST_NAMES = ['Roberts', 'Pol', 'Rai', 'Devadiga', 'Rambade', 'Saxena', 'Shah', 'Iyer', 'Patel', 'Clarke',
+              'Menon', 'Khan', 'Hughes', 'Nair', 'Joshi', 'Brown', 'Rao', 'Gupta', 'Das', 'Wilson']
+COUNTRIES = ['India', 'England', 'United States', 'Australia']
+MATCH_TYPES = ['Friendly', 'Tournament', 'Practice']
+
+# Share of matches of each kind
+TEAM_SHARE = 0.1
+UPCOMING_SHARE = 0.02
+SCORECARD_SHARE = 0.2
+# Completed matches are spread over this many days up to ``end``
+HISTORY_DAYS = 5 * 365
+# Every account's password is 'password', hashed cheaply so large leagues
+# generate quickly; a login rehashes it at the configured cost
+KDF_ITERATIONS = 1_000
+
+
+def player_names(count):
+    """``count`` distinct 'First Last' names"""
+    names = [f"{first} {last}" for last in LAST_NAMES for first in FIRST_NAMES]
+    return [names[i % len(names)] + (f" {i // len(names) + 1}" if i >= len(names) else '') for i in range(count)]
+
+def league_matches(count, player_ids, teams, end, seed=0):
+    """Match dicts of the league, without ids"""
+    rng = random.Random(seed)
+    names = {player_id: name for name, player_id in player_ids.items()}
+    ids = list(names)
+    carded = [rng.random() < SCORECARD_SHARE for _ in range(count)]
+    cards, _ = synthetic_cards(2 * sum(carded), seed)
+    step = timedelta(days=HISTORY_DAYS) / max(count, 1)
+    next_card = 0
+    for i in range(count):
+        upcoming = rng.random() < UPCOMING_SHARE
+        date = end + timedelta(days=rng.randint(1, 30)) if upcoming else end - (count - i) * step
+        match = {
+            'date': date.replace(microsecond=0),
+            'status': 'Upcoming' if upcoming else 'Completed',
+            'location': rng.choice(COURSES),
+            'handicap': rng.randint(0, 36),
+            'course_par': 72,
+            'created_by': 'craig@example.com',
+            'created_date': date.replace(microsecond=0) - timedelta(days=7)
+        }
+        if teams and rng.random() < TEAM_SHARE:
+            pair = rng.sample(teams, 2)
+            match['teams'] = [team['id'] for team in pair]
+            match['player_ids'] = pair[0]['player_ids'] + pair[1]['player_ids']
+            match['format'] = 'Best Ball'
+        else:
+            match['player_ids'] = rng.sample(ids, 2)
+            match['format'] = 'Stroke Play'
+        match['players'] = [names[player_id] for player_id in match['player_ids']]
+        if upcoming:
+            yield match
+            continue
+
+        if carded[i] and 'teams' not in match:
+            match['scorecards'] = cards[next_card:next_card + 2]
+            next_card += 2
+            match['player_stats'] = {name: scorecard.totals(card) for name, card in zip(match['players'], match['scorecards'])}
+            match['scores'] = [stats.pop('score') for stats in match['player_stats'].values()]
+        else:
+            match['scores'] = [rng.randint(68, 100) for _ in match['player_ids']]
+            match['player_stats'] = {
+                name: {
+                    'fairways_hit': rng.randint(30, 90),
+                    'greens_in_regulation': rng.randint(20, 80),
+                    'total_putts': rng.randint(25, 40)
+                }
+                for name in match['players']
+            }
+        if 'teams' in match:
+            match['team_scores'] = best_ball(match['scores'])
+        match['weather'] = rng.choice(['Sunny', 'Cloudy', 'Windy'])
+        match['course_condition'] = 'Good'
+        match['completed_date'] = match['date'] + timedelta(hours=5)
+        yield match
+
+def write_records(path, count, names, end, seed=0):
+    """Match Details rows of random head-to-head rounds"""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=match_records.COLUMNS)
+        writer.writeheader()
+        for _ in range(count):
+            user, opponent = rng.sample(names, 2)
+            date = end - timedelta(days=rng.randint(1, HISTORY_DAYS))
+            writer.writerow({
+                "User": user, "User Score": rng.randint(68, 100), "Opponent": opponent,
+                "Opponent Handicap": rng.randint(0, 36), "Opponent Score": rng.randint(68, 100),
+                "Ground": rng.choice(COURSES), "Match Type": rng.choice(MATCH_TYPES),
+                "Match Date": date.strftime('%Y-%m-%d'), "Match Time": f"{rng.randint(6, 17):02d}:00",
+                "Notes": ''
+            })
+
+def generate(matches, players=200, records=10_000, end=None, seed=0):
+    """Write a league into the working directory; returns what was created and how long it took"""
+    began = time.perf_counter()
+    end = end or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rng = random.Random(seed)
+    store = get_store()
+
+    users, player_ids = {}, {}
+    for i, name in enumerate(player_names(players)):
+        email = f"player{i + 1}@example.com"
+        player_ids[name] = store.register_player(name, email)
+        users[email] = {
+            'name': name,
+            'phone': f"440-{rng.randint(0, 9999):04d}-{rng.randint(0, 9999):04d}",
+            'country': rng.choice(COUNTRIES),
+            'handicap': rng.randint(0, 36),
+            'player_id': player_ids[name]
+        }
+    store.save_users(users)
+    get_credentials().set_many(((email, 'password', info['player_id']) for email, info in users.items()), KDF_ITERATIONS)
+
+    # Half of the players pair up into teams
+    ids = list(player_ids.values())
+    for number in range(1, len(ids) // 4 + 1):
+        store.create_team(f"Team {number}", ids[2 * number - 2:2 * number])
+    teams = store.teams.all()
+
+    history = list(league_matches(matches, player_ids, teams, end, seed))
+    for match_id, match in enumerate(history, 1):
+        match['id'] = match_id
+    store.save_matches(history)
+
+    credit = {player_id: [0, 0] for player_id in ids}
+    for match in history:
+        for player_id, score in zip(match['player_ids'], match.get('scores') or ()):
+            credit[player_id][0] += match_points(score)
+            credit[player_id][1] += 1
+    entries = []
+    for info in users.values():
+        points, played = credit[info['player_id']]
+        entries.append({'name': info['name'], 'player_id': info['player_id'], 'handicap': info['handicap'],
+                        'points': points, 'matches_played': played})
+    store.save_leaderboard(entries)
+    store.recompute_handicaps(force=True)
+    write_records(match_records.DATA_FILE, records, list(player_ids), end, seed)
+
+    return {
+        'players': players,
+        'teams': len(teams),
+        'matches': matches,
+        'completed': sum(1 for match in history if match['status'] == 'Completed'),
+        'team_matches': sum(1 for match in history if 'teams' in match),
+        'scorecards': sum(1 for match in history if 'scorecards' in match),
+        'records': records,
+        'seconds': round(time.perf_counter() - began, 2)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic league")
+    parser.add_argument('--matches', type=int, default=10_000)
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--records', type=int, default=10_000, help="rows of match_records.csv")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='.', help="data directory, must be empty")
+    args = parser.parse_args(argv)
+    if args.players < 4:
+        parser.error("a league needs at least 4 players")
+    os.makedirs(args.out, exist_ok=True)
+    if os.listdir(args.out):
+        parser.error(f"{args.out} is not empty")
+    # The stores keep their files in the working directory
+    os.chdir(args.out)
+    print(json.dumps(generate(args.matches, args.players, args.records, seed=args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Login page first paint and password check against leagues of growing size.
+
+For each size a synthetic league (benchmarks.league) is generated in an
+empty temporary directory. A fresh interpreter then renders the login
+page of app.py with streamlit.testing, checks a password against the
+credential index, and finally builds the SharedStore and counts the
+matches, which used to happen before the login form was shown. First paint and the password check should
+not grow with the number of matches; the store load, now deferred until
+after login, does.
+
+    python -m benchmarks.login_latency --matches 1000 100000
+    GOLF_KDF_ITERATIONS=100000 python -m benchmarks.login_latency
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+EMAIL = 'player1@example.com'
+
+
+def generate_league(directory, count, players):
+    os.chdir(directory)
+    from benchmarks.league import generate
+    generate(count, players, records=0)
+
+def cold_start(directory):
+    """Timings of a fresh server process in ``directory``"""
+    os.chdir(directory)
+    from streamlit.testing.v1 import AppTest
+    began = time.perf_counter()
+    app = AppTest.from_file(APP, default_timeout=600)
+    app.run()
+    first_paint = time.perf_counter() - began
+    if app.exception or not app.text_input(key='login_email'):
+        raise AssertionError(f"login page did not render: {app.exception}")
+
+    from Utils.auth import get_credentials
+    credentials = get_credentials()
+    # The first check rehashes the league's cheap hash at the configured cost
+    credentials.verify(EMAIL, 'password')
+    began = time.perf_counter()
+    if not credentials.verify(EMAIL, 'password'):
+        raise AssertionError("login failed")
+    verify = time.perf_counter() - began
+
+    from Utils.shared_store import get_store
+    began = time.perf_counter()
+    get_store().count_matches()
+    store_load = time.perf_counter() - began
+    return first_paint, verify, store_load
+
+def run(sizes, players):
+    from Utils.auth import ITERATIONS
+    results = []
+    # Every step gets its own interpreter: the stores are process-wide singletons
+    context = multiprocessing.get_context('spawn')
+    for count in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            with context.Pool(1) as pool:
+                pool.apply(generate_league, (directory, count, players))
+            with context.Pool(1) as pool:
+                first_paint, verify, store_load = pool.apply(cold_start, (directory,))
+        results.append({
+            'matches': count,
+            'kdf_iterations': ITERATIONS,
+            'first_paint_s': round(first_paint, 3),
+            'verify_s': round(verify, 3),
+            'deferred_store_load_s': round(store_load, 3)
+        })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark login page first paint")
+    parser.add_argument('--matches', type=int, nargs='+', default=[1_000, 100_000])
+    parser.add_argument('--players', type=int, default=200)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.matches, args.players), indent=2))
+
+
+if __name__ == '__main__':
+    main()
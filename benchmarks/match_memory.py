@@ -0,0 +1,57 @@
+"""Compare memory per match of plain dicts and Utils.match_model.Match.
+
+    python -m benchmarks.match_memory --matches 100000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from benchmarks.snapshot_load import synthetic_matches
+from Utils.match_journal import decode_match, encode_match
+from Utils.match_model import Match
+
+
+def measure(build):
+    """(bytes allocated, objects) for build()"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = build()
+        return tracemalloc.get_traced_memory()[0] - before, objects
+    finally:
+        tracemalloc.stop()
+
+def run(count):
+    # Round-trip through JSON so the dicts look like freshly loaded ones
+    stored = json.dumps([encode_match(m) for m in synthetic_matches(count)])
+    dict_bytes, dicts = measure(lambda: [decode_match(data) for data in json.loads(stored)])
+    match_bytes, matches = measure(lambda: [Match.from_dict(match) for match in dicts])
+
+    began = time.perf_counter()
+    for match in dicts:
+        match['status'], match['location'], match['date']
+    dict_access = time.perf_counter() - began
+    began = time.perf_counter()
+    for match in matches:
+        match.status, match.location, match.date
+    attribute_access = time.perf_counter() - began
+
+    return {
+        'matches': count,
+        'dict_bytes_per_match': round(dict_bytes / count),
+        'match_bytes_per_match': round(match_bytes / count),
+        'reduction': round(dict_bytes / match_bytes, 2),
+        'dict_access_seconds': round(dict_access, 4),
+        'attribute_access_seconds': round(attribute_access, 4)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark in-memory size of match records")
+    parser.add_argument('--matches', type=int, default=100_000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.matches), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Time the per-hole scorecard analytics over many synthetic rounds.
+
+Builds one player's stacked (rounds, holes, fields) scorecards and times
+Utils.scorecard's masked reductions against the same per-hole averages
+computed hole by hole from per-round dicts, as the Home page would
+without the arrays.
+
+    python -m benchmarks.scorecard_analytics --rounds 20000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from Utils import scorecard
+from Utils.course_catalog import DEFAULT_PARS
+
+
+def synthetic_cards(count, seed=7):
+    """(cards, pars) of ``count`` random 18-hole rounds"""
+    rng = np.random.default_rng(seed)
+    pars = np.tile(np.asarray(DEFAULT_PARS, dtype=np.int8), (count, 1))
+    cards = scorecard.empty(count)
+    cards[..., scorecard.STROKES] = pars + rng.integers(-1, 3, pars.shape)
+    cards[..., scorecard.PUTTS] = rng.integers(1, 4, pars.shape)
+    cards[..., scorecard.FAIRWAY] = np.where(pars == 3, scorecard.NOT_RECORDED, rng.integers(0, 2, pars.shape))
+    cards[..., scorecard.GIR] = rng.integers(0, 2, pars.shape)
+    cards[..., scorecard.PENALTIES] = rng.random(pars.shape) < 0.05
+    return cards, pars
+
+def per_round_averages(rounds):
+    """Per-hole average strokes and vs-par from a list of per-round hole dicts"""
+    averages = []
+    for hole in range(scorecard.HOLES):
+        strokes = [r[hole]['strokes'] for r in rounds]
+        averages.append((sum(strokes) / len(strokes),
+                         sum(r[hole]['par'] - r[hole]['strokes'] for r in rounds) / len(rounds)))
+    return averages
+
+def timed(function, *args):
+    began = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - began
+
+def run(count):
+    cards, pars = synthetic_cards(count)
+    rounds = [[{'par': int(par), **dict(zip(scorecard.FIELDS, map(int, hole)))} for par, hole in zip(round_pars, card)]
+              for round_pars, card in zip(pars, cards)]
+
+    _, summary_s = timed(scorecard.summary, cards, pars)
+    averages, holes_s = timed(scorecard.hole_averages, cards, pars)
+    _, par_types_s = timed(scorecard.par_type_summary, cards, pars)
+    baseline, baseline_s = timed(per_round_averages, rounds)
+    assert np.allclose(averages['avg_strokes'], [strokes for strokes, _ in baseline])
+    return {
+        'rounds': count,
+        'card_bytes': cards.nbytes,
+        'summary_s': round(summary_s, 4),
+        'hole_averages_s': round(holes_s, 4),
+        'par_type_summary_s': round(par_types_s, 4),
+        'per_round_dicts_s': round(baseline_s, 4),
+        'speedup': round(baseline_s / holes_s, 1)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized scorecard analytics")
+    parser.add_argument('--rounds', type=int, default=20_000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.rounds), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Compare cold-load time of the JSON and columnar match snapshots.
+
+Writes a synthetic history of N matches in both formats and times loading
+each back into match dicts.
+
+    python -m benchmarks.snapshot_load
+    python -m benchmarks.snapshot_load --sizes 10000 100000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from Utils import match_journal, match_snapshot
+
+PLAYERS = ['Craig Roberts', 'Omkar Pol', 'Mayank Rai', 'Nitesh Devadiga', 'Dinesh Rambade', 'Mayank Saxena']
+COURSES = ['Bombay Presidency Golf Club', 'Willingdon Sports Club', 'Juhu Vile Parle Gymkhana Club',
+           'Kharghar Valley Golf Course', 'Aamby Valley Golf Course']
+
+
+def synthetic_matches(count, seed=0):
+    """Completed matches with the same fields Score Entry writes"""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    for match_id in range(1, count + 1):
+        players = rng.sample(PLAYERS, 2)
+        date = start + timedelta(minutes=30 * match_id)
+        yield {
+            'id': match_id,
+            'date': date,
+            'players': players,
+            'player_ids': [PLAYERS.index(player) + 1 for player in players],
+            'status': 'Completed',
+            'location': rng.choice(COURSES),
+            'handicap': rng.randint(0, 36),
+            'course_par': 72,
+            'format': 'Stroke Play',
+            'created_by': 'craig@example.com',
+            'created_date': date - timedelta(days=7),
+            'scores': [rng.randint(68, 100), rng.randint(68, 100)],
+            'weather': 'Sunny',
+            'course_condition': 'Good',
+            'duration': 4.5,
+            'player_stats': {
+                player: {
+                    'fairways_hit': rng.randint(30, 90),
+                    'greens_in_regulation': rng.randint(20, 80),
+                    'total_putts': rng.randint(25, 40)
+                }
+                for player in players
+            },
+            'notes': '',
+            'completed_date': date + timedelta(hours=5),
+            'version': 2
+        }
+
+def best_of(repeat, load):
+    """Fastest of ``repeat`` loads, each starting from an empty heap"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        began = time.perf_counter()
+        loaded = load()
+        timings.append(time.perf_counter() - began)
+        del loaded
+    return min(timings)
+
+def run(sizes, repeat=3):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'matches.json')
+        columnar_path = os.path.join(directory, 'matches' + match_snapshot.EXTENSION)
+        for size in sizes:
+            match_snapshot.write(synthetic_matches(size), columnar_path, fsync=False)
+            # Same layout as match_journal.compact, streamed to keep memory flat
+            with open(json_path, 'w') as f:
+                json.dump([match_journal.encode_match(m) for m in synthetic_matches(size)], f, indent=2)
+
+            loaded = match_snapshot.read(columnar_path)
+            if any(a != b for a, b in zip(loaded, synthetic_matches(size))) or len(loaded) != size:
+                raise AssertionError(f"columnar snapshot does not round-trip at {size} matches")
+            del loaded
+            json_seconds = best_of(repeat, lambda: match_journal.load_snapshot(json_path))
+            columnar_seconds = best_of(repeat, lambda: match_snapshot.read(columnar_path))
+
+            results.append({
+                'matches': size,
+                'json_seconds': round(json_seconds, 4),
+                'json_bytes': os.path.getsize(json_path),
+                'columnar_seconds': round(columnar_seconds, 4),
+                'columnar_bytes': os.path.getsize(columnar_path),
+                'speedup': round(json_seconds / columnar_seconds, 2)
+            })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark match snapshot load time")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.sizes, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
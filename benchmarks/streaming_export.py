@@ -0,0 +1,70 @@
+"""Peak memory of the streaming match export against building one DataFrame.
+
+Imports N synthetic matches into an empty data directory, then measures the
+extra memory allocated while exporting them with Utils.data_export (CSV and,
+with pyarrow, Parquet) and while materializing the same rows as a DataFrame.
+
+    python -m benchmarks.streaming_export --matches 50000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bulk_import import write_csv
+
+
+def measure(function):
+    """(peak bytes allocated, seconds) while running function()"""
+    tracemalloc.start()
+    began = time.perf_counter()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1], time.perf_counter() - began
+    finally:
+        tracemalloc.stop()
+
+def run(count, chunk_size):
+    with tempfile.TemporaryDirectory() as directory:
+        write_csv(os.path.join(directory, 'rounds.csv'), count)
+        # The stores keep their files in the working directory
+        os.chdir(directory)
+        import pandas as pd
+        from Utils import data_export
+        from Utils.match_import import import_csv
+        with open('rounds.csv', newline='') as f:
+            import_csv(f)
+
+        def export(file_format):
+            def write():
+                if file_format == 'parquet':
+                    data_export.export('matches', 'out.parquet', 'parquet', chunk_size=chunk_size)
+                else:
+                    with open('out.csv', 'w', newline='') as f:
+                        data_export.export('matches', f, chunk_size=chunk_size)
+            return write
+
+        def materialize():
+            rows = [row for chunk in data_export.match_chunks(chunk_size=chunk_size) for row in chunk]
+            pd.DataFrame(rows, columns=[name for name, _ in data_export.MATCH_COLUMNS]).to_csv('frame.csv')
+
+        results = {'matches': count, 'rows': 2 * count, 'chunk_size': chunk_size}
+        formats = ['csv', 'parquet'] if data_export.parquet_available() else ['csv']
+        for name, function in [*((f'stream_{fmt}', export(fmt)) for fmt in formats), ('dataframe_csv', materialize)]:
+            peak, seconds = measure(function)
+            results[f'{name}_peak_mb'] = round(peak / 2**20, 1)
+            results[f'{name}_s'] = round(seconds, 3)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark streaming export memory")
+    parser.add_argument('--matches', type=int, default=50_000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.matches, args.chunk_size), indent=2))
+
+
+if __name__ == '__main__':
+    main()
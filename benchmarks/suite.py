@@ -0,0 +1,160 @@
+"""Time the per-rerun work of every page against a synthetic league.
+
+For each size a fresh interpreter generates a league (benchmarks.league)
+in an empty temporary directory and times what the pages do on a rerun,
+through the same store calls the app.py adapters make:
+
+- load_matches, cold (a new storage backend) and warm, and save_matches
+- generate_analytics_data (Home) and calculate_player_statistics
+  (Profile) for the busiest player, uncached and from the analytics cache
+- the aggregation behind show_team_leaderboard (Utils.teams.leaderboard_rows)
+- the Matches page filter: player list, first page and match count,
+  unfiltered and for one player's completed matches
+- submitting a round from Score Entry (save_match plus leaderboard points)
+- save_match_data and load_match_data of Match Details, cold and right
+  after a save
+
+Every timing is the median over --repeat runs, in milliseconds. The JSON
+result also records the git revision, storage backend and snapshot format,
+so results of two versions can be diffed.
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --matches 1000 100000 1000000 --repeat 3 > results.json
+    GOLF_STORAGE=sqlite python -m benchmarks.suite --matches 10000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# As on the Matches page
+MATCHES_PAGE_SIZE = 20
+
+
+def median_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - began)
+    return round(statistics.median(timings) * 1000, 3)
+
+def revision():
+    """Short git revision of the tree being measured, if it is a checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def matches_page(store, player, status):
+    """The queries of one Matches page render"""
+    store.list_match_players()
+    store.query_matches(player, status, limit=MATCHES_PAGE_SIZE + 1)
+    store.count_matches(player, status)
+
+def run(count, players, records, repeat):
+    """Timings against a league of ``count`` matches; call in a fresh process"""
+    with tempfile.TemporaryDirectory() as directory:
+        # The stores keep their files in the working directory
+        os.chdir(directory)
+        from benchmarks.league import generate
+        from Utils import analytics, match_records
+        from Utils.leaderboard import match_points
+        from Utils.shared_store import get_store
+        from Utils.storage import BACKENDS
+        from Utils.teams import leaderboard_rows
+
+        league = generate(count, players, records)
+        backend = os.environ.get('GOLF_STORAGE', 'json').lower()
+        store = get_store()
+        busiest = store.leaderboard.page('matches_played', limit=1)[0]
+        player_id = busiest['player_id']
+        today = datetime.now().date()
+        timings = {}
+
+        timings['load_matches_cold'] = median_ms(lambda: BACKENDS[backend]().load_matches(), repeat)
+        timings['load_matches_warm'] = median_ms(store.load_matches, repeat)
+
+        version = store.version
+        timings['generate_analytics_data'] = median_ms(
+            lambda: analytics.player_dashboard.__wrapped__(player_id, version, today, busiest['handicap']), repeat)
+        timings['generate_analytics_data_cached'] = median_ms(
+            lambda: analytics.player_dashboard(player_id, version, today, busiest['handicap']), repeat)
+        timings['calculate_player_statistics'] = median_ms(
+            lambda: analytics.player_statistics.__wrapped__(player_id, version), repeat)
+        timings['calculate_player_statistics_cached'] = median_ms(
+            lambda: analytics.player_statistics(player_id, version), repeat)
+
+        timings['team_leaderboard'] = median_ms(
+            lambda: leaderboard_rows(store.team_standings, store.teams.get, store.registry.name_of), repeat)
+        timings['matches_filter_all'] = median_ms(lambda: matches_page(store, None, None), repeat)
+        timings['matches_filter_player'] = median_ms(lambda: matches_page(store, player_id, 'Completed'), repeat)
+
+        record = {"User": busiest['name'], "User Score": 82, "Opponent": "Omkar Pol", "Opponent Handicap": 12,
+                  "Opponent Score": 85, "Ground": "Willingdon Sports Club", "Match Type": "Friendly",
+                  "Match Date": today.isoformat(), "Match Time": "08:00", "Notes": ""}
+        timings['save_match_data'] = median_ms(lambda: match_records.append_record(record), repeat)
+        timings['load_match_data_cold'] = median_ms(lambda: match_records.MatchRecordsView().refresh(), repeat)
+        # A save followed by the rerun that shows it
+        timings['save_and_reload_match_data'] = median_ms(
+            lambda: (match_records.append_record(record), match_records.get_view()), repeat)
+
+        # Rounds to submit, scheduled the way the Matches page does
+        opponent_id = next(entry['player_id'] for entry in store.leaderboard.page(limit=2)
+                           if entry['player_id'] != player_id)
+        upcoming = iter([
+            store.save_match({'id': None, 'date': datetime.now() + timedelta(days=1), 'player_ids': [player_id, opponent_id],
+                              'status': 'Upcoming', 'location': 'Willingdon Sports Club', 'handicap': 12,
+                              'course_par': 72, 'format': 'Stroke Play', 'created_by': 'player1@example.com',
+                              'created_date': datetime.now()})
+            for _ in range(repeat)
+        ])
+
+        def submit():
+            match = next(upcoming)
+            completed = dict(match, status='Completed', scores=[82, 85], completed_date=datetime.now(), player_stats={
+                name: {'fairways_hit': 50, 'greens_in_regulation': 40, 'total_putts': 31} for name in match['players']
+            })
+            store.save_match(completed, expected_version=match['version'])
+            for match_player_id, score in zip(match['player_ids'], completed['scores']):
+                store.add_leaderboard_points(match_player_id, match_points(score))
+
+        timings['save_match'] = median_ms(submit, repeat)
+        matches = store.load_matches()
+        timings['save_matches'] = median_ms(lambda: store.save_matches(matches), repeat)
+
+    return {'matches': count, 'league': league, 'ms': timings}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the page hot paths against synthetic leagues")
+    parser.add_argument('--matches', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--records', type=int, default=10_000, help="rows of match_records.csv")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = []
+    # The stores are process-wide singletons, so every league gets its own interpreter
+    context = multiprocessing.get_context('spawn')
+    for count in args.matches:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(run, (count, args.players, args.records, args.repeat)))
+    print(json.dumps({
+        'revision': revision(),
+        'python': platform.python_version(),
+        'storage': os.environ.get('GOLF_STORAGE', 'json'),
+        'snapshot_format': os.environ.get('GOLF_SNAPSHOT_FORMAT', 'json'),
+        'repeat': args.repeat,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
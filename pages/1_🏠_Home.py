@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 
+from Utils.instrumentation import span, timed
+
+@timed()
 def show_home_page():
     # st.markdown('<div class="main-header">🏌️ Golf Dashboard</div>', unsafe_allow_html=True)
     st.markdown("""
@@ -23,7 +26,9 @@ def show_home_page():
         </p>
     """, unsafe_allow_html=True)
     
-    user_info = st.session_state.users[st.session_state.current_user]
+    from app import get_current_user
+    
+    user_info = get_current_user()
     
     # Generate enhanced analytics data
     analytics_data = generate_analytics_data(user_info)
@@ -44,21 +49,20 @@ def show_home_page():
         st.metric(
             "Win Rate", 
             f"{analytics_data['win_rate']}%",
-            f"{analytics_data['win_rate_change']:+g}%"
+            signed(analytics_data['win_rate_change'], '%')
         )
     
     with col3:
         st.metric(
             "Avg Score", 
             f"{analytics_data['avg_score']}",
-            f"{analytics_data['score_change']:+g}"
+            signed(analytics_data['score_change'])
         )
     
     with col4:
         st.metric(
             "Leaderboard Rank", 
-            f"#{analytics_data['current_rank']}",
-            f"{analytics_data['rank_change']:+g}"
+            f"#{analytics_data['current_rank']}"
         )
     
     # Main content - Two columns
@@ -69,9 +73,9 @@ def show_home_page():
         st.markdown("### 📈 Performance Analytics")
         
         # Tabbed charts
-        tab1, tab2, tab3, tab4 = st.tabs(["Score Trend", "Handicap History", "Course Performance", "Performance Indicators"])
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["Score Trend", "Handicap History", "Course Performance", "Performance Indicators", "Hole by Hole"])
         
-        with tab1:
+        with tab1, span('score trend chart'):
             # Score trend chart using Streamlit
             st.markdown("#### Score Trend (Last 6 Rounds)")
             if analytics_data['recent_scores']:
@@ -84,21 +88,24 @@ def show_home_page():
             else:
                 st.info("No score data available yet. Play some matches to see your trends!")
         
-        with tab2:
+        with tab2, span('handicap chart'):
             # Handicap history chart using Streamlit
             st.markdown("#### Handicap Progression (Last 6 Months)")
             handicap_data = pd.DataFrame(analytics_data['handicap_history'])
             handicap_data = handicap_data.set_index('month')
             st.area_chart(handicap_data)
         
-        with tab3:
+        with tab3, span('course chart'):
             # Course performance chart using Streamlit
             st.markdown("#### Performance by Course")
-            course_data = pd.DataFrame(analytics_data['course_performance'])
-            course_data = course_data.set_index('course')
-            st.bar_chart(course_data['avg_score'])
+            if analytics_data['course_performance']:
+                course_data = pd.DataFrame(analytics_data['course_performance'])
+                course_data = course_data.set_index('course')
+                st.bar_chart(course_data['avg_score'])
+            else:
+                st.info("No course data available yet. Complete some matches to compare courses!")
         
-        with tab4:
+        with tab4, span('performance indicators'):
             # Performance indicators using Streamlit components
             st.markdown("#### Performance Indicators")
             
@@ -106,15 +113,15 @@ def show_home_page():
             
             with col1:
                 st.markdown("**Greens in Regulation**")
-                st.metric("GIR", f"{analytics_data['gir_percentage']}%")
+                st.metric("GIR", percent(analytics_data['gir_percentage']))
             
             with col2:
                 st.markdown("**Driving Accuracy**")
-                st.metric("Fairways", f"{analytics_data['fairway_percentage']}%")
+                st.metric("Fairways", percent(analytics_data['fairway_percentage']))
             
             with col3:
                 st.markdown("**Scrambling**")
-                st.metric("Saves", f"{analytics_data['scrambling_percentage']}%")
+                st.metric("Saves", percent(analytics_data['scrambling_percentage']))
             
             with col4:
                 st.markdown("**Putts per Round**")
@@ -122,13 +129,36 @@ def show_home_page():
             
             # Club accuracy as a horizontal bar chart
             st.markdown("#### Club Accuracy")
+            st.caption("Sample data: shots are not recorded club by club yet")
+            clubs = ['Driver', '3-Wood', '5-Iron', '7-Iron', '9-Iron', 'PW', 'SW', 'Putter']
             club_data = pd.DataFrame({
-                'Club': analytics_data['clubs'],
-                'Accuracy': analytics_data['shot_accuracy']
+                'Club': clubs,
+                'Accuracy': [np.random.randint(60, 95) for _ in clubs]
             })
             club_data = club_data.set_index('Club')
             st.bar_chart(club_data)
         
+        with tab5, span('hole by hole chart'):
+            # Per-hole averages of the player's hole-by-hole scorecards
+            st.markdown("#### Strokes vs Par by Hole")
+            hole_stats = analytics_data['hole_averages']
+            if hole_stats is not None:
+                st.caption(f"Average over {analytics_data['scorecard_rounds']} rounds with scorecards; above zero is better than par")
+                st.bar_chart(hole_stats.set_index('hole')['vs_par'])
+                
+                par_columns = st.columns(len(analytics_data['par_type_summary']) or 1)
+                for column, (par_type, gained) in zip(par_columns, analytics_data['par_type_summary'].items()):
+                    with column:
+                        st.metric(f"{par_type} vs Par", f"{gained:+.2f}")
+                
+                st.dataframe(
+                    hole_stats.round(2),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.info("No scorecards yet. Enter a round hole by hole on the Score Entry page to see per-hole analytics!")
+        
         # Recent matches with enhanced visualization
         st.markdown("### 🎯 Recent Matches & Performance")
         show_enhanced_recent_matches(user_info, analytics_data)
@@ -157,10 +187,10 @@ def show_home_page():
         col_stat1, col_stat2 = st.columns(2)
         with col_stat1:
             st.metric("Matches Played", analytics_data['total_matches'])
-            st.metric("Best Score", analytics_data['best_score'])
+            st.metric("Best Score", analytics_data['best_score'] or "–")
         with col_stat2:
             st.metric("Avg Putts", analytics_data['avg_putts'])
-            st.metric("Fairways Hit", f"{analytics_data['fairway_percentage']}%")
+            st.metric("Fairways Hit", percent(analytics_data['fairway_percentage']))
         
         st.markdown('</div>', unsafe_allow_html=True)
         
@@ -170,18 +200,15 @@ def show_home_page():
         
         # Greens in Regulation
         st.write("**Greens in Regulation:**")
-        gir = analytics_data['gir_percentage']
-        st.progress(gir/100, text=f"{gir}%")
+        show_progress(analytics_data['gir_percentage'])
         
         # Driving Accuracy
         st.write("**Driving Accuracy:**")
-        driving_acc = analytics_data['driving_accuracy']
-        st.progress(driving_acc/100, text=f"{driving_acc}%")
+        show_progress(analytics_data['driving_accuracy'])
         
         # Scrambling
         st.write("**Scrambling:**")
-        scrambling = analytics_data['scrambling_percentage']
-        st.progress(scrambling/100, text=f"{scrambling}%")
+        show_progress(analytics_data['scrambling_percentage'])
         
         # Putting
         st.write("**Putting Efficiency:**")
@@ -194,99 +221,36 @@ def show_home_page():
         st.markdown("### 📅 Upcoming Matches")
         show_upcoming_matches_widget(user_info)
 
+@timed()
 def generate_analytics_data(user_info):
-    """Generate comprehensive analytics data for the user"""
-    
-    # Get user's matches
-    user_matches = [m for m in st.session_state.matches 
-                   if user_info['name'] in m.get('players', []) and m['status'] == 'Completed']
-    
-    # Calculate basic stats
-    total_matches = len(user_matches)
-    wins = 0
-    scores = []
-    dates = []
-    
-    for match in user_matches:
-        if 'scores' in match:
-            # Find user's score
-            user_index = match['players'].index(user_info['name'])
-            user_score = match['scores'][user_index]
-            scores.append(user_score)
-            dates.append(match['date'])
-            
-            # Determine win/loss
-            opponent_index = 1 - user_index  # Since there are only 2 players
-            opponent_score = match['scores'][opponent_index]
-            if user_score < opponent_score:
-                wins += 1
-    
-    win_rate = (wins / total_matches * 100) if total_matches > 0 else 0
-    avg_score = np.mean(scores) if scores else user_info['handicap'] + 72
-    
-    # Generate historical handicap data (last 6 months)
-    months = pd.date_range(end=datetime.now(), periods=6, freq='M')
-    handicap_history = []
-    base_handicap = user_info['handicap']
-    
-    for i, month in enumerate(months):
-        # Simulate handicap progression
-        variation = np.random.uniform(-2, 2)
-        handicap = max(0, min(36, base_handicap + (6-i-1)*1 + variation))
-        handicap_history.append({
-            'month': month.strftime('%b %Y'),
-            'handicap': round(handicap, 1)
-        })
-    
-    # Course performance data
-    courses = ['Bombay Presidency Golf Club (BPGC)', 'Willingdon Sports Club', 'Kharghar Valley Golf Course', 'Royal Palms Golf & Country Club']
-    course_performance = []
-    for course in courses:
-        course_scores = [72 + np.random.normal(0, 3) for _ in range(4)]
-        course_performance.append({
-            'course': course,
-            'avg_score': round(np.mean(course_scores), 1),
-            'best_score': int(min(course_scores)),
-            'rounds_played': 4
-        })
-    
-    # Shot analysis data
-    clubs = ['Driver', '3-Wood', '5-Iron', '7-Iron', '9-Iron', 'PW', 'SW', 'Putter']
-    shot_accuracy = [np.random.randint(60, 95) for _ in clubs]
-    
-    # Leaderboard position
-    current_rank = next((i+1 for i, p in enumerate(st.session_state.leaderboard) 
-                        if p['name'] == user_info['name']), len(st.session_state.leaderboard) + 1)
-    
-    return {
-        'total_matches': total_matches,
-        'win_rate': round(win_rate, 1),
-        'win_rate_change': round(np.random.uniform(-5, 5), 1),
-        'avg_score': round(avg_score, 1),
-        'score_change': round(np.random.uniform(-2, 2), 1),
-        'handicap_change': round(np.random.uniform(-1, 1), 1),
-        'current_rank': current_rank,
-        'rank_change': np.random.randint(-3, 4),
-        'handicap_history': handicap_history,
-        'course_performance': course_performance,
-        'shot_accuracy': shot_accuracy,
-        'clubs': clubs,
-        'best_score': min(scores) if scores else 68,
-        'avg_putts': round(np.random.uniform(28, 34), 1),
-        'fairway_percentage': np.random.randint(55, 85),
-        'gir_percentage': np.random.randint(50, 80),
-        'driving_accuracy': np.random.randint(60, 90),
-        'scrambling_percentage': np.random.randint(40, 70),
-        'recent_scores': scores[-6:] if len(scores) >= 6 else scores,
-        'recent_dates': [d.strftime('%m/%d') for d in dates[-6:]] if len(dates) >= 6 else [d.strftime('%m/%d') for d in dates]
-    }
+    """Analytics of the signed-in player, cached per data version (Utils.analytics)"""
+    from app import data_version
+    from Utils.analytics import player_dashboard
+    return player_dashboard(user_info['player_id'], data_version(), datetime.now().date(), user_info['handicap'])
+
+def signed(value, suffix=''):
+    """Metric delta text, or None to show no delta"""
+    return None if value is None else f"{value:+g}{suffix}"
+
+def percent(value):
+    return "–" if value is None else f"{value:g}%"
+
+def show_progress(value):
+    """Progress bar for a percentage, or a note until there is data"""
+    if value is None:
+        st.caption("Not recorded yet")
+    else:
+        st.progress(value / 100, text=f"{value:g}%")
 
+@timed()
 def show_enhanced_recent_matches(user_info, analytics_data):
     """Show recent matches with enhanced visualization"""
-    user_matches = [m for m in st.session_state.matches 
-                   if user_info['name'] in m.get('players', []) and m['status'] == 'Completed']
+    from app import match_title, query_matches
+    from Utils.course_catalog import get_catalog
+    catalog = get_catalog()
     
-    recent_matches = user_matches[-3:]  # Last 3 matches
+    # Last 3 matches, oldest first
+    recent_matches = query_matches(player=user_info['player_id'], status='Completed', newest_first=True, limit=3)[::-1]
     
     if not recent_matches:
         st.info("No recent matches to display. Complete some matches to see your performance analytics!")
@@ -299,13 +263,18 @@ def show_enhanced_recent_matches(user_info, analytics_data):
             # Match header
             col1, col2 = st.columns([3, 1])
             with col1:
-                st.write(f"**{match['players'][0]} vs {match['players'][1]}**")
+                st.write(f"**{match_title(match)}**")
             with col2:
                 st.write(f"📅 {match['date'].strftime('%m/%d/%Y')}")
             
+            # Matches saved without a par use the catalog course's par
+            course_par = match.get('course_par') or catalog.par_of(match.get('location'))
+            
             # Scores and performance
-            if 'scores' in match:
-                user_index = match['players'].index(user_info['name'])
+            if 'team_scores' in match:
+                show_team_result(match, user_info['player_id'], course_par)
+            elif 'scores' in match:
+                user_index = match['player_ids'].index(user_info['player_id'])
                 user_score = match['scores'][user_index]
                 opponent_index = 1 - user_index
                 opponent_score = match['scores'][opponent_index]
@@ -314,12 +283,12 @@ def show_enhanced_recent_matches(user_info, analytics_data):
                 
                 with col1:
                     st.metric(f"{user_info['name']}", user_score, 
-                             delta=f"{user_score - match.get('course_par', 72):+d} vs Par")
+                             delta=f"{user_score - course_par:+d} vs Par")
                 
                 with col2:
                     opponent_name = match['players'][opponent_index]
                     st.metric(f"{opponent_name}", opponent_score,
-                             delta=f"{opponent_score - match.get('course_par', 72):+d} vs Par")
+                             delta=f"{opponent_score - course_par:+d} vs Par")
                 
                 with col3:
                     result = "🏆 Win" if user_score < opponent_score else "🤝 Tie" if user_score == opponent_score else "❌ Loss"
@@ -334,32 +303,67 @@ def show_enhanced_recent_matches(user_info, analytics_data):
                     st.write("**Conditions:**", match.get('weather', 'Unknown'))
                 
                 with col2:
-                    st.write("**Course Par:**", match.get('course_par', 72))
+                    st.write("**Course Par:**", course_par)
                     st.write("**Condition:**", match.get('course_condition', 'Unknown'))
                 
                 with col3:
-                    # Simulated performance stats
-                    st.write("**Fairways:**", f"{np.random.randint(60, 90)}%")
-                    st.write("**Greens:**", f"{np.random.randint(50, 80)}%")
-                    st.write("**Putts:**", np.random.randint(28, 36))
+                    # The round's scorecard or entered stats; simulated for older matches
+                    user_stats = match_round_stats(match, user_info['player_id'])
+                    if user_stats:
+                        st.write("**Fairways:**", f"{user_stats.get('fairways_hit', '–')}%")
+                        st.write("**Greens:**", f"{user_stats.get('greens_in_regulation', '–')}%")
+                        st.write("**Putts:**", user_stats.get('total_putts', '–'))
+                    else:
+                        st.write("**Fairways:**", f"{np.random.randint(60, 90)}%")
+                        st.write("**Greens:**", f"{np.random.randint(50, 80)}%")
+                        st.write("**Putts:**", np.random.randint(28, 36))
             
             st.markdown('</div>', unsafe_allow_html=True)
 
+def show_team_result(match, player_id, course_par):
+    """Team scores of a team match from the side of the player's team"""
+    from app import get_team
+    from Utils.teams import results, sides
+    
+    user_side = 0 if player_id in sides(match)[0] else 1
+    order = [user_side, 1 - user_side]
+    col1, col2, col3 = st.columns(3)
+    for column, side in zip((col1, col2), order):
+        with column:
+            team = get_team(match['teams'][side])
+            score = match['team_scores'][side]
+            st.metric(team['name'] if team else 'Team', score, delta=f"{score - course_par:+d} vs Par")
+    with col3:
+        result = results(match['team_scores'])[user_side]
+        st.metric("Result", {"win": "🏆 Win", "tie": "🤝 Tie", "loss": "❌ Loss"}[result])
+
+def match_round_stats(match, player_id):
+    """A player's fairway, green and putt totals of one match, or None if none were recorded"""
+    from Utils import scorecard
+    index = match['player_ids'].index(player_id)
+    scorecards = match.get('scorecards')
+    if scorecards is not None:
+        return scorecard.totals(scorecards[index])
+    return (match.get('player_stats') or {}).get(match['players'][index])
+
+@timed()
 def show_upcoming_matches_widget(user_info):
     """Show upcoming matches in a compact widget"""
-    upcoming_matches = [m for m in st.session_state.matches 
-                       if m['status'] == 'Upcoming' and user_info['name'] in m['players']]
+    from app import match_title, query_matches
+    
+    # Show max 2 upcoming matches
+    upcoming_matches = query_matches(player=user_info['player_id'], status='Upcoming', limit=2)
     
     if not upcoming_matches:
         st.info("No upcoming matches")
         return
     
-    for match in upcoming_matches[:2]:  # Show max 2 upcoming matches
+    for match in upcoming_matches:
         with st.container():
             st.markdown('<div style="background: #f0f8ff; padding: 10px; border-radius: 8px; margin: 5px 0;">', unsafe_allow_html=True)
             
             days_until = (match['date'] - datetime.now()).days
-            st.write(f"**{match['players'][0]} vs {match['players'][1]}**")
+            st.write(f"**{match_title(match)}**")
             st.write(f"📍 {match['location']}")
             st.write(f"⏰ {match['date'].strftime('%b %d')} ({days_until} days)")
             
@@ -1,6 +1,12 @@
 import streamlit as st
 from datetime import datetime, timedelta
 
+from Utils.instrumentation import timed
+
+# Number of match cards rendered per page of the match list
+PAGE_SIZE = 20
+
+@timed()
 def show_matches_page():
     # st.markdown('<div class="main-header">All Matches</div>', unsafe_allow_html=True)
     st.markdown("""
@@ -21,7 +27,9 @@ def show_matches_page():
         </p>
     """, unsafe_allow_html=True)
     
-    user_info = st.session_state.users[st.session_state.current_user]
+    from app import query_matches, count_matches, list_match_players, get_current_user, player_name
+    
+    user_info = get_current_user()
     
     # Create two columns - left for matches list, right for scheduling
     col_left, col_right = st.columns([2, 1])
@@ -33,29 +41,34 @@ def show_matches_page():
             filter_status = st.selectbox("Filter by Status", ["All", "Upcoming", "Completed"])
         with col2:
             # Get all players involved in matches
-            all_players = set()
-            for match in st.session_state.matches:
-                if 'players' in match:
-                    all_players.update(match['players'])
-            filter_player = st.selectbox("Filter by Player", ["All Players"] + list(all_players))
+            all_players = list_match_players()
+            filter_player = st.selectbox(
+                "Filter by Player",
+                [None] + all_players,
+                format_func=lambda player_id: "All Players" if player_id is None else player_name(player_id)
+            )
         with col3:
             st.write("")  # Spacer for layout
         
         # Apply filters
-        filtered_matches = []
-        for match in st.session_state.matches:
-            # Skip matches that don't have proper structure
-            if 'players' not in match:
-                continue
-                
-            # Status filter
-            status_match = (filter_status == "All" or match['status'] == filter_status)
-            
-            # Player filter  
-            player_match = (filter_player == "All Players" or filter_player in match['players'])
-            
-            if status_match and player_match:
-                filtered_matches.append(match)
+        player_filter = filter_player
+        status_filter = None if filter_status == "All" else filter_status
+        
+        # Cursor stack for paging: one (date, id) cursor per page visited
+        if st.session_state.get('match_list_filters') != (player_filter, status_filter):
+            st.session_state.match_list_filters = (player_filter, status_filter)
+            st.session_state.match_list_cursors = [None]
+        cursors = st.session_state.match_list_cursors
+        
+        # Fetch one extra row to know whether a next page exists
+        filtered_matches = query_matches(
+            player=player_filter,
+            status=status_filter,
+            limit=PAGE_SIZE + 1,
+            after=cursors[-1]
+        )
+        has_next_page = len(filtered_matches) > PAGE_SIZE
+        filtered_matches = filtered_matches[:PAGE_SIZE]
         
         # Display matches
         if not filtered_matches:
@@ -78,9 +91,7 @@ def show_matches_page():
                     
                     with col1:
                         st.write("**Players**")
-                        for player in match['players']:
-                            player_style = "🟦" if player == user_info['name'] else "⬜"
-                            st.markdown(f'<div class="team-info">{player_style} {player}</div>', unsafe_allow_html=True)
+                        show_lineup(match, user_info['player_id'])
                     
                     with col2:
                         st.write("**Match Info**")
@@ -90,37 +101,52 @@ def show_matches_page():
                         if 'course_par' in match:
                             st.write(f"🎯 Course Par: {match['course_par']}")
                         
-                        if match['status'] == 'Completed' and 'scores' in match:
+                        if match['status'] == 'Completed' and ('scores' in match or 'team_scores' in match):
                             st.write("**Final Scores**")
-                            for i, player in enumerate(match['players']):
-                                score = match['scores'][i]
+                            for name, score in final_scores(match):
                                 par_diff = score - match.get('course_par', 72)
                                 par_text = f" ({par_diff:+d})" if par_diff != 0 else " (E)"
-                                st.write(f"{player}: {score}{par_text}")
+                                st.write(f"{name}: {score}{par_text}")
                     
                     with col3:
                         st.write("**Actions**")
                         if match['status'] == 'Upcoming':
-                            if user_info['name'] in match['players']:
+                            if user_info['player_id'] in match['player_ids']:
                                 if st.button("Enter Scores", key=f"enter_{match['id']}"):
                                     st.session_state.selected_match = match
                                     st.switch_page("pages/3_📊_Score_Entry.py")
                             
                             if st.button("View Course", key=f"course_{match['id']}"):
                                 st.session_state.selected_course = match['location']
-                                st.switch_page("pages/6_📍_GPS_Tracking.py")
+                                st.switch_page("pages/6_📍_Ground_Details.py")
                         else:
-                            if 'scores' in match:
+                            if 'scores' in match or 'team_scores' in match:
                                 # Find winner
-                                min_score = min(match['scores'])
-                                winning_index = match['scores'].index(min_score)
-                                winning_player = match['players'][winning_index]
-                                st.success(f"🏆 Winner: {winning_player}")
+                                scores = final_scores(match)
+                                min_score = min(score for _, score in scores)
+                                winners = [name for name, score in scores if score == min_score]
+                                st.success(f"🏆 Winner: {winners[0]}" if len(winners) == 1 else "🤝 Tied")
                             
                             if st.button("View Summary", key=f"summary_{match['id']}"):
                                 show_match_summary(match)
                     
                     st.markdown('</div>', unsafe_allow_html=True)
+            
+            # Page navigation
+            total_matches = count_matches(player=player_filter, status=status_filter)
+            total_pages = max(1, (total_matches + PAGE_SIZE - 1) // PAGE_SIZE)
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("← Previous", disabled=len(cursors) == 1, key="matches_prev_page"):
+                    cursors.pop()
+                    st.rerun()
+            with col2:
+                st.write(f"Page {len(cursors)} of {total_pages} ({total_matches} matches)")
+            with col3:
+                if st.button("Next →", disabled=not has_next_page, key="matches_next_page"):
+                    last_match = filtered_matches[-1]
+                    cursors.append((last_match['date'], last_match['id']))
+                    st.rerun()
     
     with col_right:
         # Schedule New Match Section
@@ -163,14 +189,8 @@ def show_matches_page():
                 )
                 
                 # Course selection
-                available_courses = [
-                    "Pebble Beach Golf Links",
-                    "St. Andrews Links", 
-                    "Augusta National Golf Club",
-                    "TPC Sawgrass",
-                    "Bethpage Black Course",
-                    "Royal Melbourne Golf Club"
-                ]
+                from Utils.course_catalog import get_catalog
+                available_courses = get_catalog().names()
                 
                 course = st.selectbox(
                     "Select Course",
@@ -183,7 +203,7 @@ def show_matches_page():
                     "Match Handicap",
                     min_value=0,
                     max_value=36,
-                    value=user_info['handicap'],
+                    value=min(36, max(0, int(round(user_info['handicap'])))),
                     help="Set the handicap for this match"
                 )
                 
@@ -206,9 +226,10 @@ def show_matches_page():
                 
                 if submitted:
                     # Create new match
+                    from app import find_player_id
                     new_match = create_new_match(
-                        user_info['name'],
-                        opponent,
+                        user_info['player_id'],
+                        find_player_id(opponent),
                         match_date,
                         match_time,
                         course,
@@ -217,37 +238,29 @@ def show_matches_page():
                         notes
                     )
                     
-                    # Add to session state
-                    st.session_state.matches.append(new_match)
-                    
-                    # Save matches to persistent storage
-                    from app import save_matches
-                    save_matches(st.session_state.matches)
-                    
-                    st.success("🎉 Match scheduled successfully!")
-                    st.balloons()
-                    st.rerun()
+                    # Save the new match to persistent storage
+                    from app import save_match
+                    if save_match(new_match) is not None:
+                        st.success("🎉 Match scheduled successfully!")
+                        st.balloons()
+                        st.rerun()
         
         st.markdown('</div>', unsafe_allow_html=True)
         
+        show_team_play_section(user_info)
+        
         # Quick Stats in Sidebar
         st.markdown("---")
         st.markdown("### 📊 Match Statistics")
         
-        user_matches = [m for m in st.session_state.matches if user_info['name'] in m.get('players', [])]
-        upcoming_count = len([m for m in user_matches if m['status'] == 'Upcoming'])
-        completed_count = len([m for m in user_matches if m['status'] == 'Completed'])
+        upcoming_count = count_matches(player=user_info['player_id'], status='Upcoming')
+        completed_count = count_matches(player=user_info['player_id'], status='Completed')
         
-        wins = 0
-        for match in user_matches:
-            if match['status'] == 'Completed' and 'scores' in match:
-                user_index = match['players'].index(user_info['name'])
-                user_score = match['scores'][user_index]
-                # Find opponent's score
-                opponent_index = 1 - user_index  # Since there are only 2 players
-                opponent_score = match['scores'][opponent_index]
-                if user_score < opponent_score:
-                    wins += 1
+        # Wins come from a vectorized group-by over the cached rounds frame
+        from app import get_rounds_frame
+        from Utils.match_frame import win_rates
+        player_wins = win_rates(get_rounds_frame())['wins']
+        wins = int(player_wins.get(user_info['player_id'], 0))
         
         win_rate = (wins / completed_count * 100) if completed_count > 0 else 0
         
@@ -259,29 +272,127 @@ def show_matches_page():
             st.metric("Wins", wins)
             st.metric("Win Rate", f"{win_rate:.1f}%")
 
-def create_new_match(player1, player2, match_date, match_time, course, handicap, match_format, notes):
-    """Create a new match object between two players"""
+def create_new_match(player1_id, player2_id, match_date, match_time, course, handicap, match_format, notes):
+    """Create a new match object between two players, given by player id"""
     # Combine date and time
     match_datetime = datetime.combine(match_date, match_time)
     
-    # Generate new match ID
-    existing_ids = [m['id'] for m in st.session_state.matches]
-    new_id = max(existing_ids) + 1 if existing_ids else 1
-    
+    # The id is assigned when the match is saved
+    from Utils.course_catalog import get_catalog
     return {
-        'id': new_id,
+        'id': None,
         'date': match_datetime,
-        'players': [player1, player2],
+        'player_ids': [player1_id, player2_id],
         'status': 'Upcoming',
         'location': course,
         'handicap': handicap,
         'format': match_format,
-        'course_par': 72,
+        'course_par': get_catalog().par_of(course),
+        'created_by': st.session_state.current_user,
+        'created_date': datetime.now(),
+        'notes': notes
+    }
+
+@timed()
+def show_team_play_section(user_info):
+    """Create teams and schedule Best Ball, Scramble or Foursomes matches between them"""
+    from app import create_team, get_players, get_teams, save_match
+    from Utils.teams import TEAM_FORMATS
+    
+    st.markdown('<div class="section-header">Team Play</div>', unsafe_allow_html=True)
+    
+    with st.expander("👥 Create Team"):
+        with st.form("create_team_form"):
+            team_name = st.text_input("Team Name")
+            partners = [player for player in get_players() if player['id'] != user_info['player_id']]
+            partner = st.selectbox("Partner", options=partners, format_func=lambda player: player['name'])
+            
+            if st.form_submit_button("Create Team", use_container_width=True):
+                if partner is None:
+                    st.error("There are no other players to team up with")
+                elif create_team(team_name, [user_info['player_id'], partner['id']]) is not None:
+                    st.success(f"Team {team_name.strip()} created!")
+                    st.rerun()
+    
+    my_teams = get_teams(user_info['player_id'])
+    if not my_teams:
+        st.caption("Create a team to schedule team matches.")
+        return
+    
+    with st.expander("🤝 Schedule Team Match"):
+        with st.form("schedule_team_match_form"):
+            team = st.selectbox("Your Team", options=my_teams, format_func=lambda team: team['name'])
+            opponents = [other for other in get_teams()
+                         if not set(other['player_ids']) & set(team['player_ids'])]
+            opponent_team = st.selectbox("Opponent Team", options=opponents, format_func=lambda team: team['name'])
+            match_date = st.date_input(
+                "Match Date",
+                min_value=datetime.now().date(),
+                value=datetime.now().date() + timedelta(days=7),
+                key="team_match_date"
+            )
+            match_time = st.time_input("Match Time", value=datetime.strptime("10:00", "%H:%M").time(), key="team_match_time")
+            
+            from Utils.course_catalog import get_catalog
+            course = st.selectbox("Select Course", options=get_catalog().names(), key="team_match_course")
+            match_format = st.selectbox("Team Format", options=TEAM_FORMATS,
+                                        help="Best Ball: each team counts its better score. "
+                                             "Scramble and Foursomes: one ball per team.")
+            notes = st.text_area("Match Notes (Optional)", key="team_match_notes")
+            
+            if st.form_submit_button("Schedule Team Match", use_container_width=True):
+                if opponent_team is None:
+                    st.error("There is no other team without one of your players to play against.")
+                else:
+                    new_match = create_new_team_match(team, opponent_team, match_date, match_time, course,
+                                                      match_format, notes)
+                    if save_match(new_match) is not None:
+                        st.success("🎉 Team match scheduled successfully!")
+                        st.rerun()
+
+def create_new_team_match(team, opponent_team, match_date, match_time, course, match_format, notes):
+    """Create a new match between two teams; players are listed team by team"""
+    from Utils.course_catalog import get_catalog
+    return {
+        'id': None,
+        'date': datetime.combine(match_date, match_time),
+        'player_ids': [*team['player_ids'], *opponent_team['player_ids']],
+        'teams': [team['id'], opponent_team['id']],
+        'status': 'Upcoming',
+        'location': course,
+        'handicap': 0,
+        'format': match_format,
+        'course_par': get_catalog().par_of(course),
         'created_by': st.session_state.current_user,
         'created_date': datetime.now(),
         'notes': notes
     }
 
+def show_lineup(match, current_player_id):
+    """Players of a match, grouped by team for team matches"""
+    names = dict(zip(match['player_ids'], match['players']))
+    if 'teams' in match:
+        from app import get_team
+        from Utils.teams import sides
+        lineup = [((get_team(team_id) or {}).get('name'), side) for team_id, side in zip(match['teams'], sides(match))]
+    else:
+        lineup = [(None, match['player_ids'])]
+    
+    for team, player_ids in lineup:
+        if team:
+            st.markdown(f"*{team}*")
+        for player_id in player_ids:
+            player_style = "🟦" if player_id == current_player_id else "⬜"
+            st.markdown(f'<div class="team-info">{player_style} {names[player_id]}</div>', unsafe_allow_html=True)
+
+def final_scores(match):
+    """(name, score) per team of a team match, or per player"""
+    if 'team_scores' in match:
+        from app import get_team
+        return [((get_team(team_id) or {}).get('name', 'Team'), score)
+                for team_id, score in zip(match['teams'], match['team_scores'])]
+    return list(zip(match['players'], match['scores']))
+
 def show_match_summary(match):
     st.markdown("---")
     st.markdown('<div class="subsection-header">Match Summary</div>', unsafe_allow_html=True)
@@ -305,18 +416,20 @@ def show_match_summary(match):
     
     with col2:
         st.write("**Final Results**")
-        if 'scores' in match:
-            for i, player in enumerate(match['players']):
-                score = match['scores'][i]
+        if 'scores' in match or 'team_scores' in match:
+            scores = final_scores(match)
+            for name, score in scores:
                 par_diff = score - match.get('course_par', 72)
                 par_text = f" ({par_diff:+d})" if par_diff != 0 else " (E)"
-                st.write(f"{player}: {score}{par_text}")
+                st.write(f"{name}: {score}{par_text}")
             
             # Find winner
-            min_score = min(match['scores'])
-            winning_index = match['scores'].index(min_score)
-            winning_player = match['players'][winning_index]
-            st.success(f"**Winner: {winning_player}**")
+            min_score = min(score for _, score in scores)
+            winners = [name for name, score in scores if score == min_score]
+            if len(winners) == 1:
+                st.success(f"**Winner: {winners[0]}**")
+            else:
+                st.info("**Tied**")
             
             # Show player stats if available
             if 'player_stats' in match:
@@ -1,7 +1,11 @@
 import streamlit as st
+import pandas as pd
 from datetime import datetime
 import numpy as np
 
+from Utils.instrumentation import timed
+
+@timed()
 def show_score_entry_page():
     # st.markdown('<div class="main-header">Score Entry</div>', unsafe_allow_html=True)
     st.markdown("""
@@ -16,11 +20,12 @@ def show_score_entry_page():
     </h1>
     """, unsafe_allow_html=True)
     
-    user_info = st.session_state.users[st.session_state.current_user]
+    from app import query_matches, get_current_user, match_title
+    
+    user_info = get_current_user()
     
     # Select match to score
-    upcoming_matches = [m for m in st.session_state.matches 
-                       if m['status'] == 'Upcoming' and user_info['name'] in m['players']]
+    upcoming_matches = query_matches(player=user_info['player_id'], status='Upcoming')
     
     if not upcoming_matches:
         st.info("No upcoming matches available for scoring.")
@@ -29,12 +34,12 @@ def show_score_entry_page():
     selected_match = st.selectbox(
         "Select Match to Score",
         options=upcoming_matches,
-        format_func=lambda x: f"{x['players'][0]} vs {x['players'][1]} - {x['date'].strftime('%m/%d/%Y')}",
+        format_func=lambda x: f"#{x['id']} {match_title(x)} - {x['date'].strftime('%m/%d/%Y')}",
         key="score_match_select"
     )
     
     if selected_match:
-        st.markdown(f'<div class="section-header">Scoring: {selected_match["players"][0]} vs {selected_match["players"][1]}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="section-header">Scoring: {match_title(selected_match)}</div>', unsafe_allow_html=True)
         
         # Match information
         col1, col2 = st.columns(2)
@@ -48,6 +53,18 @@ def show_score_entry_page():
         
         st.markdown("---")
         
+        if 'teams' in selected_match:
+            show_team_score_form(selected_match)
+            return
+        
+        # Totals only, or a hole-by-hole scorecard the totals are worked out from
+        entry_mode = st.radio("Entry Mode", ["Totals", "Hole by Hole"], horizontal=True, key="score_entry_mode")
+        hole_by_hole = entry_mode == "Hole by Hole"
+        
+        from Utils import scorecard
+        from Utils.course_catalog import get_catalog
+        pars = scorecard.course_pars(get_catalog(), selected_match['location'])
+        
         # Score entry form
         with st.form("score_entry_form"):
             st.markdown('<div class="subsection-header">Enter Match Scores</div>', unsafe_allow_html=True)
@@ -55,29 +72,35 @@ def show_score_entry_page():
             # Get player indices
             player1_index = 0
             player2_index = 1
-            current_user_index = selected_match['players'].index(user_info['name'])
+            current_user_index = selected_match['player_ids'].index(user_info['player_id'])
             
-            col1, col2 = st.columns(2)
+            if hole_by_hole:
+                hole_tables = []
+                for i, tab in enumerate(st.tabs(selected_match['players'][:2])):
+                    with tab:
+                        hole_tables.append(hole_editor(pars, key=f"holes_{selected_match['id']}_{i}"))
+            else:
+                col1, col2 = st.columns(2)
             
-            with col1:
-                st.markdown(f'**{selected_match["players"][0]}**')
-                player1_score = st.number_input(
-                    f"Score for {selected_match['players'][0]}",
-                    min_value=50,
-                    max_value=150,
-                    value=selected_match.get('course_par', 72),
-                    key="player1_score"
-                )
+                with col1:
+                    st.markdown(f'**{selected_match["players"][0]}**')
+                    player1_score = st.number_input(
+                        f"Score for {selected_match['players'][0]}",
+                        min_value=50,
+                        max_value=150,
+                        value=selected_match.get('course_par', 72),
+                        key="player1_score"
+                    )
                 
-            with col2:
-                st.markdown(f'**{selected_match["players"][1]}**')
-                player2_score = st.number_input(
-                    f"Score for {selected_match['players'][1]}",
-                    min_value=50,
-                    max_value=150,
-                    value=selected_match.get('course_par', 72),
-                    key="player2_score"
-                )
+                with col2:
+                    st.markdown(f'**{selected_match["players"][1]}**')
+                    player2_score = st.number_input(
+                        f"Score for {selected_match['players'][1]}",
+                        min_value=50,
+                        max_value=150,
+                        value=selected_match.get('course_par', 72),
+                        key="player2_score"
+                    )
             
             # Additional match details
             st.markdown('<div class="subsection-header">Match Conditions</div>', unsafe_allow_html=True)
@@ -104,22 +127,23 @@ def show_score_entry_page():
                     key="duration_select"
                 )
             
-            # Player performance stats
-            st.markdown('<div class="subsection-header">Player Performance</div>', unsafe_allow_html=True)
+            if not hole_by_hole:
+                # Player performance stats
+                st.markdown('<div class="subsection-header">Player Performance</div>', unsafe_allow_html=True)
             
-            col1, col2 = st.columns(2)
+                col1, col2 = st.columns(2)
             
-            with col1:
-                st.write(f"**{selected_match['players'][0]} Stats**")
-                fairways_p1 = st.slider(f"Fairways Hit %", 0, 100, 70, key="fairways_p1")
-                greens_p1 = st.slider(f"Greens in Regulation %", 0, 100, 60, key="greens_p1")
-                putts_p1 = st.number_input(f"Total Putts", min_value=10, max_value=50, value=30, key="putts_p1")
+                with col1:
+                    st.write(f"**{selected_match['players'][0]} Stats**")
+                    fairways_p1 = st.slider(f"Fairways Hit %", 0, 100, 70, key="fairways_p1")
+                    greens_p1 = st.slider(f"Greens in Regulation %", 0, 100, 60, key="greens_p1")
+                    putts_p1 = st.number_input(f"Total Putts", min_value=10, max_value=50, value=30, key="putts_p1")
             
-            with col2:
-                st.write(f"**{selected_match['players'][1]} Stats**")
-                fairways_p2 = st.slider(f"Fairways Hit %", 0, 100, 70, key="fairways_p2")
-                greens_p2 = st.slider(f"Greens in Regulation %", 0, 100, 60, key="greens_p2")
-                putts_p2 = st.number_input(f"Total Putts", min_value=10, max_value=50, value=30, key="putts_p2")
+                with col2:
+                    st.write(f"**{selected_match['players'][1]} Stats**")
+                    fairways_p2 = st.slider(f"Fairways Hit %", 0, 100, 70, key="fairways_p2")
+                    greens_p2 = st.slider(f"Greens in Regulation %", 0, 100, 60, key="greens_p2")
+                    putts_p2 = st.number_input(f"Total Putts", min_value=10, max_value=50, value=30, key="putts_p2")
             
             notes = st.text_area("Additional Notes", placeholder="Enter any additional match notes...")
             
@@ -127,57 +151,203 @@ def show_score_entry_page():
             submitted = st.form_submit_button("Submit Scores", use_container_width=True)
             
             if submitted:
-                # Update match with scores and mark as completed
-                for i, match in enumerate(st.session_state.matches):
-                    if match['id'] == selected_match['id']:
-                        st.session_state.matches[i]['scores'] = [player1_score, player2_score]
-                        st.session_state.matches[i]['status'] = 'Completed'
-                        st.session_state.matches[i]['weather'] = weather
-                        st.session_state.matches[i]['course_condition'] = course_condition
-                        st.session_state.matches[i]['duration'] = match_duration
-                        st.session_state.matches[i]['player_stats'] = {
-                            selected_match['players'][0]: {
-                                'fairways_hit': fairways_p1,
-                                'greens_in_regulation': greens_p1,
-                                'total_putts': putts_p1
-                            },
-                            selected_match['players'][1]: {
-                                'fairways_hit': fairways_p2,
-                                'greens_in_regulation': greens_p2,
-                                'total_putts': putts_p2
-                            }
-                        }
-                        st.session_state.matches[i]['notes'] = notes
-                        st.session_state.matches[i]['completed_date'] = datetime.now()
-                        break
+                if hole_by_hole:
+                    scorecards = np.stack([card_from_table(table, pars) for table in hole_tables])
+                    if (scorecards[..., scorecard.STROKES] < 0).any():
+                        st.error("Enter the strokes on every hole for both players.")
+                        return
+                    round_totals = [scorecard.totals(card) for card in scorecards]
+                    player1_score, player2_score = (totals['score'] for totals in round_totals)
+                    (fairways_p1, greens_p1, putts_p1), (fairways_p2, greens_p2, putts_p2) = (
+                        (totals['fairways_hit'], totals['greens_in_regulation'], totals['total_putts'])
+                        for totals in round_totals
+                    )
                 
-                # Update leaderboard points
-                update_leaderboard(selected_match['players'][0], player1_score)
-                update_leaderboard(selected_match['players'][1], player2_score)
+                # Update match with scores and mark as completed
+                completed_match = dict(selected_match)
+                completed_match['scores'] = [player1_score, player2_score]
+                completed_match['status'] = 'Completed'
+                completed_match['weather'] = weather
+                completed_match['course_condition'] = course_condition
+                completed_match['duration'] = match_duration
+                completed_match['player_stats'] = {
+                    selected_match['players'][0]: {
+                        'fairways_hit': fairways_p1,
+                        'greens_in_regulation': greens_p1,
+                        'total_putts': putts_p1
+                    },
+                    selected_match['players'][1]: {
+                        'fairways_hit': fairways_p2,
+                        'greens_in_regulation': greens_p2,
+                        'total_putts': putts_p2
+                    }
+                }
+                if hole_by_hole:
+                    completed_match['scorecards'] = scorecards
+                completed_match['notes'] = notes
+                completed_match['completed_date'] = datetime.now()
                 
-                # Save matches to persistent storage
-                from app import save_matches
-                save_matches(st.session_state.matches)
+                # Save the completed match to persistent storage; this fails
+                # if the match was already scored in another session
+                from app import save_match
+                if save_match(completed_match, expected_version=selected_match.get('version', 0)) is not None:
+                    # Update leaderboard points
+                    update_leaderboard(selected_match['player_ids'][0], player1_score)
+                    update_leaderboard(selected_match['player_ids'][1], player2_score)
+                    
+                    st.success("✅ Scores submitted successfully!")
+                    st.balloons()
+                    st.rerun()
+
+def show_team_score_form(match):
+    """Scores of a Best Ball, Scramble or Foursomes match"""
+    from app import get_team, save_match
+    from Utils.teams import ONE_BALL_FORMATS, best_ball, sides
+    
+    teams = [get_team(team_id) for team_id in match['teams']]
+    names = dict(zip(match['player_ids'], match['players']))
+    course_par = match.get('course_par', 72)
+    # Scramble and Foursomes play one ball per team
+    one_ball = match.get('format') in ONE_BALL_FORMATS
+    
+    with st.form("team_score_entry_form"):
+        header = "Enter Team Scores" if one_ball else "Enter Player Scores (each team counts its better ball)"
+        st.markdown(f'<div class="subsection-header">{header}</div>', unsafe_allow_html=True)
+        
+        entered = []
+        for column, team, side in zip(st.columns(2), teams, sides(match)):
+            with column:
+                st.markdown(f"**{team['name']}**")
+                if one_ball:
+                    entered.append(st.number_input(
+                        f"Score for {team['name']}", min_value=50, max_value=150, value=course_par,
+                        key=f"team_score_{team['id']}"
+                    ))
+                else:
+                    for player_id in side:
+                        entered.append(st.number_input(
+                            f"Score for {names[player_id]}", min_value=50, max_value=150, value=course_par,
+                            key=f"team_player_score_{player_id}"
+                        ))
+        
+        notes = st.text_area("Additional Notes", placeholder="Enter any additional match notes...", key="team_notes")
+        submitted = st.form_submit_button("Submit Scores", use_container_width=True)
+        
+        if submitted:
+            completed_match = dict(match)
+            if one_ball:
+                completed_match['team_scores'] = entered
+            else:
+                completed_match['scores'] = entered
+                completed_match['team_scores'] = best_ball(entered)
+            completed_match['status'] = 'Completed'
+            completed_match['notes'] = notes
+            completed_match['completed_date'] = datetime.now()
+            
+            # Team standings are updated by the store when the match is saved
+            if save_match(completed_match, expected_version=match.get('version', 0)) is not None:
+                # Only rounds played with a player's own ball earn individual points
+                if not one_ball:
+                    for player_id, score in zip(match['player_ids'], entered):
+                        update_leaderboard(player_id, score)
                 
                 st.success("✅ Scores submitted successfully!")
                 st.balloons()
                 st.rerun()
 
-def update_leaderboard(player_name, score):
+def hole_editor(pars, key):
+    """Editable hole-by-hole table of one player's round, prefilled with the pars"""
+    holes = pd.DataFrame({
+        'Hole': range(1, len(pars) + 1),
+        'Par': pars,
+        'Strokes': pars,
+        'Putts': [2] * len(pars),
+        'Fairway': [False] * len(pars),
+        'GIR': [False] * len(pars),
+        'Penalties': [0] * len(pars)
+    })
+    return st.data_editor(
+        holes,
+        column_config={
+            'Hole': st.column_config.NumberColumn(disabled=True),
+            'Par': st.column_config.NumberColumn(disabled=True),
+            'Strokes': st.column_config.NumberColumn(min_value=1, max_value=20, step=1, required=True),
+            'Putts': st.column_config.NumberColumn(min_value=0, max_value=10, step=1),
+            'Fairway': st.column_config.CheckboxColumn(help="Tee shot finished in the fairway (not counted on par 3s)"),
+            'GIR': st.column_config.CheckboxColumn(help="Reached the green with two putts left for par"),
+            'Penalties': st.column_config.NumberColumn(min_value=0, max_value=10, step=1)
+        },
+        hide_index=True,
+        use_container_width=True,
+        num_rows="fixed",
+        key=key
+    )
+
+def card_from_table(holes, pars):
+    """Scorecard array of an edited hole table; blank cells are not recorded"""
+    from Utils import scorecard
+    
+    def values(column):
+        return [None if pd.isna(value) else value for value in holes[column]]
+    
+    return scorecard.from_holes(values('Strokes'), values('Putts'), values('Fairway'),
+                                values('GIR'), values('Penalties'), pars)
+
+def update_leaderboard(player_id, score):
     """Update leaderboard points for a player"""
     # Award points based on score (lower is better in golf)
-    points_earned = max(0, 100 - score)  # Simple points calculation
+    from Utils.leaderboard import match_points
+    points_earned = match_points(score)
     
-    # Find player in leaderboard and update their points
-    for player in st.session_state.leaderboard:
-        if player['name'] == player_name:
-            player['points'] += points_earned
-            player['matches_played'] = player.get('matches_played', 0) + 1
-            break
+    # Update the player's leaderboard entry in place
+    from app import add_leaderboard_points
+    add_leaderboard_points(player_id, points_earned)
+
+@timed()
+def show_bulk_import_section():
+    """Import past rounds from a CSV export"""
+    st.markdown("---")
+    with st.expander("📥 Import Past Scorecards (CSV)"):
+        st.write(
+            "One row per player's round with columns `date`, `course`, `player` and `score`. "
+            "Optional: `match`, `course_par`, `handicap`, `format`, `total_putts`, "
+            "`fairways_hit`, `greens_in_regulation`."
+        )
+        uploaded = st.file_uploader("Scorecard CSV", type=['csv'], key="import_csv")
+        dry_run = st.checkbox("Validate only", key="import_dry_run")
+        
+        if uploaded is not None and st.button("Import Rounds", use_container_width=True):
+            from Utils.match_import import import_upload
+            with st.spinner("Importing rounds..."):
+                report = import_upload(uploaded, dry_run=dry_run)
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Rows", report.rows)
+            with col2:
+                st.metric("Matches" if not dry_run else "Matches to Import", report.matches)
+            with col3:
+                st.metric("Duplicates", report.duplicates)
+            with col4:
+                st.metric("Rows/sec", f"{report.rows_per_second:,.0f}")
+            
+            if report.errors:
+                st.warning(f"{len(report.errors)} rows were skipped:")
+                st.dataframe(
+                    [{'Line': line, 'Problem': message} for line, message in report.errors[:500]],
+                    use_container_width=True,
+                    hide_index=True
+                )
+            if report.matches and not dry_run:
+                st.success(f"✅ Imported {report.matches} matches")
 
 # Check authentication
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please log in to enter scores.")
 else:
     show_score_entry_page()
+    # Only administrators (GOLF_ADMINS) can bulk import rounds
+    from app import is_admin
+    if is_admin():
+        show_bulk_import_section()
 
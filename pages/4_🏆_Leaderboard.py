@@ -1,6 +1,13 @@
 import streamlit as st
 import pandas as pd
+from datetime import datetime
 
+from Utils.instrumentation import span, timed
+
+# Number of ranks rendered per leaderboard page
+PAGE_SIZE = 25
+
+@timed()
 def show_leaderboard_page():
     # st.markdown('<div class="main-header">Leaderboard</div>', unsafe_allow_html=True)
     st.markdown("""
@@ -26,110 +33,104 @@ def show_leaderboard_page():
         show_player_leaderboard()
     else:
         show_team_leaderboard()
+    
+    show_export_section()
 
+@timed()
 def show_player_leaderboard():
     st.markdown('<div class="section-header">Player Rankings</div>', unsafe_allow_html=True)
     
+    from app import get_leaderboard, get_current_user, get_rounds_frame
+    from Utils.match_frame import win_rates
+    leaderboard = get_leaderboard()
+    
+    if not len(leaderboard):
+        st.info("No players on the leaderboard yet. Submit a score to get ranked!")
+        return
+    
     # Sort options
-    col1, col2 = st.columns(2)
+    col1, col2, col3 = st.columns(3)
     with col1:
         sort_by = st.selectbox("Sort By", ["Points", "Handicap", "Matches Played"])
     with col2:
         sort_order = st.radio("Order", ["Descending", "Ascending"], horizontal=True)
+    with col3:
+        page_count = max(1, (len(leaderboard) + PAGE_SIZE - 1) // PAGE_SIZE)
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1)
     
-    # Sort data
-    sorted_leaderboard = sorted(
-        st.session_state.leaderboard,
-        key=lambda x: x[sort_by.lower().replace(' ', '_')],
-        reverse=(sort_order == "Descending")
-    )
+    sort_key = sort_by.lower().replace(' ', '_')
+    descending = sort_order == "Descending"
+    
+    # Only the visible page of the pre-sorted leaderboard is rendered
+    offset = (page_number - 1) * PAGE_SIZE
+    page_entries = leaderboard.page(sort_key, descending, offset, PAGE_SIZE)
+    
+    # Win rates for every player in one group-by over the cached rounds frame
+    player_win_rates = win_rates(get_rounds_frame())['win_rate']
     
     # Create display data
     display_data = []
-    for i, player in enumerate(sorted_leaderboard, 1):
+    for i, player in enumerate(page_entries, offset + 1):
         display_data.append({
             'Rank': i,
             'Player': player['name'],
             'Handicap': player['handicap'],
             'Points': player['points'],
-            'Matches': player.get('matches_played', 0)
+            'Matches': player.get('matches_played', 0),
+            'Win Rate': f"{player_win_rates.get(player['player_id'], 0.0):.1f}%"
         })
     
     # Display as dataframe with styling
-    df = pd.DataFrame(display_data)
-    df = df.set_index('Rank')
-    
-    # Apply styling
-    def style_leaderboard(row):
-        if row.name == 1:  # First place
-            return ['background-color: #FFD700; font-weight: bold'] * len(row)
-        elif row.name == 2:  # Second place
-            return ['background-color: #C0C0C0; font-weight: bold'] * len(row)
-        elif row.name == 3:  # Third place
-            return ['background-color: #CD7F32; font-weight: bold'] * len(row)
-        elif row.name <= 10:  # Top 10
-            return ['background-color: #e8f4f8'] * len(row)
-        else:
-            return [''] * len(row)
-    
-    styled_df = df.style.apply(style_leaderboard, axis=1)
-    st.dataframe(styled_df, use_container_width=True)
+    with span('leaderboard table'):
+        df = pd.DataFrame(display_data)
+        df = df.set_index('Rank')
+        
+        # Apply styling
+        def style_leaderboard(row):
+            if row.name == 1:  # First place
+                return ['background-color: #FFD700; font-weight: bold'] * len(row)
+            elif row.name == 2:  # Second place
+                return ['background-color: #C0C0C0; font-weight: bold'] * len(row)
+            elif row.name == 3:  # Third place
+                return ['background-color: #CD7F32; font-weight: bold'] * len(row)
+            elif row.name <= 10:  # Top 10
+                return ['background-color: #e8f4f8'] * len(row)
+            else:
+                return [''] * len(row)
+        
+        styled_df = df.style.apply(style_leaderboard, axis=1)
+        st.dataframe(styled_df, use_container_width=True)
     
     # Current user's position
-    user_info = st.session_state.users[st.session_state.current_user]
-    user_rank = None
-    for i, player in enumerate(sorted_leaderboard, 1):
-        if player['name'] == user_info['name']:
-            user_rank = i
-            break
+    user_info = get_current_user()
+    user_rank = leaderboard.rank_of(user_info['player_id'], sort_key, descending)
     
     if user_rank:
         st.markdown("---")
-        st.markdown(f"**Your Position:** #{user_rank} out of {len(sorted_leaderboard)} players")
+        st.markdown(f"**Your Position:** #{user_rank} out of {len(leaderboard)} players")
         
         # Progress to next rank
         if user_rank > 1:
-            points_to_next = sorted_leaderboard[user_rank-2]['points'] - sorted_leaderboard[user_rank-1]['points'] + 1
+            next_player = leaderboard.page(sort_key, descending, user_rank - 2, 1)[0]
+            points_to_next = next_player['points'] - leaderboard.get(user_info['player_id'])['points'] + 1
             st.info(f"You need {points_to_next} more points to reach rank #{user_rank-1}")
 
+@timed()
 def show_team_leaderboard():
     st.markdown('<div class="section-header">Team Rankings</div>', unsafe_allow_html=True)
     
-    # Calculate team points
-    teams = {}
-    for match in st.session_state.matches:
-        if match['status'] == 'Completed' and 'scores' in match:
-            for team in match['teams']:
-                if team not in teams:
-                    teams[team] = {'points': 0, 'matches': 0, 'wins': 0}
-                
-                teams[team]['matches'] += 1
-                # Award points: 3 for win, 1 for tie, 0 for loss
-                other_team = [t for t in match['teams'] if t != team][0]
-                if match['scores'][team] < match['scores'][other_team]:
-                    teams[team]['points'] += 3
-                    teams[team]['wins'] += 1
-                elif match['scores'][team] == match['scores'][other_team]:
-                    teams[team]['points'] += 1
-    
-    if not teams:
-        st.info("No team data available yet. Complete some matches to see team rankings!")
-        return
+    from app import get_team, get_team_standings, get_teams, player_name
+    from Utils.teams import leaderboard_rows
     
-    # Create team ranking data
-    team_data = []
-    for team, stats in teams.items():
-        win_rate = (stats['wins'] / stats['matches']) * 100 if stats['matches'] > 0 else 0
-        team_data.append({
-            'Team': team,
-            'Points': stats['points'],
-            'Matches': stats['matches'],
-            'Wins': stats['wins'],
-            'Win Rate': f"{win_rate:.1f}%"
-        })
+    # Standings are updated when team scores are submitted, already ranked
+    team_data = leaderboard_rows(get_team_standings(), get_team, player_name)
     
-    # Sort by points
-    team_data.sort(key=lambda x: x['Points'], reverse=True)
+    if not team_data:
+        if get_teams():
+            st.info("No team matches completed yet. Schedule a Best Ball, Scramble or Foursomes match on the Matches page!")
+        else:
+            st.info("No teams yet. Create a team on the Matches page to start team play!")
+        return
     
     # Display team rankings
     for i, team in enumerate(team_data, 1):
@@ -139,6 +140,7 @@ def show_team_leaderboard():
             
             with col1:
                 st.write(f"**#{i} {team['Team']}**")
+                st.caption(team['Players'])
             with col2:
                 st.write(f"**{team['Points']}** pts")
             with col3:
@@ -150,6 +152,45 @@ def show_team_leaderboard():
             
             st.markdown('</div>', unsafe_allow_html=True)
 
+def show_export_section():
+    """Download matches, player stats or standings as CSV or Parquet"""
+    from Utils import data_export
+    
+    st.markdown("---")
+    with st.expander("📤 Export Data"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            dataset = st.selectbox(
+                "Data",
+                ["matches", "player_stats", "leaderboard"],
+                format_func=lambda name: name.replace('_', ' ').title(),
+                key="export_dataset"
+            )
+        with col2:
+            formats = ["CSV", "Parquet"] if data_export.parquet_available() else ["CSV"]
+            file_format = st.selectbox("Format", formats, key="export_format").lower()
+        with col3:
+            season = st.number_input(
+                "Season (0 = all)",
+                min_value=0,
+                max_value=datetime.now().year,
+                value=0,
+                disabled=dataset != "matches",
+                key="export_season"
+            )
+        
+        options = {'season': season or None} if dataset == "matches" else {}
+        file_name = f"{dataset}{f'-{season}' if options.get('season') else ''}.{file_format}"
+        
+        # The export only runs when the button is clicked
+        st.download_button(
+            f"Download {file_name}",
+            data=lambda: data_export.export_bytes(dataset, file_format, **options),
+            file_name=file_name,
+            mime="text/csv" if file_format == "csv" else "application/octet-stream",
+            use_container_width=True
+        )
+
 # Check authentication
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
     st.warning("Please log in to view the leaderboard.")
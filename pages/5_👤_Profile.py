@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 
+from Utils.instrumentation import timed
+
+@timed()
 def show_profile_page():
     # st.markdown('<div class="main-header">Your Profile</div>', unsafe_allow_html=True)
     st.markdown("""
@@ -16,7 +19,9 @@ def show_profile_page():
     </h1>
     """, unsafe_allow_html=True)
     
-    user_info = st.session_state.users[st.session_state.current_user]
+    from app import get_current_user, get_handicap_index, update_user, rename_player, change_password
+    
+    user_info = get_current_user()
     
     # Two-column layout
     col1, col2 = st.columns([2, 1])
@@ -40,34 +45,51 @@ def show_profile_page():
                     index=get_country_index(user_info['country'])
                 )
             
-            handicap = st.slider(
-                "Handicap", 
-                0, 
-                36, 
-                user_info['handicap'],
-                help="Your current golf handicap"
-            )
+            # Once three rounds are scored the handicap index is calculated
+            handicap_index = get_handicap_index(user_info['player_id'])
+            if handicap_index is not None:
+                st.number_input(
+                    "Handicap Index",
+                    value=float(handicap_index),
+                    disabled=True,
+                    help="Calculated from your best differentials of the last 20 rounds"
+                )
+                handicap = handicap_index
+            else:
+                handicap = st.slider(
+                    "Handicap", 
+                    0, 
+                    36, 
+                    int(round(user_info['handicap'])),
+                    help="Your current golf handicap"
+                )
             
             # Submit button
             submitted = st.form_submit_button("Update Profile", use_container_width=True)
             
             if submitted:
                 # Update user info
-                st.session_state.users[st.session_state.current_user].update({
+                updated_info = dict(user_info)
+                updated_info.update({
                     'name': name,
                     'phone': phone,
                     'country': country,
                     'handicap': handicap
                 })
                 
-                # Update leaderboard handicap
-                update_leaderboard_handicap(name, handicap)
-                
-                # Save to persistent storage
-                from app import save_users
-                save_users(st.session_state.users)
-                
-                st.success("✅ Profile updated successfully!")
+                # Save to persistent storage, refusing to overwrite a change
+                # made in another session
+                if update_user(st.session_state.current_user, updated_info,
+                               expected_version=user_info.get('version', 0)):
+                    # Matches and rankings refer to the player id, so a
+                    # rename only changes the displayed name
+                    if name != user_info['name']:
+                        rename_player(user_info['player_id'], name)
+                    # Update leaderboard handicap
+                    update_leaderboard_handicap(user_info['player_id'], handicap)
+                    user_info = get_current_user()
+                    
+                    st.success("✅ Profile updated successfully!")
         
         # Change password section
         st.markdown('<div class="section-header">Change Password</div>', unsafe_allow_html=True)
@@ -80,16 +102,16 @@ def show_profile_page():
             password_submitted = st.form_submit_button("Change Password", use_container_width=True)
             
             if password_submitted:
-                if current_password != user_info['password']:
-                    st.error("Current password is incorrect")
-                elif new_password != confirm_password:
+                if new_password != confirm_password:
                     st.error("New passwords do not match")
                 elif len(new_password) < 6:
                     st.error("Password must be at least 6 characters long")
                 else:
-                    st.session_state.users[st.session_state.current_user]['password'] = new_password
-                    save_users(st.session_state.users)
-                    st.success("✅ Password changed successfully!")
+                    changed = change_password(st.session_state.current_user, current_password, new_password)
+                    if changed:
+                        st.success("✅ Password changed successfully!")
+                    elif changed is False:
+                        st.error("Current password is incorrect")
     
     with col2:
         # Player statistics
@@ -97,7 +119,7 @@ def show_profile_page():
         st.markdown('<div class="profile-container">', unsafe_allow_html=True)
         
         # Calculate player statistics
-        player_stats = calculate_player_statistics(user_info['name'])
+        player_stats = calculate_player_statistics(user_info['player_id'])
         
         st.write(f"**Player:** {user_info['name']}")
         st.write(f"**Member Since:** {get_member_since()}")
@@ -122,16 +144,26 @@ def show_profile_page():
         st.markdown('<div class="section-header">Recent Matches</div>', unsafe_allow_html=True)
         st.markdown('<div class="profile-container">', unsafe_allow_html=True)
         
-        recent_matches = get_recent_matches(user_info['name'])
+        recent_matches = get_recent_matches(user_info['player_id'])
         
         if recent_matches:
-            for match in recent_matches[:3]:  # Show last 3 matches
+            for match in recent_matches:
                 with st.container():
-                    # Determine match result
-                    user_index = match['players'].index(user_info['name'])
-                    user_score = match['scores'][user_index]
-                    opponent_index = 1 - user_index
-                    opponent_score = match['scores'][opponent_index]
+                    # Determine match result; team matches count the team scores
+                    if 'team_scores' in match:
+                        from app import get_team
+                        from Utils.teams import sides
+                        user_index = 0 if user_info['player_id'] in sides(match)[0] else 1
+                        opponent_index = 1 - user_index
+                        user_score = match['team_scores'][user_index]
+                        opponent_score = match['team_scores'][opponent_index]
+                        opponent = (get_team(match['teams'][opponent_index]) or {}).get('name', 'Team')
+                    else:
+                        user_index = match['player_ids'].index(user_info['player_id'])
+                        user_score = match['scores'][user_index]
+                        opponent_index = 1 - user_index
+                        opponent_score = match['scores'][opponent_index]
+                        opponent = match['players'][opponent_index]
                     
                     if user_score < opponent_score:
                         result = "🏆 Win"
@@ -143,7 +175,7 @@ def show_profile_page():
                         result = "❌ Loss"
                         result_color = "red"
                     
-                    st.write(f"**vs {match['players'][opponent_index]}**")
+                    st.write(f"**vs {opponent}**")
                     st.write(f"Score: {user_score} - {opponent_score}")
                     st.write(f"Result: {result}")
                     st.write(f"Date: {match['date'].strftime('%m/%d/%Y')}")
@@ -173,78 +205,30 @@ def get_country_index(country):
     countries = ["United States", "United Kingdom", "Canada", "Australia", "India", "Other"]
     return countries.index(country) if country in countries else 5
 
-def calculate_player_statistics(player_name):
+@timed()
+def calculate_player_statistics(player_id):
     """Calculate statistics for the player"""
-    # Get player's matches
-    player_matches = [m for m in st.session_state.matches 
-                     if player_name in m.get('players', []) and m['status'] == 'Completed']
-    
-    total_matches = len(player_matches)
-    wins = 0
-    scores = []
-    total_putts = 0
-    putts_count = 0
-    
-    for match in player_matches:
-        if 'scores' in match:
-            # Find player's score
-            player_index = match['players'].index(player_name)
-            player_score = match['scores'][player_index]
-            scores.append(player_score)
-            
-            # Determine win/loss
-            opponent_index = 1 - player_index
-            opponent_score = match['scores'][opponent_index]
-            if player_score < opponent_score:
-                wins += 1
-            
-            # Calculate putts if available
-            if 'player_stats' in match and player_name in match['player_stats']:
-                total_putts += match['player_stats'][player_name].get('total_putts', 30)
-                putts_count += 1
-    
-    win_rate = (wins / total_matches * 100) if total_matches > 0 else 0
-    avg_score = round(sum(scores) / len(scores), 1) if scores else 0
-    best_score = min(scores) if scores else 0
-    avg_putts = round(total_putts / putts_count, 1) if putts_count > 0 else 30.0
-    
-    return {
-        'total_matches': total_matches,
-        'wins': wins,
-        'win_rate': round(win_rate, 1),
-        'avg_score': avg_score,
-        'best_score': best_score,
-        'avg_putts': avg_putts
-    }
+    # Running aggregates, cached per data version (Utils.analytics)
+    from app import data_version
+    from Utils.analytics import player_statistics
+    return player_statistics(player_id, data_version())
 
-def get_recent_matches(player_name):
+def get_recent_matches(player_id):
     """Get recent matches for the player"""
-    player_matches = [m for m in st.session_state.matches 
-                     if player_name in m.get('players', []) and m['status'] == 'Completed']
+    from app import query_matches
     
-    # Sort by date descending and return
-    return sorted(player_matches, key=lambda x: x['date'], reverse=True)
+    # The three newest, sorted by date descending
+    return query_matches(player=player_id, status='Completed', newest_first=True, limit=3)
 
 def get_member_since():
     """Get member since date (simulated for now)"""
     # In a real app, this would come from user registration date
     return "January 2024"
 
-def update_leaderboard_handicap(player_name, new_handicap):
+def update_leaderboard_handicap(player_id, new_handicap):
     """Update player's handicap in the leaderboard"""
-    for player in st.session_state.leaderboard:
-        if player['name'] == player_name:
-            player['handicap'] = new_handicap
-            break
-
-def save_users(users):
-    """Save users to persistent storage"""
-    try:
-        import json
-        with open('users.json', 'w') as f:
-            json.dump(users, f, indent=2)
-    except:
-        st.error("Error saving user data")
+    from app import update_leaderboard_entry
+    update_leaderboard_entry(player_id, handicap=new_handicap)
 
 # Check authentication
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
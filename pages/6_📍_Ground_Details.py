@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 
+from Utils.course_catalog import get_catalog
+from Utils.instrumentation import timed
+
+@timed()
 def show_gps_page():
     # st.markdown('<div class="main-header">Ground Details</div>', unsafe_allow_html=True)
     st.markdown("""
@@ -16,36 +19,34 @@ def show_gps_page():
     </h1>
     """, unsafe_allow_html=True)
     
-    # Course selection
-    courses = [
-        "Bombay Presidency Golf Club (BPGC)",
-        "Willingdon Sports Club", 
-        "Kharghar Valley Golf Course",
-        "Royal Palms Golf & Country Club",
-        "9 Aces Golf Greens & Academy",
-        "Golden Swan Country Club"
-    ]
+    # Course selection, preselecting a course picked on another page
+    catalog = get_catalog()
+    courses = catalog.names()
+    preselected = catalog.get(st.session_state.get('selected_course'))
+    default_index = courses.index(preselected.name) if preselected is not None else 0
     
-    selected_course = st.selectbox("Select Course", courses)
+    selected_course = st.selectbox("Select Course", courses, index=default_index)
     
     if selected_course:
+        course = catalog.get(selected_course)
+        geometry = catalog.geometry(selected_course)
         st.markdown(f'<div class="section-header">{selected_course}</div>', unsafe_allow_html=True)
         
         # Course overview
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Total Par", "72")
+            st.metric("Total Par", course.par)
         with col2:
-            st.metric("Total Yardage", "6,800 yds")
+            st.metric("Total Yardage", f"{course.yardage:,} yds")
         with col3:
-            st.metric("Course Rating", "74.2")
+            st.metric("Course Rating", course.rating, help=f"Slope {course.slope}")
         
         # Course layout
         st.markdown('<div class="subsection-header">Course Layout</div>', unsafe_allow_html=True)
         
-        # Generate sample hole data
-        holes_data = generate_hole_data(selected_course)
+        # Hole data from the course catalog
+        holes_data = course_hole_data(course)
         holes_df = pd.DataFrame(holes_data)
         
         # Display hole information
@@ -73,22 +74,24 @@ def show_gps_page():
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            from_hole = st.selectbox("From Hole", range(1, 19), key="from_hole")
+            from_hole = st.selectbox("From Hole", range(1, len(course.holes) + 1), key="from_hole")
         
         with col2:
-            to_hole = st.selectbox("To Hole", range(1, 19), key="to_hole")
+            to_hole = st.selectbox("To Hole", range(1, len(course.holes) + 1), key="to_hole")
         
         with col3:
             st.write("")  # Spacer
             if st.button("Calculate Distance", use_container_width=True):
-                distance = calculate_distance(from_hole, to_hole, holes_data)
+                distance = calculate_distance(from_hole, to_hole, geometry)
                 st.success(f"📍 Distance: {distance} yards")
         
         # Current position simulation
         st.markdown('<div class="subsection-header">Current Position</div>', unsafe_allow_html=True)
         
-        current_hole = st.slider("Select your current hole", 1, 18, 1)
+        current_hole = st.slider("Select your current hole", 1, len(course.holes), 1)
         current_position = st.selectbox("Position on hole", ["Tee Box", "Fairway", "Green", "Hazard"])
+        point = position_on_hole(geometry, course.hole(current_hole), current_position)
+        nearest_hazard = geometry.nearest_hazard(current_hole, point)
         
         col1, col2 = st.columns(2)
         
@@ -102,10 +105,13 @@ def show_gps_page():
         
         with col2:
             st.write("**GPS Data**")
-            st.write("Latitude: 36.5653° N")
-            st.write("Longitude: 121.9500° W")
-            st.write("Elevation: 25 ft")
-            st.write("Distance to pin: 145 yds")
+            st.write(f"Position: {point[0]:.0f}, {point[1]:.0f} yds from the first tee")
+            st.write(f"Distance to pin: {geometry.to_green(current_hole, point):.0f} yds")
+            if nearest_hazard is not None:
+                kind, yards = nearest_hazard
+                st.write(f"Nearest hazard: {kind}, {yards:.0f} yds")
+            else:
+                st.write("Nearest hazard: none on this hole")
         
         # Shot tracking
         st.markdown('<div class="subsection-header">Shot Tracking</div>', unsafe_allow_html=True)
@@ -129,42 +135,44 @@ def show_gps_page():
                 ])
             
             if st.form_submit_button("Track Shot", use_container_width=True):
-                st.success(f"✅ Shot tracked: {shot_distance} yards with {club_used}")
+                # Assume the shot flew straight at the green from the current position
+                landing = geometry.advance(point, current_hole, shot_distance)
+                remaining = geometry.to_green(current_hole, landing)
+                st.success(f"✅ Shot tracked: {shot_distance} yards with {club_used}, {remaining:.0f} yds to the green")
+                hazards = geometry.hazard_distances(current_hole, landing)
+                if hazards:
+                    st.write("Hazards from the landing spot: " +
+                             ", ".join(f"{kind} {yards:.0f} yds" for kind, yards in hazards))
 
-def generate_hole_data(course_name):
-    # Generate sample hole data based on course
-    holes = []
-    for i in range(1, 19):
-        # Vary par and distance based on hole number
-        if i % 4 == 0:  # Par 5 on every 4th hole
-            par = 5
-            distance = np.random.randint(480, 550)
-        elif i % 2 == 0:  # Par 4 on even holes
-            par = 4
-            distance = np.random.randint(350, 420)
-        else:  # Par 3 on odd holes
-            par = 3
-            distance = np.random.randint(150, 220)
-        
-        holes.append({
-            "Hole": i,
-            "Par": par,
-            "Distance": distance,
-            "Handicap": i,
-            "Description": f"Hole #{i} - {par} par"
-        })
-    
-    return holes
+def course_hole_data(course):
+    # One display row per hole of a catalog course
+    return [
+        {
+            "Hole": hole.number,
+            "Par": hole.par,
+            "Distance": hole.yardage,
+            "Handicap": hole.stroke_index,
+            "Description": f"Hole #{hole.number} - {hole.par} par"
+        }
+        for hole in course.holes
+    ]
 
-def calculate_distance(from_hole, to_hole, holes_data):
-    # Simple distance calculation between holes
-    if from_hole == to_hole:
-        return holes_data[from_hole - 1]['Distance']
-    
-    # Calculate walking distance between holes
-    base_distance = 100  # Base walking distance between holes
-    hole_gap = abs(to_hole - from_hole)
-    return holes_data[from_hole - 1]['Distance'] + (base_distance * hole_gap)
+def calculate_distance(from_hole, to_hole, geometry):
+    # Straight-line distance from the tee of one hole to the green of another,
+    # read from the course's precomputed distance matrix
+    return round(geometry.tee_to_green(from_hole, to_hole))
+
+def position_on_hole(geometry, hole, position):
+    # Coordinates for a position on a hole; fairway positions are picked by distance
+    if position == "Tee Box":
+        return geometry.tees[hole.number - 1]
+    if position == "Green":
+        return geometry.greens[hole.number - 1]
+    hazards, _ = geometry.hole_hazards(hole.number)
+    if position == "Hazard" and len(hazards):
+        return hazards[0]
+    yards = st.slider("Yards from tee", 0, hole.yardage, min(250, hole.yardage // 2), key="yards_from_tee")
+    return geometry.point_on_hole(hole.number, yards)
 
 # Check authentication
 if 'authenticated' not in st.session_state or not st.session_state.authenticated:
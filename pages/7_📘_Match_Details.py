@@ -1,26 +1,24 @@
 import streamlit as st
 import pandas as pd
-import os
 from datetime import datetime
 
+from Utils.course_catalog import get_catalog
+from Utils.instrumentation import timed
+from Utils.match_records import append_record, get_view
+
 DATA_FILE = "match_records.csv"
 
+@timed()
 def load_match_data():
-    """Load match data if CSV exists, otherwise create an empty DataFrame."""
-    if os.path.exists(DATA_FILE):
-        return pd.read_csv(DATA_FILE)
-    else:
-        return pd.DataFrame(columns=[
-            "User", "User Score", "Opponent", "Opponent Handicap", "Opponent Score",
-            "Ground", "Match Type", "Match Date", "Match Time", "Notes"
-        ])
+    """Load match data from the cached view, parsing only newly appended rows."""
+    return get_view(DATA_FILE)
 
+@timed()
 def save_match_data(new_record):
-    """Append a new record and save to CSV."""
-    df = load_match_data()
-    df = pd.concat([df, pd.DataFrame([new_record])], ignore_index=True)
-    df.to_csv(DATA_FILE, index=False)
+    """Append a new record to the CSV."""
+    append_record(new_record, DATA_FILE)
 
+@timed()
 def show_match_details_page():
     # st.markdown('<div class="main-header">🏌️‍♂️ Add Completed Match Details</div>', unsafe_allow_html=True)
     # st.markdown("Use this form to record completed match results, opponents, and notes.")
@@ -64,14 +62,7 @@ def show_match_details_page():
 
     # Section 2: Match Details
     st.markdown('<div class="section-header">Match Details</div>', unsafe_allow_html=True)
-    grounds = [
-        "Bombay Presidency Golf Club (BPGC)",
-        "Willingdon Sports Club",
-        "Kharghar Valley Golf Course",
-        "Royal Palms Golf & Country Club",
-        "9 Aces Golf Greens & Academy",
-        "Golden Swan Country Club"
-    ]
+    grounds = get_catalog().names()
     selected_ground = st.selectbox("Select Ground", grounds)
     match_type = st.selectbox("Match Type", ["Friendly", "Tournament", "Practice Round", "Club Match"])
 
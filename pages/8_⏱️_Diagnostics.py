@@ -0,0 +1,62 @@
+import streamlit as st
+
+from Utils import instrumentation
+
+def show_diagnostics_page():
+    st.markdown("""
+    <h1 style='
+        font-size: 36px;
+        font-weight: bold;
+        color: #2E8B57;
+        text-align: center;
+        margin-bottom: 10px;
+    '>
+        Performance Diagnostics
+    </h1>
+    """, unsafe_allow_html=True)
+
+    # Recording is process-wide: it times every session's reruns
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        recording = st.toggle("Record rerun timings", value=instrumentation.enabled(),
+                              help="Process-wide; adds tens of microseconds per span while on")
+        if recording != instrumentation.enabled():
+            instrumentation.set_enabled(recording)
+    with col2:
+        if st.button("Clear Timings"):
+            instrumentation.clear()
+            st.rerun()
+
+    recorded = instrumentation.spans()
+    st.caption(f"{len(recorded)} spans recorded (the last {instrumentation.BUFFER_SIZE} are kept)")
+
+    pages, spans = instrumentation.summarize(recorded)
+    if pages is None:
+        st.info("No timings recorded yet. Turn on recording, then use the app in another tab.")
+        return
+
+    st.markdown('<div class="section-header">Per Page</div>', unsafe_allow_html=True)
+    st.dataframe(pages, hide_index=True, use_container_width=True)
+
+    st.markdown('<div class="section-header">Per Span</div>', unsafe_allow_html=True)
+    page_filter = st.selectbox("Page", ["All Pages"] + pages['page'].tolist())
+    if page_filter != "All Pages":
+        spans = spans[spans['page'] == page_filter]
+    st.dataframe(spans, hide_index=True, use_container_width=True)
+
+    # Spans of the slowest recorded rerun, nested as they ran
+    st.markdown('<div class="section-header">Slowest Rerun</div>', unsafe_allow_html=True)
+    slowest = max((span for span in recorded if span.depth == 0), key=lambda span: span.seconds, default=None)
+    if slowest is not None:
+        rerun = [span for span in recorded if span.rerun == slowest.rerun]
+        # Spans are recorded as they end, so order them by start time
+        rerun.sort(key=lambda span: (span.ended - span.seconds, span.depth))
+        for span in rerun:
+            st.text(f"{'    ' * span.depth}{span.name}: {span.seconds * 1000:.1f} ms, {span.blocks:+d} blocks")
+
+# Only administrators (GOLF_ADMINS) can see this page
+from app import is_admin
+if not is_admin():
+    st.warning("This page is only available to administrators.")
+else:
+    show_diagnostics_page()
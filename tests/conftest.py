@@ -0,0 +1,15 @@
+import pytest
+
+from Utils import auth, course_catalog, match_archive, player_registry, shared_store, storage, teams
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """An empty working directory with fresh process-wide stores and a cheap password hash"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(auth, 'ITERATIONS', 1_000)
+    for module, name in [(auth, '_credentials'), (course_catalog, '_catalog'), (player_registry, '_registry'),
+                         (shared_store, '_store'), (storage, '_storage'), (teams, '_registry')]:
+        monkeypatch.setattr(module, name, None)
+    monkeypatch.setattr(match_archive, '_archives', {})
+    return tmp_path
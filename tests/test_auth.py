@@ -0,0 +1,58 @@
+"""Logging in to an install that still keeps plaintext passwords in users.json"""
+import json
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from Utils import auth, shared_store, storage
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+# users.json as written before credentials.json and the player registry existed
+LEGACY_USERS = {
+    'ann@example.com': {'name': 'Ann Shaw', 'phone': '440-0000-0001', 'country': 'India', 'handicap': 10,
+                        'password': 'secret1'},
+    'bob@example.com': {'name': 'Bob Reid', 'phone': '440-0000-0002', 'country': 'England', 'handicap': 18,
+                        'password': 'secret2'}
+}
+
+
+@pytest.fixture
+def legacy_install(workdir):
+    """A working directory holding only the legacy users.json"""
+    with open('users.json', 'w') as f:
+        json.dump(LEGACY_USERS, f)
+    return workdir
+
+
+def test_migrated_accounts_keep_their_passwords(legacy_install):
+    credentials = auth.get_credentials()
+    assert credentials.verify('ann@example.com', 'secret1')
+    assert credentials.verify('bob@example.com', 'secret2')
+    assert not credentials.verify('ann@example.com', 'secret2')
+    assert not credentials.verify('nobody@example.com', 'secret1')
+
+    users = storage.get_storage().load_users()
+    assert not any('password' in info for info in users.values())
+
+
+def test_migrated_player_ids_match_the_registry_migration(legacy_install):
+    credentials = auth.get_credentials()
+    # Building the store runs the player registry migration afterwards
+    store = shared_store.get_store()
+    for email in LEGACY_USERS:
+        player_id = credentials.player_id(email)
+        assert player_id is not None
+        assert store.get_user(email)['player_id'] == player_id
+
+
+def test_login_from_legacy_users(legacy_install):
+    app = AppTest.from_file(APP, default_timeout=60)
+    app.run()
+    app.text_input(key='login_email').set_value('ann@example.com')
+    app.text_input(key='login_password').set_value('secret1')
+    app.button[0].click().run()
+    assert not app.exception
+    assert app.session_state.authenticated
+    assert app.session_state.current_user == 'ann@example.com'
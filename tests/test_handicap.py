@@ -0,0 +1,104 @@
+"""Handicap indexes for short records, capped records and players without rounds"""
+import json
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Utils import shared_store
+from Utils.handicap import HandicapStore, compute
+
+# Courses missing from the catalog are rated at par with the standard slope,
+# so every differential is simply score - 72
+NO_CATALOG = {}
+
+
+def rounds_frame(scores, start=datetime(2026, 1, 1), player_id=1):
+    """Rounds frame of one player's scores, one day apart"""
+    return pd.DataFrame({
+        'match_id': np.arange(1, len(scores) + 1),
+        'date': [start + timedelta(days=day) for day in range(len(scores))],
+        'player_id': player_id,
+        'course': 'Practice Ground',
+        'course_par': 72,
+        'score': np.asarray(scores, dtype=np.float64)
+    })
+
+def indexes(scores):
+    return compute(rounds_frame(scores), NO_CATALOG)['index'].tolist()
+
+
+def test_short_records_use_best_of_and_adjustment():
+    # Differentials 10, 8, 13, 18, 7, 9
+    result = indexes([82, 80, 85, 90, 79, 81])
+    assert np.isnan(result[0]) and np.isnan(result[1])
+    # 3 rounds: lowest - 2; 4 rounds: lowest - 1; 5 rounds: lowest; 6 rounds: best 2 - 1
+    assert result[2:] == [6.0, 7.0, 7.0, 6.5]
+
+def test_full_window_averages_best_eight():
+    # Differentials 20 down to 1: the best 8 average 4.5, below every earlier index
+    assert indexes(list(range(92, 72, -1)))[-1] == 4.5
+
+def test_soft_cap_halves_the_increase_past_three():
+    # The low index is 8.0 (after three rounds of 10); twenty rounds of 13
+    # give an uncapped 13.0, an increase of 5: 8 + 3 + (5 - 3) / 2
+    assert indexes([82] * 20 + [85] * 20)[-1] == 12.0
+
+def test_hard_cap_limits_the_increase_to_five():
+    # Uncapped 28.0 against a low of 8.0
+    assert indexes([82] * 20 + [100] * 20)[-1] == 13.0
+
+def test_caps_only_apply_to_established_records():
+    # Nineteen rounds on record: the best 7 average (3 x 0 + 4 x 28) / 7 = 16.0,
+    # uncapped although the index after three rounds was -2.0
+    assert indexes([72, 72, 72] + [100] * 16)[-1] == 16.0
+
+
+def test_recompute_once_a_day(tmp_path):
+    store = HandicapStore(str(tmp_path / 'handicaps.json'))
+    store.load()
+    assert store.is_stale(date(2026, 2, 1))
+    assert store.recompute(rounds_frame([82, 80, 85]), NO_CATALOG, today=date(2026, 2, 1)) == {1: 6.0}
+    assert not store.is_stale(date(2026, 2, 1))
+    assert store.is_stale(date(2026, 2, 2))
+
+    reloaded = HandicapStore(store.path)
+    reloaded.load()
+    assert reloaded.current == {1: 6.0}
+    assert reloaded.index_on(1, [date(2026, 1, 1), date(2026, 1, 3)]) == [None, 6.0]
+
+
+USERS = {
+    'ann@example.com': {'name': 'Ann Shaw', 'phone': '1', 'country': 'India', 'handicap': 24, 'password': 'secret1'},
+    'bob@example.com': {'name': 'Bob Reid', 'phone': '2', 'country': 'India', 'handicap': 18, 'password': 'secret2'},
+    'cat@example.com': {'name': 'Cat Lowe', 'phone': '3', 'country': 'India', 'handicap': 20, 'password': 'secret3'}
+}
+
+
+@pytest.fixture
+def league(workdir):
+    # Ann plays three rounds, Bob two and Cat none
+    matches = [
+        {'id': i, 'date': f'2026-09-0{i}T10:00:00', 'players': ['Ann Shaw', 'Bob Reid'], 'status': 'Completed',
+         'location': 'Practice Ground', 'handicap': 10, 'scores': [score, 90]}
+        for i, score in enumerate([82, 80, 85], 1)
+    ]
+    matches[2]['players'] = ['Ann Shaw', 'Guest Gus']
+    with open('users.json', 'w') as f:
+        json.dump(USERS, f)
+    with open('matches.json', 'w') as f:
+        json.dump(matches, f)
+    return workdir
+
+
+def test_players_without_an_index_keep_their_handicap(league):
+    store = shared_store.get_store()
+    store.recompute_handicaps(force=True)
+    assert {email: info['handicap'] for email, info in store.users.items()} == {
+        'ann@example.com': 6.0, 'bob@example.com': 18, 'cat@example.com': 20
+    }
+    ann = store.registry.id_for_email('ann@example.com')
+    assert store.leaderboard.get(ann)['handicap'] == 6.0
+    # One write assigned the player id, one published the index
+    assert store.users['ann@example.com']['version'] == 2
@@ -0,0 +1,65 @@
+"""Leaderboard membership on an install upgraded from files without a leaderboard"""
+import json
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from Utils import shared_store
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+# users.json and matches.json as written before the leaderboard was persisted
+USERS = {
+    'ann@example.com': {'name': 'Ann Shaw', 'phone': '1', 'country': 'India', 'handicap': 10, 'password': 'secret1'},
+    'bob@example.com': {'name': 'Bob Reid', 'phone': '2', 'country': 'England', 'handicap': 18, 'password': 'secret2'},
+    'cat@example.com': {'name': 'Cat Lowe', 'phone': '3', 'country': 'India', 'handicap': 20, 'password': 'secret3'}
+}
+MATCHES = [
+    {'id': 1, 'date': '2026-09-01T10:00:00', 'players': ['Ann Shaw', 'Bob Reid'], 'status': 'Completed',
+     'location': 'Bombay Presidency Golf Club', 'handicap': 10, 'scores': [80, 76]},
+    {'id': 2, 'date': '2026-09-08T10:00:00', 'players': ['Ann Shaw', 'Guest Gus'], 'status': 'Completed',
+     'location': 'Bombay Presidency Golf Club', 'handicap': 10, 'scores': [78, 90]},
+    {'id': 3, 'date': '2030-01-01T10:00:00', 'players': ['Ann Shaw', 'Bob Reid'], 'status': 'Upcoming',
+     'location': 'Bombay Presidency Golf Club', 'handicap': 10}
+]
+
+
+@pytest.fixture
+def upgraded_install(workdir):
+    with open('users.json', 'w') as f:
+        json.dump(USERS, f)
+    with open('matches.json', 'w') as f:
+        json.dump(MATCHES, f)
+    return workdir
+
+
+def test_accounts_are_credited_from_history(upgraded_install):
+    store = shared_store.get_store()
+    entries = {entry['name']: (entry['points'], entry['matches_played']) for entry in store.leaderboard.page()}
+    # Players without an account are not ranked
+    assert entries == {'Ann Shaw': (20 + 22, 2), 'Bob Reid': (24, 1), 'Cat Lowe': (0, 0)}
+
+
+def test_first_credit_creates_the_entry(upgraded_install):
+    store = shared_store.get_store()
+    cat = store.registry.id_for_email('cat@example.com')
+    store.save_leaderboard([entry for entry in store.leaderboard.page() if entry['player_id'] != cat])
+    store.add_leaderboard_points(cat, 30)
+    assert store.leaderboard.get(cat)['points'] == 30
+    assert store.leaderboard.get(cat)['matches_played'] == 1
+
+    guest = store.registry.id_of('Guest Gus')
+    store.add_leaderboard_points(guest, 30)
+    assert store.leaderboard.get(guest) is None
+
+
+def test_leaderboard_page_after_upgrade(upgraded_install):
+    app = AppTest.from_file(APP, default_timeout=60)
+    app.run()
+    app.text_input(key='login_email').set_value('ann@example.com')
+    app.text_input(key='login_password').set_value('secret1')
+    app.button[0].click().run()
+    app.switch_page('pages/4_🏆_Leaderboard.py').run()
+    assert not app.exception
+    assert any('#1 out of 3 players' in markdown.value for markdown in app.markdown)
@@ -0,0 +1,71 @@
+"""Match id queries and keyset cursors of the in-memory match index"""
+from datetime import datetime
+
+from Utils.match_index import PlayerMatchIndex
+
+
+def match(match_id, day, player_ids, status='Completed'):
+    return {'id': match_id, 'date': datetime(2026, 5, day), 'player_ids': player_ids, 'status': status}
+
+MATCHES = [
+    match(1, 3, [1, 2]),
+    match(2, 1, [1, 3]),
+    match(3, 3, [2, 3]),
+    match(4, 2, [1, 2], 'Upcoming'),
+    match(5, 5, [1, 3])
+]
+
+
+def test_filters_order_by_date_then_id():
+    index = PlayerMatchIndex(MATCHES)
+    assert index.match_ids() == [2, 4, 1, 3, 5]
+    assert index.match_ids(player=1) == [2, 4, 1, 5]
+    assert index.match_ids(player=1, status='Completed', newest_first=True) == [5, 1, 2]
+    assert index.match_ids(status='Upcoming') == [4]
+    assert index.match_ids(player=9) == []
+    assert index.count(player=2) == 3
+    assert index.players() == [1, 2, 3]
+
+def test_offset_and_limit():
+    index = PlayerMatchIndex(MATCHES)
+    assert index.match_ids(limit=2, offset=1) == [4, 1]
+    assert index.match_ids(newest_first=True, limit=2, offset=1) == [3, 1]
+    assert index.match_ids(newest_first=True, offset=4) == [2]
+    assert index.match_ids(offset=10) == []
+
+def test_cursor_pages_do_not_shift():
+    index = PlayerMatchIndex(MATCHES)
+    # Oldest first, two at a time, each page resuming after the last row shown
+    assert index.match_ids(limit=2) == [2, 4]
+    after = (datetime(2026, 5, 2), 4)
+    assert index.match_ids(limit=2, after=after) == [1, 3]
+    # A match dated before the cursor does not move the next page
+    index.add(match(6, 1, [2, 3]))
+    assert index.match_ids(limit=2, after=after) == [1, 3]
+    # Matches on the cursor's date with a higher id are still to come
+    assert index.match_ids(after=(datetime(2026, 5, 3), 1)) == [3, 5]
+
+    assert index.match_ids(newest_first=True, limit=2) == [5, 3]
+    after = (datetime(2026, 5, 3), 3)
+    assert index.match_ids(newest_first=True, limit=2, after=after) == [1, 4]
+    index.add(match(7, 9, [1, 2]))
+    assert index.match_ids(newest_first=True, limit=2, after=after) == [1, 4]
+    assert index.match_ids(newest_first=True, offset=1, after=after) == [4, 6, 2]
+
+def test_resaving_a_match_moves_it():
+    index = PlayerMatchIndex(MATCHES)
+    index.add(match(4, 2, [1, 3], 'Completed'))
+    assert index.match_ids(status='Upcoming') == []
+    assert index.match_ids(player=2) == [1, 3]
+    assert index.match_ids(player=3, status='Completed') == [2, 4, 3, 5]
+
+    index.remove(2)
+    index.remove(2)
+    assert index.match_ids() == [4, 1, 3, 5]
+    assert index.match_ids(player=1) == [4, 1, 5]
+
+def test_later_copies_replace_earlier_ones():
+    index = PlayerMatchIndex(MATCHES + [match(2, 4, [1, 3], 'Abandoned')])
+    assert index.match_ids(player=3) == [3, 2, 5]
+    assert index.match_ids(status='Completed') == [1, 3, 5]
+    assert index.count() == 5
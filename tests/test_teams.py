@@ -0,0 +1,60 @@
+"""Best Ball team scores, results and team standings"""
+from datetime import datetime
+
+from Utils import scorecard
+from Utils.teams import WIN_POINTS, best_ball, build, opponent_scores, results
+
+
+def cards(*strokes_per_player, holes=3):
+    """Scorecards with only strokes entered, one row of strokes per player"""
+    cards = scorecard.empty(len(strokes_per_player), holes)
+    cards[..., scorecard.STROKES] = strokes_per_player
+    return cards
+
+
+def test_best_ball_from_totals():
+    # Team 1 is players 0 and 1, team 2 players 2 and 3
+    assert best_ball([80, 76, 78, 90]) == [76, 78]
+
+def test_best_ball_counts_the_better_ball_on_every_hole():
+    card = cards([4, 6, 2], [5, 4, 5], [4, 4, 4], [3, 5, 5])
+    # Totals 12, 14 | 12, 13; hole by hole 4 + 4 + 2 = 10 and 3 + 4 + 4 = 11
+    assert best_ball([12, 14, 12, 13], card) == [10, 11]
+
+def test_best_ball_falls_back_to_totals_for_incomplete_cards():
+    card = cards([4, 6, 3], [5, 4, scorecard.NOT_RECORDED], [4, 4, 4], [3, 5, 5])
+    assert best_ball([13, 14, 12, 13], card) == [13, 12]
+    # Cards for fewer players than scores
+    assert best_ball([13, 14, 12, 13], card[:2]) == [13, 12]
+
+def test_results():
+    assert results([70, 72]) == ['win', 'loss']
+    assert results([74, 72]) == ['loss', 'win']
+    assert results([72, 72]) == ['tie', 'tie']
+
+def test_opponent_scores():
+    team_match = {'teams': [1, 2], 'scores': [80, 76, 78, 90]}
+    assert opponent_scores(team_match, 0) == [78, 90]
+    assert opponent_scores(team_match, 3) == [80, 76]
+    individual = {'scores': [80, 76, 78]}
+    assert opponent_scores(individual, 1) == [80, 78]
+
+
+def team_match(match_id, teams, team_scores, status='Completed'):
+    return {'id': match_id, 'date': datetime(2026, 5, match_id), 'players': ['A', 'B', 'C', 'D'],
+            'player_ids': [1, 2, 3, 4], 'status': status, 'location': 'Practice Ground',
+            'format': 'Scramble', 'teams': teams, 'team_scores': team_scores}
+
+def test_standings_from_matches(workdir):
+    records = build([
+        team_match(1, [1, 2], [68, 70]),
+        team_match(2, [2, 1], [69, 69]),
+        team_match(3, [1, 3], [71, 66]),
+        team_match(4, [1, 2], [60, 90], status='Upcoming'),
+        {'id': 5, 'date': datetime(2026, 5, 5), 'players': ['A', 'B'], 'status': 'Completed', 'scores': [70, 72]}
+    ])
+    assert records == {
+        1: {'team_id': 1, 'points': WIN_POINTS + 1, 'matches': 3, 'wins': 1, 'ties': 1, 'strokes': 208},
+        2: {'team_id': 2, 'points': 1, 'matches': 2, 'wins': 0, 'ties': 1, 'strokes': 139},
+        3: {'team_id': 3, 'points': WIN_POINTS, 'matches': 1, 'wins': 1, 'ties': 0, 'strokes': 66}
+    }